@@ -0,0 +1,100 @@
+"""Crawl a synthetic site: throughput, revisits, dedup, resume and per-host spacing
+
+Run from the project root:
+
+    python -m benchmarks.bench_crawler [--pages 2000] [--pdfs 200] [--delay 0]
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from src.scrapers.crawler import Crawler, normalize_url
+from benchmarks.fixture_server import serve
+from benchmarks.fixture_site import generate_site
+
+
+def revisits(handler):
+    """Requests beyond the first per distinct URL"""
+    counts = {}
+    for path, hits in handler.hits.items():
+        url = normalize_url("http://fixture" + path)
+        counts[url] = counts.get(url, 0) + hits
+    return sum(hits - 1 for hits in counts.values())
+
+
+def mean_interval(handler):
+    """Average time between consecutive requests as they arrive, in seconds"""
+    times = sorted(at for at, _ in handler.times)
+    return (times[-1] - times[0]) / (len(times) - 1) if len(times) > 1 else 0.0
+
+
+def crawler_for(base_url, tmp, args, delay):
+    return Crawler([base_url], tmp / 'pdfs', tmp / 'manifest.json', tmp / 'state.json',
+                   max_depth=args.depth, max_pages=args.pages * 2, delay=delay,
+                   concurrency=args.concurrency, per_host=args.concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=2000)
+    parser.add_argument('--pdfs', type=int, default=200)
+    parser.add_argument('--depth', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--delay', type=float, default=0.0, help="seconds between requests to the host")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        pages, expected = generate_site(tmp / 'site', args.pages, args.pdfs)
+        print(f"site: {len(expected['pages'])} pages, {len(expected['pdfs'])} PDF URLs, "
+              f"{expected['contents']} distinct PDF contents")
+
+        # Full crawl
+        with serve(tmp / 'site', pages) as (base_url, handler):
+            crawler = crawler_for(base_url, tmp / 'full', args, args.delay)
+            start = time.perf_counter()
+            results = crawler.crawl()
+            elapsed = time.perf_counter() - start
+            page_paths = {urlsplit(url).path for url in crawler.state.seen if not url.endswith('.pdf')}
+            files = list((tmp / 'full' / 'pdfs').glob('*.pdf'))
+            print(f"full crawl: {elapsed:.2f}s, {crawler.state.pages_visited / elapsed:.0f} pages/s, "
+                  f"{len(handler.times)} requests, {revisits(handler)} revisits")
+            print(f"  pages found: {len(expected['pages'] & page_paths)}/{len(expected['pages'])}, "
+                  f"private fetched: {any('/private/' in path for path in handler.hits)}")
+            print(f"  PDFs: {sum(status == 'downloaded' for status in results.values())} downloaded, "
+                  f"{sum(status == 'duplicate' for status in results.values())} duplicates dropped, "
+                  f"{len(files)} files kept (expected {expected['contents']})")
+
+        # Interrupted crawl, then resumed from the saved state
+        with serve(tmp / 'site', pages) as (base_url, handler):
+            crawler = crawler_for(base_url, tmp / 'resume', args, args.delay)
+            crawler.save_every = 10
+
+            async def interrupted():
+                try:
+                    await asyncio.wait_for(crawler.run(), timeout=elapsed / 3)
+                except asyncio.TimeoutError:
+                    pass
+
+            asyncio.run(interrupted())
+            before = crawler.state.pages_visited
+            crawler = crawler_for(base_url, tmp / 'resume', args, args.delay)
+            crawler.crawl()
+            files = list((tmp / 'resume' / 'pdfs').glob('*.pdf'))
+            print(f"interrupted after {before} pages, resumed to {crawler.state.pages_visited}: "
+                  f"{revisits(handler)} revisits, {len(files)} files kept")
+
+        # Politeness: requests to the host at least the delay apart
+        delay = args.delay or 0.02
+        with serve(tmp / 'site', pages) as (base_url, handler):
+            crawler = Crawler([base_url], tmp / 'polite' / 'pdfs', tmp / 'polite' / 'manifest.json',
+                              max_depth=2, max_pages=50, delay=delay, concurrency=args.concurrency)
+            crawler.crawl()
+            print(f"delay {delay}s: {len(handler.times)} requests, mean interval {mean_interval(handler):.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Home page served from the pre-rendered site versus rendered by the template on every request
+
+Runs the API on a synthetic catalogue twice: without a built site, where
+/ renders index.html through Jinja2 and the page then fetches its first
+schemes from /schemes/, and with the site built by build_site, where / is
+the pre-rendered page held in memory with the schemes already in it.
+Times the server's work per request first, calling the app in-process,
+then loads a running server with keep-alive clients at every
+--concurrency level (on a small machine the clients, sharing its CPUs,
+cap these numbers). Run from the project root:
+
+    python -m benchmarks.bench_frontend --size 1000 --concurrency 1 16
+"""
+import argparse
+import asyncio
+import logging
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.catalogue import write_catalogue
+from benchmarks.suite import load, wait_for_server
+from src.api.service import SchemeService
+from src.api.site import build_site, PAGE_SIZE
+
+SERVER = """
+import sys
+from pathlib import Path
+from src.api import main, server
+from src.api.service import SchemeService
+
+root = Path(sys.argv[1])
+main.create_service = lambda **options: SchemeService(
+    data_dir=root / 'translated_schemes', english_file=root / 'processed_pdfs' / 'processed_schemes.json',
+    database_file=root / 'missing.sqlite3', **options
+)
+main.site.directory = root / sys.argv[2]
+server.serve('127.0.0.1', int(sys.argv[3]), 1, True)
+"""
+
+
+async def receive():
+    return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+
+async def send(message):
+    pass
+
+
+def request_scope(path):
+    path, _, query = path.partition('?')
+    return {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path, 'raw_path': path.encode('ascii'), 'query_string': query.encode('ascii'), 'root_path': '',
+        'headers': [(b'host', b'bench'), (b'accept-encoding', b'gzip, br')],
+        'client': ('127.0.0.1', 50000), 'server': ('127.0.0.1', 80)
+    }
+
+
+async def drive(app, path, requests):
+    """Microseconds of server time per request for path"""
+    for _ in range(100):
+        await app(request_scope(path), receive, send)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(request_scope(path), receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def in_process(root, runs, requests):
+    """Server time of each page load in runs, (label, site directory, paths), through the whole app"""
+    from fastapi.testclient import TestClient
+    from src.api import main
+
+    main.create_service = lambda **options: SchemeService(
+        data_dir=root / 'translated_schemes', english_file=root / 'processed_pdfs' / 'processed_schemes.json',
+        database_file=root / 'missing.sqlite3', **options
+    )
+    with TestClient(main.app):
+        for label, site_dir, paths in runs:
+            main.site.directory = root / site_dir
+            times = [asyncio.run(drive(main.app, path, requests)) for path in paths]
+            print(f"  {label}: {' + '.join(f'{path} {us:.0f} us' for path, us in zip(paths, times))} "
+                  f"= {sum(times):.0f} us of server time per page load, {1e6 / sum(times):.0f} loads/s per core",
+                  flush=True)
+
+
+async def page_loads(port, paths, requests):
+    """Milliseconds to load the page, each of paths requested one after the other on one connection"""
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        for path in paths:
+            await load(port, [path], 1, 1)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return sorted(latencies)[len(latencies) // 2]
+
+
+def run(root, site_dir, label, paths, args):
+    process = subprocess.Popen([sys.executable, '-c', SERVER, str(root), site_dir, str(args.port)],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_server(process, args.port)
+        asyncio.run(load(args.port, ['/'], 1, 10))
+        page_ms = asyncio.run(page_loads(args.port, paths, 50))
+        print(f"  {label}: page with its first {PAGE_SIZE} schemes in {len(paths)} request(s), "
+              f"median {page_ms:.2f} ms", flush=True)
+        for concurrency in args.concurrency:
+            latencies, errors, elapsed = asyncio.run(load(args.port, ['/'], concurrency, args.requests))
+            print(f"    GET /  concurrency {concurrency:>3}: {len(latencies) / elapsed:8.0f} req/s "
+                  f"({errors} errors)", flush=True)
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=1000, help="Schemes in the catalogue")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 16])
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        english_file, data_dir = write_catalogue(root, args.size)
+        service = SchemeService(data_dir=data_dir, english_file=english_file,
+                                database_file=root / 'missing.sqlite3', background_indexes=False)
+        build_site(service, root / 'site')
+        del service
+
+        runs = [('template', 'missing', ['/', f'/schemes/?lang=en&limit={PAGE_SIZE}']),
+                ('pre-rendered', 'site', ['/'])]
+        print(f"{args.size} schemes, in-process", flush=True)
+        in_process(root, runs, args.requests)
+        print("HTTP", flush=True)
+        for label, site_dir, paths in runs:
+            run(root, site_dir, label, paths, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Time a log call spends in the calling thread: synchronous handlers versus the background writer
+
+The old setup_logger attached a console and a file handler of its own on
+every call, so each record was formatted and written in the calling thread
+(once per call made for that name). setup_logger now hands records to one
+queue drained by a listener thread. Console output goes to /dev/null so the
+file write is what is measured. Run from the project root:
+
+    python -m benchmarks.bench_logging --records 100000
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.utils import logger as log_setup
+
+FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+def synchronous_logger(name, log_file, setups):
+    """The logger the old setup_logger returned after being called `setups` times for one name"""
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    for _ in range(setups):
+        for handler in [logging.StreamHandler(sys.stdout), logging.FileHandler(log_file)]:
+            handler.setFormatter(logging.Formatter(FORMAT))
+            logger.addHandler(handler)
+    return logger
+
+
+def time_calls(logger, records):
+    """Per call latencies in microseconds"""
+    latencies = []
+    for idx in range(records):
+        start = time.perf_counter()
+        logger.info(f"Successfully downloaded: scheme_{idx}.pdf")
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return latencies
+
+
+def report(label, latencies, total_s, lines):
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(f"  {label:<34} mean {statistics.fmean(latencies):6.2f} us  p50 {latencies[len(latencies) // 2]:6.2f} us  "
+          f"p99 {p99:7.2f} us  max {latencies[-1]:8.1f} us  all written after {total_s:6.2f} s  "
+          f"lines {lines}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=100000)
+    parser.add_argument('--setups', type=int, default=3, help="setup_logger calls made for the logger")
+    args = parser.parse_args()
+
+    stdout = sys.stdout
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, 'w') as devnull:
+        print(f"{args.records} records, setup_logger called {args.setups} times for the logger", flush=True)
+        sys.stdout = devnull
+        try:
+            results = []
+            sync_file = Path(tmp) / 'sync.log'
+            logger = synchronous_logger('bench_sync', sync_file, args.setups)
+            start = time.perf_counter()
+            latencies = time_calls(logger, args.records)
+            results.append(('synchronous handlers', latencies, time.perf_counter() - start, sync_file))
+
+            for fmt in log_setup.LOG_FORMATS:
+                queued_file = Path(tmp) / f'queued_{fmt}.log'
+                log_setup.configure_logging(log_file=queued_file, fmt=fmt, max_bytes=0)
+                for _ in range(args.setups):
+                    logger = log_setup.setup_logger(f'bench_{fmt}')
+                start = time.perf_counter()
+                latencies = time_calls(logger, args.records)
+                # Stopping waits for the listener to write out the queue
+                log_setup.shutdown_logging()
+                results.append((f'background writer ({fmt})', latencies, time.perf_counter() - start, queued_file))
+        finally:
+            sys.stdout = stdout
+
+        for label, latencies, total_s, log_file in results:
+            with open(log_file, encoding='utf-8') as f:
+                lines = sum(1 for _ in f)
+            report(label, latencies, total_s, lines)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Farmer profile matching throughput: eligibility bitset index versus testing every scheme
+
+Eligibility texts are generated from templates covering states, district
+exclusions, age and land limits and farmer categories, compiled like the
+pipeline does, and queried with random profiles. Both methods must return
+the same eligible schemes and scores. Run from the project root:
+
+    python -m benchmarks.bench_match --sizes 1000 100000
+"""
+import argparse
+import random
+import time
+
+from src.api.eligibility import EligibilityIndex
+from src.processors.eligibility import INDIAN_STATES, HOLDING_CATEGORIES, compile_eligibility, holding_categories
+
+DISTRICTS = ['Pune', 'Nashik', 'Satara', 'Sangli', 'Nagpur', 'Thane', 'Latur', 'Akola']
+SUBJECTS = ['All farmers', 'Small and marginal farmers', 'Women farmers', 'SC/ST farmers',
+            'Tribal farmers', 'Marginal farmers', 'Farmers', 'Manufacturers and traders']
+
+
+def eligibility_text(rng):
+    parts = [rng.choice(SUBJECTS)]
+    if rng.random() < 0.4:
+        parts.append(f"residing in {rng.choice(INDIAN_STATES[:28])}")
+        if rng.random() < 0.3:
+            parts.append(f"(excluding {', '.join(rng.sample(DISTRICTS, 2))} districts)")
+    if rng.random() < 0.3:
+        low = rng.choice([18, 21, 25])
+        parts.append(f"aged between {low} to {low + rng.choice([20, 30, 40])} years")
+    if rng.random() < 0.3:
+        parts.append(f"owning cultivable land up to {rng.choice([1, 2, 4, 5])} hectares")
+    elif rng.random() < 0.2:
+        parts.append(f"with at least {rng.choice([1, 2.5])} acres of land")
+    return ' '.join(parts) + '.'
+
+
+def generate(num_schemes, seed=0):
+    rng = random.Random(seed)
+    entries = []
+    for idx in range(num_schemes):
+        level = 'central' if idx % 3 else 'state'
+        details = {"scheme_name": f"Scheme {idx}", "eligibility_rules": compile_eligibility(eligibility_text(rng))}
+        entries.append((level, {"scheme_id": f"{level}_scheme_{idx}", "details": details}))
+    return entries, rng
+
+
+def random_profile(rng):
+    profile = {}
+    if rng.random() < 0.8:
+        profile['state'] = rng.choice(INDIAN_STATES[:28])
+    if rng.random() < 0.3:
+        profile['district'] = rng.choice(DISTRICTS)
+    if rng.random() < 0.7:
+        profile['age'] = rng.randint(18, 75)
+    if rng.random() < 0.8:
+        profile['land_hectares'] = rng.choice([0, 0.5, 1, 1.5, 2, 3, 6])
+    if rng.random() < 0.3:
+        profile['categories'] = rng.sample(['sc', 'st', 'women'], rng.randint(1, 2))
+    return profile
+
+
+def within(bounds, value):
+    low, high = bounds
+    return (low is None or value >= low) and (high is None or value <= high)
+
+
+def scan_match(entries, profile, limit):
+    """Test every scheme's rules in turn, the way a straightforward endpoint would"""
+    land = profile.get('land_hectares')
+    age = profile.get('age')
+    state = (profile.get('state') or '').casefold()
+    district = (profile.get('district') or '').casefold()
+    categories = set(profile.get('categories') or []) | set(holding_categories(land))
+    results = []
+    for number, (_, entry) in enumerate(entries):
+        rules = entry['details']['eligibility_rules']
+        if not rules['farmers'] or district in {name.casefold() for name in rules['excluded_districts']}:
+            continue
+        checks = []
+        if rules['states'] and state:
+            checks.append(state in {name.casefold() for name in rules['states']})
+        if rules['categories']:
+            if categories & set(rules['categories']):
+                checks.append(True)
+            elif profile.get('categories') or (land is not None and set(rules['categories']) <= set(HOLDING_CATEGORIES)):
+                # Only the holding categories are known from the land alone
+                checks.append(False)
+        if rules['land_hectares'] and land is not None:
+            checks.append(within(rules['land_hectares'], land))
+        if rules['age'] and age is not None:
+            checks.append(within(rules['age'], age))
+        if rules['land_required'] and land is not None:
+            checks.append(land > 0)
+        if all(checks):
+            results.append((-len(checks), number))
+    results.sort()
+    return [(-score, entries[number][1]['scheme_id']) for score, number in results[:limit]]
+
+
+def throughput(func, profiles):
+    start = time.perf_counter()
+    for profile in profiles:
+        func(profile)
+    return len(profiles) / (time.perf_counter() - start)
+
+
+def run(size, iterations, limit):
+    entries, rng = generate(size)
+    start = time.perf_counter()
+    index = EligibilityIndex.build(entries)
+    build_ms = (time.perf_counter() - start) * 1000
+    profiles = [random_profile(rng) for _ in range(iterations)]
+
+    for profile in profiles[:200]:
+        expected = scan_match(entries, profile, limit)
+        found = [(score, entry['scheme_id']) for score, _, _, (_, entry) in index.match(profile, limit)]
+        assert found == expected, (profile, found, expected)
+
+    index_qps = throughput(lambda profile: index.match(profile, limit), profiles)
+    scan_qps = throughput(lambda profile: scan_match(entries, profile, limit), profiles[:max(20, iterations // size)])
+    print(f"{size:>8} schemes: index build {build_ms:7.1f} ms  "
+          f"index {index_qps:9.0f} profiles/s  scan {scan_qps:9.1f} profiles/s  ({index_qps / scan_qps:.0f}x)", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--iterations', type=int, default=5000)
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run(size, args.iterations, args.limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Per-document time of section and level matching: regex loop versus SectionMatcher
+
+Run from the project root:
+
+    python -m benchmarks.bench_matcher [--repeat 5]
+"""
+import argparse
+import time
+from pathlib import Path
+
+from config import PDF_DIR
+from src.processors.pdf_processor import (
+    PDFProcessor, FIELD_PATTERNS, CENTRAL_INDICATORS, STATE_INDICATORS
+)
+from src.processors.matcher import SectionMatcher
+from src.processors.sections import PageStreamExtractor
+
+
+def regex_loop(processor, text):
+    """The original per-pattern scans over the full text"""
+    fields = {field: processor.extract_section(text, patterns) for field, patterns in FIELD_PATTERNS.items()}
+    return fields, processor.determine_scheme_level(text)
+
+
+def single_pass(matcher, text):
+    report = matcher.scan(text)
+    return {field: found['content'] for field, found in report['fields'].items()}, report['level']
+
+
+def page_stream(pages):
+    extractor = PageStreamExtractor(FIELD_PATTERNS, CENTRAL_INDICATORS, STATE_INDICATORS)
+    for page in pages:
+        extractor.feed(page)
+    extractor.finish()
+    return {field: extractor.field_value(field)[1] for field in FIELD_PATTERNS}, extractor.level_scanner.level()
+
+
+def best_of(repeat, func, *args):
+    """Fastest of several runs in milliseconds, with the last result"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pdf-dir', type=Path, default=PDF_DIR)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    processor = PDFProcessor(cache_dir=None)
+    matcher = SectionMatcher(FIELD_PATTERNS, CENTRAL_INDICATORS, STATE_INDICATORS)
+
+    print(f"{'document':<48} {'chars':>9} {'regex ms':>9} {'single ms':>9} {'stream ms':>9}  same")
+    totals = [0.0, 0.0, 0.0]
+    for pdf_path in sorted(args.pdf_dir.glob('*.pdf')):
+        pages = processor.extract_pages_from_pdf(pdf_path) or []
+        text = processor.join_pages(pages)
+
+        expected, regex_ms = best_of(args.repeat, regex_loop, processor, text)
+        result, single_ms = best_of(args.repeat, single_pass, matcher, text)
+        streamed, stream_ms = best_of(args.repeat, page_stream, pages)
+        same = result == expected and streamed == expected
+        print(f"{pdf_path.name[:48]:<48} {len(text):>9} {regex_ms:9.2f} {single_ms:9.2f} {stream_ms:9.2f}  "
+              f"{'yes' if same else 'NO'}")
+        totals[0] += regex_ms
+        totals[1] += single_ms
+        totals[2] += stream_ms
+
+    print(f"{'total':<48} {'':>9} {totals[0]:9.2f} {totals[1]:9.2f} {totals[2]:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
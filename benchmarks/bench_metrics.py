@@ -0,0 +1,96 @@
+"""Overhead of the request metrics: MetricsMiddleware and ServiceCall per request, and rendering /metrics
+
+Calls an ASGI app that answers at once, bare and wrapped in the
+middleware, so the difference is what every API request pays for its
+metrics. Then times the full app through TestClient on the repository's
+data with the middleware in place and removed, and rendering /metrics.
+Run from the project root:
+
+    python -m benchmarks.bench_metrics --requests 200000
+"""
+import argparse
+import asyncio
+import time
+
+from src.api.metrics import Metrics, MetricsMiddleware, ServiceCall
+
+
+class Route:
+    path = '/schemes/{scheme_id}'
+
+
+async def endpoint(scope, receive, send):
+    scope['route'] = Route
+    with ServiceCall('en'):
+        pass
+    await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+    await send({'type': 'http.response.body', 'body': b'{}'})
+
+
+async def bare_endpoint(scope, receive, send):
+    scope['route'] = Route
+    await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+    await send({'type': 'http.response.body', 'body': b'{}'})
+
+
+async def receive():
+    return {'type': 'http.request', 'body': b''}
+
+
+async def send(message):
+    pass
+
+
+async def drive(app, requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app({'type': 'http', 'method': 'GET', 'path': '/schemes/x'}, receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def full_app(requests):
+    """Microseconds per scheme lookup through the whole app, with and without the middleware"""
+    from fastapi.testclient import TestClient
+    from src.api import main
+
+    results = {}
+    with TestClient(main.app) as client:
+        scheme_id = client.get('/schemes/?limit=1').json()[0]['scheme_id']
+        middleware = main.app.user_middleware
+        for label in ('with metrics', 'without metrics', 'with metrics again'):
+            if label == 'without metrics':
+                main.app.user_middleware = [item for item in middleware if item.cls is not MetricsMiddleware]
+            else:
+                main.app.user_middleware = middleware
+            main.app.middleware_stack = main.app.build_middleware_stack()
+            start = time.perf_counter()
+            for _ in range(requests):
+                client.get(f'/schemes/{scheme_id}?lang=hi')
+            results[label] = (time.perf_counter() - start) / requests * 1e6
+        start = time.perf_counter()
+        body = client.get('/metrics').text
+        results['render'] = (time.perf_counter() - start) * 1e6
+        results['series'] = sum(1 for line in body.splitlines() if not line.startswith('#'))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200000)
+    parser.add_argument('--app-requests', type=int, default=3000)
+    args = parser.parse_args()
+
+    bare = asyncio.run(drive(bare_endpoint, args.requests))
+    wrapped = asyncio.run(drive(MetricsMiddleware(endpoint, Metrics()), args.requests))
+    print(f"ASGI call, {args.requests} requests: bare {bare:.2f} us, with metrics {wrapped:.2f} us, "
+          f"overhead {wrapped - bare:.2f} us per request")
+
+    results = full_app(args.app_requests)
+    print(f"Full app through TestClient, {args.app_requests} lookups: "
+          f"with metrics {results['with metrics']:.0f} us, without {results['without metrics']:.0f} us, "
+          f"with again {results['with metrics again']:.0f} us per request")
+    print(f"GET /metrics: {results['render'] / 1000:.2f} ms for {results['series']} series")
+
+
+if __name__ == "__main__":
+    main()
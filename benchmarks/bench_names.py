@@ -0,0 +1,113 @@
+"""Fuzzy scheme name lookup latency and recall as the catalogue grows
+
+Every scheme gets the same name in Latin script (English) and Devanagari
+(Hindi, Marathi), built from syllables with known spellings in both. Queries
+are names run together, a few words in the other script, typos and long
+vowels spelled out, and must find their scheme in the top 10, or be tied
+with the tenth result: with a few thousand distinct words, two words often
+occur in more than ten names. Run from the project root:
+
+    python -m benchmarks.bench_names --sizes 1000 100000
+"""
+import argparse
+import random
+import time
+
+from benchmarks.bench_service import percentile
+from src.api.names import NameIndex, compact, merge_matches, name_keys, name_words, substring_distance
+
+WORDS = [
+    ('pradhan', 'प्रधान'), ('mantri', 'मंत्री'), ('kisan', 'किसान'), ('yojana', 'योजना'),
+    ('krishi', 'कृषि'), ('sinchai', 'सिंचाई'), ('bima', 'बीमा'), ('fasal', 'फसल'),
+    ('nidhi', 'निधि'), ('mission', 'मिशन')
+]
+SYLLABLES = [
+    ('ka', 'क'), ('ki', 'कि'), ('ri', 'री'), ('so', 'सो'), ('na', 'ना'), ('pe', 'पे'),
+    ('lu', 'लु'), ('ma', 'मा'), ('ti', 'ति'), ('vo', 'वो'), ('de', 'दे'), ('sha', 'शा'),
+    ('gu', 'गु'), ('bha', 'भा'), ('ran', 'रण'), ('dho', 'धो'), ('mi', 'मि'), ('yo', 'यो'),
+    ('jan', 'जन'), ('kri', 'कृ'), ('sin', 'सिं'), ('cha', 'चा'), ('pu', 'पु'), ('ho', 'हो')
+]
+
+
+def generate(num_schemes, seed=0):
+    """(scheme_id, Latin words, Devanagari words) per scheme"""
+    rng = random.Random(seed)
+    schemes = []
+    for idx in range(num_schemes):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(0, 2))]
+        for _ in range(rng.randint(2, 3)):
+            syllables = [rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))]
+            words.append((''.join(latin for latin, _ in syllables), ''.join(deva for _, deva in syllables)))
+        rng.shuffle(words)
+        schemes.append((f"scheme_{idx}", [latin for latin, _ in words], [deva for _, deva in words]))
+    return schemes, rng
+
+
+def typo(rng, text):
+    idx = rng.randrange(len(text))
+    return text[:idx] + rng.choice('aeioukstnr') + text[idx + 1:]
+
+
+def queries(rng, schemes, count):
+    result = []
+    for idx in range(count):
+        scheme_id, latin, deva = rng.choice(schemes)
+        kind = idx % 4
+        start = rng.randrange(max(1, len(latin) - 1))
+        if kind == 0:
+            query = ''.join(latin)
+        elif kind == 1:
+            query = ' '.join(deva[start:start + 2])
+        elif kind == 2:
+            query = typo(rng, ' '.join(latin[start:start + 3]))
+        else:
+            query = ' '.join(latin[start:start + 2]).replace('a', 'aa').replace('i', 'ee')
+        result.append((scheme_id, query))
+    return result
+
+
+def run(size, iterations):
+    schemes, rng = generate(size)
+    names = {
+        'en': [('central', {"scheme_id": scheme_id, "details": {"scheme_name": ' '.join(latin).title()}})
+               for scheme_id, latin, _ in schemes],
+        'hi': [('central', {"scheme_id": scheme_id, "details": {"scheme_name": ' '.join(deva)}})
+               for scheme_id, _, deva in schemes],
+    }
+    names['mr'] = names['hi']
+
+    start = time.perf_counter()
+    indexes = {lang: NameIndex.build(entries) for lang, entries in names.items()}
+    build_s = (time.perf_counter() - start) / len(indexes)
+
+    names_by_id = {scheme_id: (' '.join(latin), ' '.join(deva)) for scheme_id, latin, deva in schemes}
+    samples, found = [], 0
+    for scheme_id, query in queries(rng, schemes, iterations):
+        start = time.perf_counter()
+        results = merge_matches({lang: index.match(query, 10) for lang, index in indexes.items()}, 10)
+        samples.append((time.perf_counter() - start) * 1000)
+        if scheme_id in {entry['scheme_id'] for _, _, entry in results}:
+            found += 1
+        elif len(results) == 10:
+            key = compact(name_words(query))
+            target = max(1 - substring_distance(key, name_key) / len(key)
+                         for name in names_by_id[scheme_id] for name_key in name_keys(name))
+            found += results[-1][0] >= target
+
+    print(f"{size:>8} schemes: build {build_s * 1000:7.0f} ms per language  "
+          f"p50={percentile(samples, 50):6.3f} ms  p99={percentile(samples, 99):6.3f} ms  "
+          f"recall@10 {found / iterations:.1%}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run(size, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
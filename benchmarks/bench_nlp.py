@@ -0,0 +1,67 @@
+"""Startup and per-document description time of the spaCy pipeline modes
+
+Descriptions need a scheme name, so each document is described for a few
+phrases sampled from its own text. Run from the project root:
+
+    python -m benchmarks.bench_nlp [--modes full senter sentencizer] [--names 5]
+"""
+import argparse
+import random
+import time
+from pathlib import Path
+
+from config import PDF_DIR
+from src.processors.pdf_processor import PDFProcessor, NLP_MODES
+
+
+def sample_documents(processor, pdf_dir, names, seed):
+    """(text, scheme_name) pairs, names being short phrases from each document"""
+    rng = random.Random(seed)
+    documents = []
+    for pdf_path in sorted(pdf_dir.glob('*.pdf')):
+        text = processor.extract_text_from_pdf(pdf_path) or ""
+        words = text.split()
+        if len(words) < 10:
+            continue
+        for _ in range(names):
+            start = rng.randrange(len(words) - 3)
+            documents.append((text, ' '.join(words[start:start + rng.choice([2, 3])])))
+    return documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pdf-dir', type=Path, default=PDF_DIR)
+    parser.add_argument('--modes', nargs='+', default=list(NLP_MODES), choices=NLP_MODES)
+    parser.add_argument('--names', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'mode':<12} {'pipes':<28} {'load s':>7} {'per doc ms':>11} {'batched ms':>11}  same as {args.modes[0]}")
+    for mode in args.modes:
+        start = time.perf_counter()
+        processor = PDFProcessor(cache_dir=None, nlp_mode=mode)
+        # The pipeline loads on first use
+        processor.nlp
+        load_s = time.perf_counter() - start
+        if not results:
+            documents = sample_documents(processor, args.pdf_dir, args.names, args.seed)
+
+        start = time.perf_counter()
+        single = [processor.describe(text, name) for text, name in documents]
+        single_ms = (time.perf_counter() - start) * 1000 / len(documents)
+
+        start = time.perf_counter()
+        batched = processor.describe_many(documents)
+        batched_ms = (time.perf_counter() - start) * 1000 / len(documents)
+
+        results[mode] = single
+        same = sum(a == b for a, b in zip(single, results[args.modes[0]]))
+        print(f"{mode:<12} {', '.join(processor.nlp.pipe_names)[:28]:<28} {load_s:7.2f} "
+              f"{single_ms:11.2f} {batched_ms:11.2f}  {same}/{len(documents)}"
+              f"{'' if single == batched else ' (batched differs)'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Scheme pipeline through run_pipeline's graph versus the steps run by hand, and incremental reruns
+
+By hand: process_all_pdfs, organize, translate_all_schemes and the database
+conversion, one after the other (what test_processor.py and
+test_translator.py do). Then SchemePipeline from scratch on the same PDFs,
+rerun with nothing changed and with one PDF changed. Translation goes to the
+offline fake backend with --latency per request; every run starts without
+processing cache or translation memory. Run from the project root:
+
+    python -m benchmarks.bench_orchestrator --nlp-mode sentencizer --latency 0.2
+"""
+import argparse
+import logging
+import shutil
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+from config import PDF_DIR
+from src.api.database import scheme_files, write_scheme_database
+from src.pipeline.graph import RAN
+from src.pipeline.ids import organize_schemes
+from src.pipeline.stages import SchemePipeline
+from src.processors.pdf_processor import PDFProcessor
+from src.translators.backends import FakeBackend
+from src.translators.changes import dump_schemes
+from src.translators.engine import TranslationEngine
+from src.translators.translator import SchemeTranslator
+
+
+def create_translator(memory_path, latency):
+    translator = SchemeTranslator(memory_path=memory_path, backend=FakeBackend(latency=latency))
+    # The configured rate limit is the real service's, the fake one is only bounded by its latency
+    translator.engine = TranslationEngine(translator.backend, translator.memory, rate=1000, burst=8, concurrency=8)
+    return translator
+
+
+class BenchPipeline(SchemePipeline):
+    def __init__(self, root, latency, **options):
+        super().__init__(pdf_dir=root / 'pdfs', english_file=root / 'processed_pdfs' / 'processed_schemes.json',
+                         data_dir=root / 'translated_schemes', id_file=root / 'scheme_ids.json',
+                         state_dir=root / 'state', processor_cache_dir=root / 'processor_cache',
+                         site_dir=root / 'site', backend_name='fake', **options)
+        self.root = root
+        self.latency = latency
+
+    def create_translator(self):
+        return create_translator(self.root / 'memory.sqlite3', self.latency)
+
+
+def by_hand(root, args):
+    processor = PDFProcessor(cache_dir=root / 'processor_cache', nlp_mode=args.nlp_mode)
+    processor.pdf_dir = root / 'pdfs'
+    schemes = processor.process_all_pdfs(args.workers)
+    english_file = root / 'processed_pdfs' / 'processed_schemes.json'
+    english_file.parent.mkdir()
+    english_file.write_bytes(dump_schemes(organize_schemes(schemes)))
+    data_dir = root / 'translated_schemes'
+    data_dir.mkdir()
+    create_translator(root / 'memory.sqlite3', args.latency).translate_all_schemes(english_file, data_dir)
+    write_scheme_database(root / 'schemes.sqlite3', scheme_files(english_file, data_dir))
+
+
+def timed_run(root, args):
+    pipeline = BenchPipeline(root, args.latency, workers=args.workers, nlp_mode=args.nlp_mode)
+    start = time.perf_counter()
+    status = pipeline.run()
+    seconds = time.perf_counter() - start
+    documents = sum(1 for name, outcome in status.items() if name.startswith('process:') and outcome == RAN)
+    return seconds, documents, Counter(status.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pdf-dir', type=Path, default=PDF_DIR)
+    parser.add_argument('--nlp-mode', default='sentencizer')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--latency', type=float, default=0.2, help="Seconds per fake backend request")
+    args = parser.parse_args()
+
+    pdf_files = sorted(args.pdf_dir.glob('*.pdf'))
+    if not pdf_files:
+        parser.error(f"No PDFs in {args.pdf_dir}")
+    logging.disable(logging.INFO)
+    print(f"{len(pdf_files)} PDFs, NLP mode {args.nlp_mode}, {args.workers} workers, "
+          f"fake backend latency {args.latency}s", flush=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        hand_root = Path(tmp) / 'by_hand'
+        root = Path(tmp) / 'pipeline'
+        for directory in (hand_root, root):
+            (directory / 'pdfs').mkdir(parents=True)
+            for pdf_file in pdf_files:
+                shutil.copy(pdf_file, directory / 'pdfs' / pdf_file.name)
+
+        start = time.perf_counter()
+        by_hand(hand_root, args)
+        print(f"  {'steps by hand':<28} {time.perf_counter() - start:7.2f} s", flush=True)
+
+        runs = [('pipeline, from scratch', None), ('pipeline, nothing changed', None),
+                ('pipeline, one PDF changed', pdf_files[-1].name)]
+        for label, changed in runs:
+            if changed:
+                # Trailing bytes change the content hash without changing what is extracted
+                with open(root / 'pdfs' / changed, 'ab') as f:
+                    f.write(b'\n%bench\n')
+            seconds, documents, outcomes = timed_run(root, args)
+            summary = ', '.join(f"{count} {outcome}" for outcome, count in sorted(outcomes.items()))
+            print(f"  {label:<28} {seconds:7.2f} s  {documents} documents processed  ({summary})", flush=True)
+
+
+if __name__ == "__main__":
+    main()
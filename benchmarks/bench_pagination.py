@@ -0,0 +1,101 @@
+"""First page size and time on a slow link, and memory per request of the /schemes/ output modes
+
+Compares the whole catalogue in one response with the first page (all
+fields, and scheme_name/category only) as sent over HTTP with gzip/brotli,
+and estimates the time to first paint on a 2G link. Then measures the peak
+memory a request allocates on the server when streaming NDJSON versus
+building one JSON array. Run from the project root:
+
+    python -m benchmarks.bench_pagination --sizes 1000 100000
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+import tracemalloc
+
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from benchmarks.bench_service import percentile
+from benchmarks.catalogue import write_catalogue
+from src.api import main
+from src.api.responses import ndjson_response
+from src.api.service import SchemeService
+
+ACCEPT = {'Accept-Encoding': 'gzip, br'}
+
+
+def fake_request():
+    return Request({
+        'type': 'http', 'method': 'GET', 'scheme': 'http', 'server': ('testserver', 80), 'path': '/schemes/',
+        'query_string': b'', 'headers': [(b'accept-encoding', b'gzip')]
+    })
+
+
+def peak_kb(func):
+    """Peak memory allocated while func runs, in KB"""
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def stream(service, fields):
+    async def consume():
+        lines, _ = service.get_scheme_slice('en', fields=fields)
+        async for _ in ndjson_response(fake_request(), lines, None).body_iterator:
+            pass
+    asyncio.run(consume())
+
+
+def materialize(service, fields):
+    lines, _ = service.get_scheme_slice('en', fields=fields)
+    b"[" + b",".join(list(lines)) + b"]"
+
+
+def run(size, iterations, bandwidth_kbps, rtt_ms):
+    with tempfile.TemporaryDirectory() as tmp:
+        english_file, data_dir = write_catalogue(tmp, size, languages=('en',))
+        service = SchemeService(data_dir=data_dir, english_file=english_file)
+    main.scheme_service = service
+    client = TestClient(main.app)
+
+    print(f"\n{size} schemes", flush=True)
+    requests = [
+        ('whole catalogue', {}),
+        ('first page, 20', {'limit': 20}),
+        ('first page, 20, 2 fields', {'limit': 20, 'fields': 'scheme_name,category'}),
+    ]
+    for label, params in requests:
+        samples = []
+        for _ in range(iterations if params else max(3, iterations // max(1, size // 100))):
+            start = time.perf_counter()
+            response = client.get('/schemes/', params=params, headers=ACCEPT)
+            samples.append((time.perf_counter() - start) * 1000)
+        # TestClient decodes the body, the header tells what went over the wire
+        sent = int(response.headers.get('content-length', len(response.content)))
+        paint_s = rtt_ms / 1000 + sent * 8 / (bandwidth_kbps * 1000)
+        print(f"  {label:<26} {sent:>11,} bytes ({response.headers.get('content-encoding', 'identity'):>4})  "
+              f"server p50 {percentile(samples, 50):8.2f} ms  first paint on 2G {paint_s:8.1f} s", flush=True)
+
+    for label, fields in (('all fields', None), ('2 fields', 'scheme_name,category')):
+        print(f"  peak memory per request, {label:<10}: ndjson stream {peak_kb(lambda: stream(service, fields)):9.0f} KB"
+              f"  json array {peak_kb(lambda: materialize(service, fields)):9.0f} KB", flush=True)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--bandwidth-kbps', type=float, default=100, help="2G (EDGE) downlink")
+    parser.add_argument('--rtt-ms', type=float, default=600)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run(size, args.iterations, args.bandwidth_kbps, args.rtt_ms)
+
+
+if __name__ == "__main__":
+    main_cli()
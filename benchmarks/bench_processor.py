@@ -0,0 +1,103 @@
+"""Time and peak memory of PDF structuring, whole-text versus page stream
+
+Also checks the page stream on a synthetic document whose description runs
+across a page break after every field is found. Run from the project root:
+
+    python -m benchmarks.bench_processor [--pdf-dir data/raw_pdfs] [--nlp-mode sentencizer]
+"""
+import argparse
+import time
+import tracemalloc
+from pathlib import Path
+
+import PyPDF2
+
+from config import NLP_MODE, PDF_DIR
+from src.processors.pdf_processor import NLP_MODES, PDFProcessor
+
+# Every field, the level and the scheme name on the first page, the second
+# description sentence running on into the next page
+PAGE_BREAK_PAGES = [
+    "A central sector scheme of the Government of India run by the Ministry of Agriculture under Pradhan Mantri "
+    "as a national scheme, centrally sponsored with PMKSY.\n"
+    "Eligibility: All farmers holding cultivable land.\n\n"
+    "Benefits: Free soil testing every two years.\n\n"
+    "How to apply: Visit the nearest soil testing laboratory.\n\n"
+    "Deadline: 31 March\nCategory: Soil health\n"
+    "Scheme Name: Soil Health Mission\n"
+    "The Soil Health Mission supports farmers. It issues soil health cards" + " covering nutrient status" * 120,
+    "and ends on this page. It recommends fertiliser doses. It trains laboratory staff." + " Text follows." * 400,
+    "Annexure."
+]
+
+
+def legacy_extract(processor, pdf_path):
+    """Text extraction as it was before the page stream, concatenating per page"""
+    with open(pdf_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        text = ""
+        for page in reader.pages:
+            text += processor.clean_text(page.extract_text()) + "\n"
+        return text
+
+
+def whole_text(processor, pdf_path):
+    text = legacy_extract(processor, pdf_path)
+    return processor.structure_scheme_data(text), None
+
+
+def page_stream(processor, pdf_path):
+    scheme_data, pages, _ = processor.structure_page_stream(processor.iter_pages(pdf_path))
+    return scheme_data, len(pages)
+
+
+def page_break_check(processor):
+    """Return (same as the whole text, pages read) for PAGE_BREAK_PAGES"""
+    expected = processor.structure_scheme_data(processor.join_pages(PAGE_BREAK_PAGES))
+    scheme_data, pages, _ = processor.structure_page_stream(iter(PAGE_BREAK_PAGES))
+    return scheme_data == expected, len(pages)
+
+
+def measure(func, processor, pdf_path):
+    """Return (result, seconds, peak traced bytes), timing and tracing in separate runs"""
+    start = time.perf_counter()
+    result = func(processor, pdf_path)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(processor, pdf_path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pdf-dir', type=Path, default=PDF_DIR)
+    parser.add_argument('--nlp-mode', default=NLP_MODE, choices=NLP_MODES)
+    args = parser.parse_args()
+
+    processor = PDFProcessor(cache_dir=None, nlp_mode=args.nlp_mode)
+    same, pages_read = page_break_check(processor)
+    print(f"description across a page break: {pages_read}/{len(PAGE_BREAK_PAGES)} pages read, "
+          f"same as whole text: {'yes' if same else 'NO'}")
+    print(f"{'document':<48} {'whole s':>8} {'stream s':>8} {'whole MB':>9} {'stream MB':>9} {'pages':>7}  same")
+    totals = [0.0, 0.0, 0, 0]
+    for pdf_path in sorted(args.pdf_dir.glob('*.pdf')):
+        (expected, _), whole_s, whole_peak = measure(whole_text, processor, pdf_path)
+        (scheme_data, pages_read), stream_s, stream_peak = measure(page_stream, processor, pdf_path)
+        page_count = processor.count_pages(pdf_path)
+        print(f"{pdf_path.name[:48]:<48} {whole_s:8.2f} {stream_s:8.2f} "
+              f"{whole_peak / 2**20:9.1f} {stream_peak / 2**20:9.1f} {pages_read:>3}/{page_count:<3}  "
+              f"{'yes' if scheme_data == expected else 'NO'}")
+        totals[0] += whole_s
+        totals[1] += stream_s
+        totals[2] = max(totals[2], whole_peak)
+        totals[3] = max(totals[3], stream_peak)
+
+    print(f"{'total time / max peak':<48} {totals[0]:8.2f} {totals[1]:8.2f} "
+          f"{totals[2] / 2**20:9.1f} {totals[3] / 2**20:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
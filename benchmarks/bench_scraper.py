@@ -0,0 +1,100 @@
+"""Crawl time of the serial download loop versus the async downloader
+
+Serves the bundled PDFs from a local stand-in with simulated latency and
+bandwidth. Run from the project root:
+
+    python -m benchmarks.bench_scraper [--latency 0.05] [--bandwidth 2000000]
+"""
+import argparse
+import hashlib
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from config import PDF_DIR
+from src.scrapers.pdf_scraper import PDFScraper
+from src.scrapers.downloader import PART_SUFFIX
+from benchmarks.fixture_server import serve
+
+
+def digests(directory):
+    return sorted(hashlib.sha256(path.read_bytes()).hexdigest() for path in Path(directory).glob('*.pdf'))
+
+
+def serial_crawl(scraper):
+    """The download loop as it was before the async downloader"""
+    pdf_links = scraper.extract_pdf_links(scraper.get_page_content(scraper.base_url))
+    for pdf in pdf_links:
+        response = scraper.session.get(pdf['url'], stream=True)
+        response.raise_for_status()
+        with open(scraper.pdf_dir / Path(pdf['url']).name, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=8192):
+                if chunk:
+                    f.write(chunk)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def interrupt(scraper, manifest_path):
+    """Turn the largest downloaded file back into a half-finished partial download"""
+    path = max(scraper.pdf_dir.glob('*.pdf'), key=lambda p: p.stat().st_size)
+    data = path.read_bytes()
+    path.with_name(path.name + PART_SUFFIX).write_bytes(data[:len(data) // 2])
+    path.unlink()
+    manifest = json.loads(manifest_path.read_text())
+    entry = manifest[path.name]
+    entry['partial'] = {'etag': entry['etag'], 'last_modified': entry['last_modified']}
+    manifest_path.write_text(json.dumps(manifest))
+    return len(data) - len(data) // 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pdf-dir', type=Path, default=PDF_DIR)
+    parser.add_argument('--latency', type=float, default=0.05, help="seconds before each response")
+    parser.add_argument('--bandwidth', type=float, default=2_000_000, help="bytes per second per response")
+    args = parser.parse_args()
+
+    expected = digests(args.pdf_dir)
+    with tempfile.TemporaryDirectory() as tmp, \
+            serve(args.pdf_dir, latency=args.latency, bandwidth=args.bandwidth) as (base_url, handler):
+        tmp = Path(tmp)
+        manifest_path = tmp / 'manifest.json'
+
+        serial = PDFScraper(base_url, tmp / 'serial', tmp / 'serial_manifest.json')
+        serial.pdf_dir.mkdir()
+        _, serial_s = timed(serial_crawl, serial)
+
+        scraper = PDFScraper(base_url, tmp / 'async', manifest_path)
+        _, cold_s = timed(scraper.scrape)
+        cold_bytes = scraper.downloader.stats['bytes']
+        _, warm_s = timed(scraper.scrape)
+        warm = dict(scraper.downloader.stats)
+        remaining = interrupt(scraper, manifest_path)
+        _, resume_s = timed(scraper.scrape)
+        resumed = dict(scraper.downloader.stats)
+
+        # First async run over the serial loop's files, with no manifest yet
+        adopted = PDFScraper(base_url, serial.pdf_dir, tmp / 'adopted_manifest.json')
+        _, adopt_s = timed(adopted.scrape)
+        adopt = dict(adopted.downloader.stats)
+
+        print(f"{len(expected)} PDFs, {sum(p.stat().st_size for p in args.pdf_dir.glob('*.pdf'))} bytes, "
+              f"latency {args.latency}s, {args.bandwidth / 1e6:.1f} MB/s per response")
+        print(f"{'serial loop':<28} {serial_s:7.2f}s  same files: {digests(serial.pdf_dir) == expected}")
+        print(f"{'async, cold':<28} {cold_s:7.2f}s  {cold_bytes} bytes")
+        print(f"{'async, conditional rerun':<28} {warm_s:7.2f}s  {warm['not_modified']} not modified, "
+              f"{warm['bytes']} bytes")
+        print(f"{'async, resume one file':<28} {resume_s:7.2f}s  {resumed['resumed']} resumed, "
+              f"{resumed['bytes']} bytes ({remaining} missing)  same files: {digests(scraper.pdf_dir) == expected}")
+        print(f"{'async, no manifest yet':<28} {adopt_s:7.2f}s  {adopt['not_modified']} not modified, "
+              f"{adopt['bytes']} bytes")
+
+
+if __name__ == "__main__":
+    main()
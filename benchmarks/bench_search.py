@@ -0,0 +1,148 @@
+"""Full-text search latency, index build and incremental update time as the catalogue grows
+
+Scheme texts draw words from a Zipf-distributed vocabulary (Latin script for
+English, Devanagari for Hindi and Marathi) mixed with real scheme words, so
+some query terms match most schemes and others a handful. Run from the
+project root:
+
+    python -m benchmarks.bench_search --sizes 1000 100000
+"""
+import argparse
+import random
+import resource
+import time
+from itertools import accumulate
+
+from benchmarks.bench_service import percentile
+from src.api.search import SearchIndex
+from src.api.store import SchemeStore
+
+COMMON = {
+    'en': ['farmer', 'crop', 'insurance', 'drip', 'irrigation', 'subsidy', 'loan', 'soil', 'seed', 'market'],
+    'hi': ['किसान', 'फसल', 'बीमा', 'सिंचाई', 'ड्रिप', 'अनुदान', 'ऋण', 'मिट्टी', 'बीज', 'बाजार'],
+    'mr': ['शेतकरी', 'पीक', 'विमा', 'सिंचन', 'ठिबक', 'अनुदान', 'कर्ज', 'माती', 'बियाणे', 'बाजार']
+}
+SYLLABLES = {
+    'en': ['ka', 'ri', 'so', 'na', 'pe', 'lu', 'ma', 'ti', 'vo', 'de', 'sha', 'gu'],
+    'hi': ['क', 'रि', 'सो', 'ना', 'पे', 'लु', 'मा', 'ति', 'वो', 'दे', 'शा', 'गु'],
+    'mr': ['का', 'री', 'सु', 'न', 'पो', 'ळ', 'म', 'ती', 'व', 'डे', 'श', 'गो']
+}
+
+
+class Vocabulary:
+    """Synthetic words of one language drawn with Zipf frequencies"""
+
+    def __init__(self, lang, size, rng):
+        words = set(COMMON[lang])
+        while len(words) < size:
+            words.add(''.join(rng.choice(SYLLABLES[lang]) for _ in range(rng.randint(2, 4))))
+        self.words = COMMON[lang] + sorted(words - set(COMMON[lang]))
+        self.cum_weights = list(accumulate(1 / rank for rank in range(1, len(self.words) + 1)))
+        self.rng = rng
+
+    def sentence(self, length):
+        return ' '.join(self.rng.choices(self.words, cum_weights=self.cum_weights, k=length)) + '.'
+
+
+def generate(num_schemes, vocabulary_size, seed=0):
+    rng = random.Random(seed)
+    data = {}
+    for lang in COMMON:
+        vocabulary = Vocabulary(lang, vocabulary_size, rng)
+        catalogue = {'central': {}, 'state': {}}
+        for idx in range(num_schemes):
+            level = 'central' if idx % 3 else 'state'
+            catalogue[level][f"{level}_scheme_{idx}"] = {
+                "scheme_name": vocabulary.sentence(4)[:-1],
+                "scheme_level": level,
+                "description": ' '.join(vocabulary.sentence(15) for _ in range(3)),
+                "eligibility": vocabulary.sentence(20),
+                "benefits": vocabulary.sentence(20),
+                "application_process": vocabulary.sentence(25),
+                "category": rng.choice(COMMON[lang])
+            }
+        data[lang] = catalogue
+    return data, rng
+
+
+def queries(rng, store, lang, count):
+    """Common and rare words, word pairs, and partly typed words for type-ahead"""
+    index = store.search[lang]
+    terms = index.terms
+    result = []
+    for idx in range(count):
+        kind = idx % 4
+        if kind == 0:
+            result.append(rng.choice(COMMON[lang]))
+        elif kind == 1:
+            result.append(rng.choice(terms))
+        elif kind == 2:
+            result.append(f"{rng.choice(COMMON[lang])} {rng.choice(COMMON[lang])}")
+        else:
+            word = rng.choice(terms)
+            result.append(word[:max(2, len(word) // 2)])
+    return result
+
+
+def run(size, iterations, vocabulary_size):
+    data, rng = generate(size, vocabulary_size)
+    start = time.perf_counter()
+    store = SchemeStore(data)
+    load_s = time.perf_counter() - start
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"\n{size} schemes x 3 languages (store load with search index {load_s:.1f} s, "
+          f"peak memory {peak_mb:.0f} MB)", flush=True)
+    for lang in data:
+        samples, matched = [], 0
+        for query in queries(rng, store, lang, iterations):
+            start = time.perf_counter()
+            results = store.search_schemes(lang, query)
+            samples.append((time.perf_counter() - start) * 1000)
+            matched += bool(results)
+        print(f"  search {lang}: p50={percentile(samples, 50):7.3f} ms  p99={percentile(samples, 99):7.3f} ms  "
+              f"max={max(samples):7.3f} ms  ({matched}/{iterations} queries matched)", flush=True)
+
+    # Reload with 10 changed schemes, reindexing only those
+    updated = {level: dict(schemes) for level, schemes in data['hi'].items()}
+    changed = set()
+    for scheme_id in list(updated['central'])[:10]:
+        updated['central'][scheme_id] = {**updated['central'][scheme_id], "benefits": "नई सिंचाई सहायता."}
+        changed.add(('central', scheme_id))
+    expected = {scheme_id for _, scheme_id in changed}
+    # One new store at a time, a catalogue this size barely fits twice in memory
+    timings = {}
+    for label, changes in (('incremental', {'hi': changed}), ('full', None)):
+        start = time.perf_counter()
+        reloaded = store.with_languages({'hi': updated}, changes)
+        timings[label] = time.perf_counter() - start
+        assert {entry['scheme_id'] for _, entry in reloaded.search_schemes('hi', 'नई सहायता', 20)} == expected
+        del reloaded
+
+    # The search index on its own, without re-encoding and compressing the views
+    entries = [(level, {"scheme_id": scheme_id, "details": details})
+               for level, schemes in updated.items() for scheme_id, details in schemes.items()]
+    start = time.perf_counter()
+    store.search['hi'].updated(entries, changed)
+    index_update_s = time.perf_counter() - start
+    del store
+    start = time.perf_counter()
+    SearchIndex.build(entries)
+    index_build_s = time.perf_counter() - start
+    print(f"  reload 10 changed hi schemes: incremental {timings['incremental'] * 1000:.0f} ms, "
+          f"full {timings['full'] * 1000:.0f} ms; search index alone {index_update_s * 1000:.0f} ms "
+          f"versus {index_build_s * 1000:.0f} ms rebuilt")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--vocabulary', type=int, default=20000, help="distinct words per language")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run(size, args.iterations, args.vocabulary)
+
+
+if __name__ == "__main__":
+    main()
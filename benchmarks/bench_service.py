@@ -0,0 +1,83 @@
+"""Latency of the scheme endpoints as the catalogue grows
+
+Run from the project root:
+
+    python -m benchmarks.bench_service --sizes 10 1000 100000
+"""
+import argparse
+import random
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+
+from benchmarks.catalogue import write_catalogue
+from src.api import main
+from src.api.service import SchemeService
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def time_calls(func, args_list):
+    """Call func for each argument tuple and return latencies in milliseconds"""
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        func(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label, samples):
+    print(f"  {label:<28} p50={percentile(samples, 50):9.3f} ms  p99={percentile(samples, 99):9.3f} ms")
+
+
+def run(size, iterations):
+    with tempfile.TemporaryDirectory() as tmp:
+        english_file, data_dir = write_catalogue(tmp, size)
+
+        start = time.perf_counter()
+        service = SchemeService(data_dir=data_dir, english_file=english_file)
+        load_ms = (time.perf_counter() - start) * 1000
+
+    rng = random.Random(size)
+    scheme_ids = [entry["scheme_id"] for entry in service.get_all_schemes('en')]
+    id_args = [(rng.choice(scheme_ids), rng.choice(['en', 'hi', 'mr'])) for _ in range(iterations)]
+    list_args = [(rng.choice(['en', 'hi', 'mr']), rng.choice([None, 'central', 'state']))
+                 for _ in range(iterations)]
+
+    print(f"\n{size} schemes x 3 languages (load + index {load_ms:.1f} ms)")
+    report("service get_all_schemes", time_calls(service.get_all_schemes, list_args))
+    report("service get_scheme_by_id", time_calls(service.get_scheme_by_id, id_args))
+
+    # Full HTTP round trip through the FastAPI app
+    main.scheme_service = service
+    client = TestClient(main.app)
+    # Listing is dominated by serialization, so sample it less on big catalogues
+    list_iterations = max(5, min(iterations, 200000 // max(size, 1)))
+    report("GET /schemes/", time_calls(
+        lambda lang, level: client.get('/schemes/', params={'lang': lang, **({'level': level} if level else {})}),
+        list_args[:list_iterations]
+    ))
+    report("GET /schemes/{id}", time_calls(
+        lambda scheme_id, lang: client.get(f'/schemes/{scheme_id}', params={'lang': lang}),
+        id_args
+    ))
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000, 100000])
+    parser.add_argument('--iterations', type=int, default=500)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run(size, args.iterations)
+
+
+if __name__ == "__main__":
+    main_cli()
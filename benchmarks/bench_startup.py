@@ -0,0 +1,170 @@
+"""API cold start: import cost, time to the first request and memory per worker
+
+Profiles `import src.api.main` with `python -X importtime` and checks that
+no pipeline module (spaCy, pandas, googletrans, PyPDF2, the processor,
+translator and scraper) comes with it. Then starts run_api's server on a
+generated catalogue, as one worker or forked workers with and without
+preloading, and reports the time from launch to the first answered
+request and to every worker having its data, and the memory of each
+worker (Linux /proc) after serving some requests. Run from the project root:
+
+    python -m benchmarks.bench_startup --sizes 1000 10000
+"""
+import argparse
+import http.client
+import json
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.catalogue import write_catalogue
+
+# Imported by the pipeline only, never by the API process
+PIPELINE_MODULES = [
+    'spacy', 'pandas', 'googletrans', 'PyPDF2', 'bs4', 'src.processors.pdf_processor',
+    'src.translators.translator', 'src.scrapers.pdf_scraper'
+]
+
+BOOTSTRAP = """
+import sys, time
+from pathlib import Path
+from src.api import main, server
+from src.api.service import SchemeService
+
+root = Path(sys.argv[1])
+
+def create_service(**options):
+    start = time.perf_counter()
+    service = SchemeService(data_dir=root / 'translated_schemes',
+                            english_file=root / 'processed_pdfs' / 'processed_schemes.json',
+                            database_file=root / sys.argv[2], **options)
+    print(f"loaded {time.perf_counter() - start}", flush=True)
+    return service
+
+main.create_service = create_service
+server.serve('127.0.0.1', int(sys.argv[3]), int(sys.argv[4]), sys.argv[5] == '1')
+"""
+
+
+def import_profile(top):
+    """Total import time of the API, its costliest direct imports and any pipeline module it loaded"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import src.api.main'],
+                            capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative), name))
+    # Children are listed before their parent, one level (two spaces) deeper
+    end = next(idx for idx, (_, name) in enumerate(rows) if name.strip() == 'src.api.main')
+    start = end
+    while start > 0 and len(rows[start - 1][1]) - len(rows[start - 1][1].lstrip()) > 1:
+        start -= 1
+    direct = sorted(
+        ((cumulative, name.strip()) for cumulative, name in rows[start:end] if len(name) - len(name.lstrip()) == 3),
+        reverse=True
+    )
+    loaded = subprocess.run(
+        [sys.executable, '-c', 'import json, sys, src.api.main; print(json.dumps(sorted(sys.modules)))'],
+        capture_output=True, text=True, check=True
+    )
+    modules = set(json.loads(loaded.stdout))
+    return rows[end][0], direct[:top], [name for name in PIPELINE_MODULES if name in modules]
+
+
+def memory_kb(pid):
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        fields = {line.split(':')[0]: int(line.split()[1]) for line in f if line.endswith('kB\n')}
+    return fields['Pss'], fields['Private_Clean'] + fields['Private_Dirty']
+
+
+def get(port, path):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    try:
+        connection.request('GET', path)
+        response = connection.getresponse()
+        return response.status, response.read()
+    finally:
+        connection.close()
+
+
+def start_server(root, database, port, workers, preload, requests):
+    """Launch the server, returning (first request s, all loaded s, [(pss, private) per worker])"""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-c', BOOTSTRAP, str(root), database, str(port), str(workers), '1' if preload else '0'],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    try:
+        while True:
+            try:
+                if get(port, '/status')[0] == 200:
+                    break
+            except OSError:
+                time.sleep(0.01)
+        first_request = time.perf_counter() - start
+        for _ in range(1 if preload or workers == 1 else workers):
+            process.stdout.readline()
+        loaded = time.perf_counter() - start
+
+        scheme_ids = [entry["scheme_id"] for entry in json.loads(get(port, '/schemes/?fields=scheme_name')[1])]
+        rng = random.Random(0)
+        for _ in range(requests):
+            get(port, f"/schemes/{rng.choice(scheme_ids)}?lang={rng.choice(['en', 'hi', 'mr'])}")
+        if workers == 1:
+            pids = [process.pid]
+        else:
+            with open(f'/proc/{process.pid}/task/{process.pid}/children') as f:
+                pids = [int(pid) for pid in f.read().split()]
+        return first_request, loaded, [memory_kb(pid) for pid in pids]
+    finally:
+        process.send_signal(signal.SIGINT)
+        process.wait()
+
+
+def run(size, port, requests):
+    with tempfile.TemporaryDirectory() as tmp:
+        english_file, data_dir = write_catalogue(tmp, size)
+        from src.api.database import scheme_files, write_scheme_database
+        write_scheme_database(Path(tmp) / 'schemes.sqlite3', scheme_files(english_file, data_dir))
+
+        print(f"\n{size} schemes x 3 languages", flush=True)
+        setups = [
+            ('json', 1, False), ('json', 2, False), ('json', 2, True),
+            ('database', 1, False), ('database', 2, False), ('database', 2, True)
+        ]
+        for store, workers, preload in setups:
+            database = 'schemes.sqlite3' if store == 'database' else 'missing.sqlite3'
+            first_request, loaded, memory = start_server(tmp, database, port, workers, preload, requests)
+            pss = sum(item[0] for item in memory) / len(memory)
+            private = sum(item[1] for item in memory) / len(memory)
+            label = f"{store}, {workers} worker{'s' if workers > 1 else ''}{', preload' if preload else ''}"
+            print(f"  {label:<28} first request {first_request:7.2f} s  all workers loaded {loaded:7.2f} s  "
+                  f"per worker: PSS {pss / 1024:7.1f} MB, private {private / 1024:7.1f} MB", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--top', type=int, default=8)
+    args = parser.parse_args()
+
+    total, direct, pipeline = import_profile(args.top)
+    print(f"import src.api.main: {total / 1000:.0f} ms (python -X importtime, cumulative)")
+    for cumulative, name in direct:
+        print(f"  {name:<40} {cumulative / 1000:8.1f} ms")
+    print(f"pipeline modules imported by the API: {', '.join(pipeline) or 'none'}", flush=True)
+
+    for size in args.sizes:
+        run(size, args.port, args.requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Startup time and memory per API worker: scheme database versus JSON files
+
+Writes a catalogue in every language, converts it, then starts worker
+processes that load it either way and serve a mix of scheme lookups and
+pages. Memory is read from /proc with all workers alive: RSS, PSS, which
+splits pages shared by several workers between them, and private memory. Database workers
+run with SCHEME_DATABASE_WARM_INDEXES=0, so the first search builds its
+index and its latency is reported too.
+Run from the project root (Linux):
+
+    python -m benchmarks.bench_storage --sizes 1000 100000 --workers 2
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.catalogue import write_catalogue
+
+
+def memory_kb():
+    """RSS, PSS and private (not shared with any other process) resident memory of this process in KB"""
+    with open('/proc/self/smaps_rollup') as f:
+        fields = {line.split(':')[0]: int(line.split()[1]) for line in f if line.endswith('kB\n')}
+    return {
+        'rss': fields['Rss'],
+        'pss': fields['Pss'],
+        'private': fields['Private_Clean'] + fields['Private_Dirty']
+    }
+
+
+def worker(root, mode, iterations):
+    """Load the catalogue, serve requests, report, then wait for the parent before measuring shared memory"""
+    from src.api.service import SchemeService, encode_cursor
+    root = Path(root)
+    baseline = memory_kb()['rss']
+
+    start = time.perf_counter()
+    service = SchemeService(
+        data_dir=root / 'translated_schemes',
+        english_file=root / 'processed_pdfs' / 'processed_schemes.json',
+        database_file=root / ('schemes.sqlite3' if mode == 'database' else 'missing.sqlite3')
+    )
+    startup_s = time.perf_counter() - start
+    after_startup = memory_kb()['rss']
+
+    rng = random.Random(0)
+    scheme_ids = [entry["scheme_id"] for entry in service.get_all_schemes('en')]
+    start = time.perf_counter()
+    for _ in range(iterations):
+        service.get_scheme_by_id(rng.choice(scheme_ids), rng.choice(['en', 'hi', 'mr']))
+    lookup_us = (time.perf_counter() - start) / iterations * 1e6
+    for _ in range(iterations // 10):
+        position = rng.randrange(1, len(scheme_ids))
+        lines, _ = service.get_scheme_slice(rng.choice(['en', 'hi', 'mr']), limit=20,
+                                            cursor=encode_cursor(position, scheme_ids[position - 1]))
+        list(lines)
+    service.get_encoded_schemes('en').select('gzip')
+
+    print(json.dumps({'ready': True}), flush=True)
+    sys.stdin.readline()
+    served = memory_kb()
+
+    start = time.perf_counter()
+    service.search_schemes('irrigation subsidy', 'en')
+    first_search_s = time.perf_counter() - start
+    print(json.dumps({
+        'startup_s': startup_s,
+        'baseline_kb': baseline,
+        'startup_kb': after_startup - baseline,
+        'lookup_us': lookup_us,
+        'served': served,
+        'first_search_s': first_search_s,
+        'after_search_kb': memory_kb()['rss']
+    }), flush=True)
+
+
+def run_workers(root, mode, workers, iterations):
+    processes = [
+        subprocess.Popen([sys.executable, '-m', 'benchmarks.bench_storage', '--worker', mode, '--root', str(root),
+                          '--iterations', str(iterations)], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+                         env={**os.environ, 'SCHEME_DATABASE_WARM_INDEXES': '0'})
+        for _ in range(workers)
+    ]
+    # Everything is loaded and warm in every worker before any of them measures
+    for process in processes:
+        assert json.loads(process.stdout.readline())['ready']
+    for process in processes:
+        process.stdin.write('\n')
+        process.stdin.flush()
+    reports = [json.loads(process.stdout.readline()) for process in processes]
+    for process in processes:
+        process.wait()
+    return reports
+
+
+def run(size, workers, iterations, modes):
+    with tempfile.TemporaryDirectory() as tmp:
+        english_file, data_dir = write_catalogue(tmp, size)
+        json_bytes = sum(path.stat().st_size for path in [english_file, *data_dir.glob('*.json')])
+
+        from src.api.database import scheme_files, write_scheme_database
+        start = time.perf_counter()
+        write_scheme_database(Path(tmp) / 'schemes.sqlite3', scheme_files(english_file, data_dir))
+        convert_s = time.perf_counter() - start
+        database_bytes = (Path(tmp) / 'schemes.sqlite3').stat().st_size
+
+        print(f"\n{size} schemes x 3 languages: JSON files {json_bytes / 2**20:.1f} MB, "
+              f"database {database_bytes / 2**20:.1f} MB (converted in {convert_s:.1f} s)", flush=True)
+        for mode in modes:
+            reports = run_workers(tmp, mode, workers, iterations)
+            report = reports[0]
+            pss = sum(item['served']['pss'] for item in reports) / len(reports)
+            private = sum(item['served']['private'] for item in reports) / len(reports)
+            print(f"  {mode:<8} startup {report['startup_s']:7.2f} s  "
+                  f"+{report['startup_kb'] / 1024:7.1f} MB RSS at startup  "
+                  f"lookup {report['lookup_us']:6.1f} us  "
+                  f"serving: RSS {report['served']['rss'] / 1024:7.1f} MB, "
+                  f"PSS {pss / 1024:7.1f} MB, private {private / 1024:7.1f} MB per worker of {workers}  "
+                  f"first search {report['first_search_s']:6.2f} s "
+                  f"(RSS then {report['after_search_kb'] / 1024:7.1f} MB)", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--modes', nargs='+', choices=['json', 'database'], default=['json', 'database'])
+    parser.add_argument('--worker', choices=['json', 'database'], help=argparse.SUPPRESS)
+    parser.add_argument('--root', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.root, args.worker, args.iterations)
+        return
+    for size in args.sizes:
+        run(size, args.workers, args.iterations, args.modes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Translation throughput with the offline fake backend: serial per-string loop versus engine
+
+The serial loop sends one string per request, one language after another,
+like translate_all_schemes did. The engine batches and runs languages
+concurrently under the same request rate. Run from the project root:
+
+    python -m benchmarks.bench_translation [--schemes 100] [--languages 2 4 8]
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from src.translators.backends import FakeBackend
+from src.translators.engine import TranslationEngine
+from src.translators.memory import TranslationMemory, split_sentences
+from benchmarks.catalogue import generate_catalogue
+
+FIELDS = ['scheme_name', 'description', 'eligibility', 'benefits', 'application_process', 'deadline', 'category']
+LANGUAGES = ['hi', 'mr', 'bn', 'ta', 'te', 'gu', 'kn', 'ml', 'pa', 'or']
+
+
+def catalogue_sentences(num_schemes):
+    catalogue = generate_catalogue(num_schemes)
+    return [
+        sentence
+        for schemes in catalogue.values() for scheme in schemes.values()
+        for field in FIELDS if scheme.get(field)
+        for sentence, _ in split_sentences(scheme[field])
+    ]
+
+
+async def serial_loop(backend, sentences, languages, rate):
+    """One request per string, languages in turn, paced like the old fixed sleep"""
+    for lang in languages:
+        for sentence in sentences:
+            await asyncio.sleep(1 / rate)
+            await backend.translate_batch([sentence], lang)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--schemes', type=int, default=100)
+    parser.add_argument('--languages', type=int, nargs='+', default=[2, 4, 8])
+    parser.add_argument('--rate', type=float, default=20.0, help="backend requests per second")
+    parser.add_argument('--latency', type=float, default=0.2, help="seconds per backend request")
+    parser.add_argument('--failure-rate', type=float, default=0.01)
+    parser.add_argument('--serial-sample', type=int, default=100,
+                        help="strings timed for the serial loop, extrapolated to the catalogue")
+    args = parser.parse_args()
+
+    sentences = catalogue_sentences(args.schemes)
+    unique = len(set(sentences))
+    print(f"{args.schemes} schemes: {len(sentences)} sentences, {unique} distinct; "
+          f"{args.rate:g} requests/s, {args.latency}s latency, {args.failure_rate:.0%} item failures")
+    print(f"{'languages':>9} {'serial s (est.)':>16} {'engine s':>9} {'requests':>9} {'retried':>8} "
+          f"{'failed':>7} {'warm memory s':>14}")
+
+    for count in args.languages:
+        languages = LANGUAGES[:count]
+
+        backend = FakeBackend(latency=args.latency)
+        sample = sentences[:args.serial_sample]
+        start = time.perf_counter()
+        asyncio.run(serial_loop(backend, sample, languages[:1], args.rate))
+        serial_s = (time.perf_counter() - start) / len(sample) * len(sentences) * len(languages)
+
+        backend = FakeBackend(latency=args.latency, failure_rate=args.failure_rate)
+        with tempfile.TemporaryDirectory() as tmp:
+            memory = TranslationMemory(Path(tmp) / 'memory.sqlite3')
+            engine = TranslationEngine(backend, memory, rate=args.rate, burst=4, concurrency=8, retry_delay=0.2)
+            start = time.perf_counter()
+            results = engine.translate(sentences, languages)
+            engine_s = time.perf_counter() - start
+            assert all(len(results[lang]) == unique for lang in languages)
+
+            warm = TranslationEngine(backend, memory, rate=args.rate, burst=4, concurrency=8)
+            start = time.perf_counter()
+            warm.translate(sentences, languages)
+            warm_s = time.perf_counter() - start
+            memory.close()
+
+        stats = engine.stats
+        print(f"{count:>9} {serial_s:16.1f} {engine_s:9.2f} {stats['requests']:>9} {stats['retried']:>8} "
+              f"{stats['failed']:>7} {warm_s:14.2f}")
+
+
+if __name__ == "__main__":
+    main()
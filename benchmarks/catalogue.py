@@ -0,0 +1,76 @@
+import json
+import random
+from pathlib import Path
+
+# Names of the translated languages in their file names, code -> name
+LANGUAGE_NAMES = {
+    'hi': 'hindi',
+    'mr': 'marathi',
+    'bn': 'bengali',
+    'ta': 'tamil',
+    'te': 'telugu',
+    'gu': 'gujarati',
+    'kn': 'kannada',
+    'ml': 'malayalam',
+    'pa': 'punjabi',
+    'or': 'odia'
+}
+
+WORDS = [
+    'farmer', 'irrigation', 'drip', 'subsidy', 'insurance', 'crop', 'soil',
+    'health', 'organic', 'loan', 'credit', 'seed', 'fertilizer', 'market',
+    'pension', 'training', 'horticulture', 'livestock', 'dairy', 'fisheries',
+    'tractor', 'warehouse', 'storage', 'income', 'support', 'water', 'land'
+]
+
+
+def make_sentence(rng, length):
+    return ' '.join(rng.choice(WORDS) for _ in range(length)).capitalize() + '.'
+
+
+def make_scheme(rng, level, idx):
+    """Build one synthetic scheme with realistic field lengths"""
+    return {
+        "scheme_name": f"{make_sentence(rng, 4)[:-1]} Yojana {idx}",
+        "scheme_level": level,
+        "description": ' '.join(make_sentence(rng, 15) for _ in range(3)),
+        "eligibility": make_sentence(rng, 20),
+        "benefits": make_sentence(rng, 20),
+        "application_process": make_sentence(rng, 25),
+        "deadline": "Ongoing; no specific deadline mentioned.",
+        "source_link": f"https://agriwelfare.gov.in/en/Major/scheme_{idx}.pdf",
+        "category": rng.choice(['Subsidy', 'Insurance', 'Loan', 'Training'])
+    }
+
+
+def generate_catalogue(num_schemes, seed=0):
+    """Generate a level-bucketed catalogue in the processed_schemes.json layout"""
+    rng = random.Random(seed)
+    catalogue = {'central': {}, 'state': {}}
+    for idx in range(num_schemes):
+        level = 'central' if idx % 3 else 'state'
+        scheme_id = f"{level}_scheme_{str(len(catalogue[level]) + 1).zfill(2)}"
+        catalogue[level][scheme_id] = make_scheme(rng, level, idx)
+    return catalogue
+
+
+def catalogue_languages(count):
+    """The first count - 1 translated languages, code -> name, to go with English (SchemeService's languages)"""
+    return dict(list(LANGUAGE_NAMES.items())[:count - 1])
+
+
+def write_catalogue(root, num_schemes, languages=('en', 'hi', 'mr'), seed=0):
+    """Write a synthetic catalogue for each language and return (english_file, data_dir)"""
+    root = Path(root)
+    english_file = root / 'processed_pdfs' / 'processed_schemes.json'
+    data_dir = root / 'translated_schemes'
+    english_file.parent.mkdir(parents=True, exist_ok=True)
+    data_dir.mkdir(parents=True, exist_ok=True)
+
+    catalogue = generate_catalogue(num_schemes, seed)
+    for lang in languages:
+        target = english_file if lang == 'en' else data_dir / f'processed_schemes_{LANGUAGE_NAMES[lang]}.json'
+        with open(target, 'w', encoding='utf-8') as f:
+            json.dump(catalogue, f, ensure_ascii=False)
+
+    return english_file, data_dir
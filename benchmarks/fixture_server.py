@@ -0,0 +1,126 @@
+"""Local HTTP stand-in for the scheme website, serving files from a directory
+
+Supports what the scraper relies on: keep-alive connections, ETag and
+Last-Modified validators with conditional GETs, and single byte ranges with
+If-Range. Latency and bandwidth per response simulate a remote server.
+"""
+import email.utils
+import hashlib
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import quote, unquote, urlsplit
+
+
+def index_page(root):
+    """HTML page linking every PDF under root"""
+    links = "\n".join(
+        f'<li><a href="/{quote(path.relative_to(root).as_posix())}">{path.stem}</a></li>'
+        for path in sorted(root.rglob('*.pdf'))
+    )
+    return f"<html><body><ul>\n{links}\n</ul></body></html>".encode('utf-8')
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    root = None
+    pages = {}
+    latency = 0.0
+    bandwidth = None
+    # Requests per path (with query) and their arrival times, for checking crawlers
+    hits = None
+    times = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.hits[self.path] += 1
+        self.times.append((time.monotonic(), self.path))
+        time.sleep(self.latency)
+        path = unquote(urlsplit(self.path).path)
+        if path in self.pages:
+            return self.send_body(200, self.pages[path], 'text/html; charset=utf-8')
+
+        file_path = (self.root / path.lstrip('/')).resolve()
+        if self.root.resolve() not in file_path.parents or not file_path.is_file():
+            return self.send_body(404, b"Not found", 'text/plain')
+
+        stat = file_path.stat()
+        etag = '"' + hashlib.md5(f"{stat.st_mtime_ns}-{stat.st_size}".encode()).hexdigest() + '"'
+        last_modified = email.utils.formatdate(stat.st_mtime, usegmt=True)
+        headers = {'ETag': etag, 'Last-Modified': last_modified, 'Accept-Ranges': 'bytes'}
+
+        if self.not_modified(etag, stat.st_mtime):
+            return self.send_body(304, b"", None, headers)
+
+        data = file_path.read_bytes()
+        byte_range = self.headers.get('Range')
+        if_range = self.headers.get('If-Range')
+        if byte_range and byte_range.startswith('bytes=') and if_range in (None, etag, last_modified):
+            start, _, end = byte_range[len('bytes='):].partition('-')
+            start = int(start)
+            end = int(end) if end else len(data) - 1
+            if start >= len(data):
+                headers['Content-Range'] = f"bytes */{len(data)}"
+                return self.send_body(416, b"", None, headers)
+            headers['Content-Range'] = f"bytes {start}-{end}/{len(data)}"
+            return self.send_body(206, data[start:end + 1], 'application/pdf', headers)
+
+        self.send_body(200, data, 'application/pdf', headers)
+
+    def not_modified(self, etag, mtime):
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            return etag in [tag.strip() for tag in if_none_match.split(',')]
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            return int(mtime) <= since
+        return False
+
+    def send_body(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if content_type:
+            self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if not self.bandwidth:
+            self.wfile.write(body)
+            return
+        # Throttle to the configured bytes per second
+        step = max(1, int(self.bandwidth / 20))
+        for start in range(0, len(body), step):
+            self.wfile.write(body[start:start + step])
+            time.sleep(len(body[start:start + step]) / self.bandwidth)
+
+
+@contextmanager
+def serve(root, pages=None, latency=0.0, bandwidth=None):
+    """Serve root on a free local port, yielding (base_url, handler class)
+
+    pages maps URL paths to HTML bodies, '/' defaults to an index of the PDFs.
+    """
+    root = Path(root)
+    handler = type('Handler', (FixtureHandler,), {
+        'root': root,
+        'pages': pages if pages is not None else {'/': index_page(root)},
+        'latency': latency,
+        'bandwidth': bandwidth,
+        'hits': Counter(),
+        'times': []
+    })
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/", handler
+    finally:
+        server.shutdown()
+        server.server_close()
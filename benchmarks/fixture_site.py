@@ -0,0 +1,69 @@
+"""Synthetic scheme website for crawler checks, served with fixture_server
+
+Pages link to each other and to PDFs the way division pages do: every PDF
+is linked from several pages, links come in equivalent spellings (dot
+segments, fragments), tracking parameters make mirror URLs of the same
+page, some PDFs are the same file under two names, off-site links are
+ignored and robots.txt disallows /private/.
+"""
+import random
+
+
+def generate_site(root, num_pages=2000, num_pdfs=200, links_per_page=8, seed=0):
+    """Write PDFs under root and return (pages, expected) for serve(root, pages)
+
+    expected holds the distinct page paths, the PDF paths and the number of
+    distinct PDF contents a crawl of the whole site should find.
+    """
+    rng = random.Random(seed)
+    (root / 'docs').mkdir(parents=True, exist_ok=True)
+    pdfs = []
+    contents = []
+    for idx in range(num_pdfs):
+        # Every 20th PDF repeats an earlier file under a new name
+        if idx % 20 == 19:
+            data = contents[rng.randrange(len(contents))]
+        else:
+            data = b"%PDF-1.4\n" + rng.randbytes(rng.randrange(2000, 20000))
+            contents.append(data)
+        path = f"/docs/scheme_{idx:04d}.pdf"
+        (root / path.lstrip('/')).write_bytes(data)
+        pdfs.append(path)
+
+    page_paths = ['/'] + [f"/division/{idx // 100}/page_{idx:05d}.html" for idx in range(1, num_pages)]
+
+    def spellings(path):
+        """Equivalent ways of linking the same path"""
+        parent, _, name = path.rpartition('/')
+        return [
+            path,
+            f"{path}#section-{rng.randrange(5)}",
+            # A tracking parameter makes a different URL for the same content
+            f"{path}?utm_source=mirror",
+            f"{parent}/./{name}",
+            f"{parent}/../{parent.rsplit('/', 1)[-1]}/{name}" if parent else path
+        ]
+
+    pages = {}
+    for idx, path in enumerate(page_paths):
+        links = []
+        # A chain through every page keeps the whole site reachable
+        if idx + 1 < len(page_paths):
+            links.append(page_paths[idx + 1])
+        for _ in range(links_per_page):
+            links.append(rng.choice(spellings(rng.choice(page_paths))))
+        for _ in range(2):
+            links.append(rng.choice(spellings(rng.choice(pdfs))))
+        links.append("https://elsewhere.example.org/scheme.pdf")
+        links.append("/private/drafts.html")
+        links.append("mailto:help@example.org")
+        body = "\n".join(f'<a href="{link}">link</a>' for link in links)
+        pages[path] = f"<html><body><h1>{path}</h1>\n{body}\n</body></html>".encode('utf-8')
+
+    # Every PDF is linked, whatever the random links picked
+    pages['/'] += "".join(f'<a href="{pdf}">pdf</a>' for pdf in pdfs).encode('utf-8')
+    pages['/robots.txt'] = b"User-agent: *\nDisallow: /private/\n"
+    pages['/private/drafts.html'] = b"<html><body>drafts</body></html>"
+
+    expected = {'pages': set(page_paths), 'pdfs': set(pdfs), 'contents': len(contents)}
+    return pages, expected
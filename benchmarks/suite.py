@@ -0,0 +1,413 @@
+"""Benchmark suite: the scheme service, HTTP load on the API and the offline pipeline, saved as JSON
+
+Runs the chosen groups and records every measurement with its parameters:
+
+- service: SchemeService load time and get_all_schemes/get_scheme_by_id
+  latency on synthetic catalogues of each size, in each number of languages
+- http: the API server (run_api's, forked workers if --workers > 1) on a
+  synthetic catalogue, loaded by keep-alive clients at each concurrency,
+  for full lists, pages and single schemes of /schemes/
+- pipeline: PDFProcessor on the bundled PDFs, translating its output with
+  the offline fake backend, and converting the result to the scheme database
+
+--output saves the run as JSON. Given --baseline, a saved earlier run, every
+metric is compared with it and those worse by more than --threshold are
+flagged, with exit status 1. Run from the project root:
+
+    python -m benchmarks.suite --groups service http --output baseline.json
+    python -m benchmarks.suite --groups service http --baseline baseline.json --output current.json
+    python -m benchmarks.suite --compare baseline.json current.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.catalogue import catalogue_languages, write_catalogue
+from src.pipeline.ids import organize_schemes
+from config import PDF_DIR
+
+GROUPS = ('service', 'http', 'pipeline')
+HTTP_ENDPOINTS = ('list', 'page', 'lookup')
+
+SERVER = """
+import sys
+from pathlib import Path
+from src.api import main, server
+from src.api.service import SchemeService
+
+root = Path(sys.argv[1])
+main.create_service = lambda **options: SchemeService(
+    data_dir=root / 'translated_schemes', english_file=root / 'processed_pdfs' / 'processed_schemes.json',
+    database_file=root / sys.argv[2], **options
+)
+server.serve('127.0.0.1', int(sys.argv[3]), int(sys.argv[4]), True)
+"""
+
+
+def calibrate(repeat=5):
+    """Milliseconds a fixed pure-Python workload takes here, the median of repeat runs
+
+    Saved with each run, so a comparison can tell when the machine itself
+    got slower or faster.
+    """
+    def workload():
+        counts = {}
+        for idx in range(200000):
+            key = str(idx % 1000)
+            counts[key] = counts.get(key, 0) + idx
+        return sorted(counts.values())
+
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        workload()
+        runs.append((time.perf_counter() - start) * 1000)
+    return statistics.median(runs)
+
+
+def metric_key(metric):
+    params = ','.join(f"{name}={value}" for name, value in sorted(metric['params'].items()))
+    return f"{metric['name']}[{params}]"
+
+
+class Results:
+    """Measurements of one run, each with its parameters, unit and whether lower or higher is better"""
+
+    def __init__(self, args):
+        self.meta = {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'calibration_ms': calibrate(),
+            'args': {name: str(value) if isinstance(value, Path) else value for name, value in vars(args).items()}
+        }
+        self.metrics = []
+
+    def add(self, name, params, value, unit, better='lower'):
+        metric = {'name': name, 'params': params, 'value': value, 'unit': unit, 'better': better}
+        self.metrics.append(metric)
+        print(f"  {metric_key(metric):<72} {value:12.3f} {unit}", flush=True)
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'meta': self.meta, 'metrics': self.metrics}, f, indent=2)
+        print(f"\nSaved {len(self.metrics)} metrics to {path}")
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def add_latencies(results, name, params, runs, unit):
+    """Record the p50 and p99 latency, each the median over the runs' samples"""
+    for pct in (50, 99):
+        results.add(f"{name}.p{pct}", params, statistics.median(percentile(samples, pct) for samples in runs), unit)
+
+
+def bench_service(results, args):
+    from src.api.database import scheme_files, write_scheme_database
+    from src.api.service import SchemeService
+
+    print("\nservice", flush=True)
+    for size in args.sizes:
+        for count in args.languages:
+            languages = catalogue_languages(count)
+            codes = ['en', *languages]
+            with tempfile.TemporaryDirectory() as tmp:
+                english_file, data_dir = write_catalogue(tmp, size, languages=codes)
+                for store in args.stores:
+                    database_file = Path(tmp) / f'{store}.sqlite3'
+                    if store == 'database':
+                        write_scheme_database(database_file, scheme_files(english_file, data_dir, languages))
+                    params = {'size': size, 'languages': count, 'store': store}
+
+                    start = time.perf_counter()
+                    service = SchemeService(data_dir=data_dir, english_file=english_file, database_file=database_file,
+                                            background_indexes=False, languages=languages)
+                    results.add('service.load', params, (time.perf_counter() - start) * 1000, 'ms')
+
+                    rng = random.Random(0)
+                    scheme_ids = [entry["scheme_id"] for entry in service.get_all_schemes('en')]
+                    calls = [
+                        ('service.get_all_schemes', service.get_all_schemes,
+                         [(rng.choice(codes), rng.choice([None, 'central', 'state'])) for _ in range(args.iterations)]),
+                        ('service.get_scheme_by_id', service.get_scheme_by_id,
+                         [(rng.choice(scheme_ids), rng.choice(codes)) for _ in range(args.iterations)])
+                    ]
+                    for name, func, args_list in calls:
+                        # Warm up caches (and the database's pages) before measuring
+                        for call_args in args_list:
+                            func(*call_args)
+                        runs = []
+                        for _ in range(args.repeat):
+                            samples = []
+                            for call_args in args_list:
+                                start = time.perf_counter()
+                                func(*call_args)
+                                samples.append((time.perf_counter() - start) * 1e6)
+                            runs.append(samples)
+                        add_latencies(results, name, params, runs, 'us')
+                    del service
+
+
+async def http_get(reader, writer, path):
+    """Send one GET on a keep-alive connection and read the whole response, returning its status"""
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: bench\r\nAccept-Encoding: gzip\r\n\r\n".encode('ascii'))
+    head = (await reader.readuntil(b"\r\n\r\n")).lower()
+    status = int(head[9:12])
+    if b"transfer-encoding: chunked" in head:
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        start = head.find(b"content-length:")
+        if start >= 0:
+            await reader.readexactly(int(head[start + 15:head.index(b"\r\n", start)]))
+    return status
+
+
+async def load(port, paths, concurrency, requests):
+    """Send requests GETs of paths over concurrency connections, returning (latencies ms, errors, seconds)"""
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def client():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        for idx in remaining:
+            start = time.perf_counter()
+            try:
+                status = await http_get(reader, writer, paths[idx % len(paths)])
+            except (OSError, asyncio.IncompleteReadError):
+                errors += 1
+                writer.close()
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+            if status != 200:
+                errors += 1
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def endpoint_paths(endpoint, scheme_ids, codes, count=1000):
+    rng = random.Random(0)
+    if endpoint == 'list':
+        return [f"/schemes/?lang={rng.choice(codes)}" for _ in range(count)]
+    if endpoint == 'page':
+        return [f"/schemes/?lang={rng.choice(codes)}&limit=50" for _ in range(count)]
+    return [f"/schemes/{rng.choice(scheme_ids)}?lang={rng.choice(codes)}" for _ in range(count)]
+
+
+def wait_for_server(process, port, timeout=600):
+    import http.client
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API server exited with status {process.returncode}")
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+        try:
+            connection.request('GET', '/schemes/?lang=en&limit=1000&fields=scheme_name')
+            response = connection.getresponse()
+            if response.status == 200:
+                return [entry["scheme_id"] for entry in json.loads(response.read())]
+        except OSError:
+            time.sleep(0.05)
+        finally:
+            connection.close()
+    raise RuntimeError("API server did not start")
+
+
+def bench_http(results, args):
+    print("\nhttp", flush=True)
+    codes = ['en', 'hi', 'mr']
+    with tempfile.TemporaryDirectory() as tmp:
+        write_catalogue(tmp, args.http_size, languages=codes)
+        process = subprocess.Popen(
+            [sys.executable, '-c', SERVER, tmp, 'missing.sqlite3', str(args.port), str(args.workers)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            scheme_ids = wait_for_server(process, args.port)
+            for endpoint in args.endpoints:
+                paths = endpoint_paths(endpoint, scheme_ids, codes)
+                asyncio.run(load(args.port, paths, 1, len(codes)))
+                for concurrency in args.concurrency:
+                    latencies, errors, elapsed = asyncio.run(load(args.port, paths, concurrency, args.http_requests))
+                    params = {'endpoint': endpoint, 'size': args.http_size, 'concurrency': concurrency,
+                              'workers': args.workers}
+                    results.add('http.throughput', params, len(latencies) / elapsed, 'req/s', better='higher')
+                    add_latencies(results, 'http.latency', params, [latencies], 'ms')
+                    results.add('http.errors', params, errors, 'requests')
+        finally:
+            process.terminate()
+            process.wait()
+
+
+def bench_pipeline(results, args):
+    from src.api.database import scheme_files, write_scheme_database
+    from src.processors.pdf_processor import PDFProcessor
+    from src.translators.backends import FakeBackend
+    from src.translators.engine import TranslationEngine
+    from src.translators.translator import SchemeTranslator
+
+    print("\npipeline", flush=True)
+    pdf_files = sorted(args.pdf_dir.glob('*.pdf'))
+    params = {'pdfs': len(pdf_files), 'nlp_mode': args.nlp_mode, 'workers': args.processor_workers}
+
+    start = time.perf_counter()
+    processor = PDFProcessor(cache_dir=None, nlp_mode=args.nlp_mode)
+    results.add('pipeline.processor_load', params, time.perf_counter() - start, 's')
+    processor.pdf_dir = args.pdf_dir
+    processor.logger.setLevel(logging.WARNING)
+    start = time.perf_counter()
+    schemes = processor.process_all_pdfs(args.processor_workers)
+    process_s = time.perf_counter() - start
+    results.add('pipeline.process', params, process_s, 's')
+    results.add('pipeline.process_per_pdf', params, process_s / max(len(pdf_files), 1), 's')
+    results.add('pipeline.schemes', params, len(schemes), 'schemes', better='higher')
+
+    languages = catalogue_languages(args.pipeline_languages)
+    params = {'pdfs': len(pdf_files), 'languages': len(languages) + 1, 'latency': args.translation_latency}
+    with tempfile.TemporaryDirectory() as tmp:
+        english_file = Path(tmp) / 'processed_pdfs' / 'processed_schemes.json'
+        data_dir = Path(tmp) / 'translated_schemes'
+        english_file.parent.mkdir()
+        data_dir.mkdir()
+        with open(english_file, 'w', encoding='utf-8') as f:
+            json.dump(organize_schemes(schemes), f, indent=4, ensure_ascii=False)
+
+        translator = SchemeTranslator(memory_path=Path(tmp) / 'memory.sqlite3',
+                                      backend=FakeBackend(latency=args.translation_latency), languages=languages)
+        # The configured rate limit is the real service's, the fake one is only bounded by its latency
+        translator.engine = TranslationEngine(translator.backend, translator.memory, rate=1000, burst=8,
+                                              concurrency=8)
+        for logger in (translator.logger, translator.engine.logger):
+            logger.setLevel(logging.WARNING)
+        start = time.perf_counter()
+        translator.translate_all_schemes(english_file, data_dir)
+        results.add('pipeline.translate', params, time.perf_counter() - start, 's')
+        # Nothing changed, so everything comes from the snapshot and the translation memory
+        start = time.perf_counter()
+        translator.translate_all_schemes(english_file, data_dir)
+        results.add('pipeline.translate_unchanged', params, time.perf_counter() - start, 's')
+
+        start = time.perf_counter()
+        write_scheme_database(Path(tmp) / 'schemes.sqlite3', scheme_files(english_file, data_dir, languages))
+        results.add('pipeline.convert', params, time.perf_counter() - start, 's')
+
+
+def compare(baseline, current, threshold):
+    """Print each metric's change from the baseline, returning the keys of those worse than threshold"""
+    meta = baseline.get('meta', {})
+    print(f"\nCompared with the baseline of {meta.get('created', '?')} (commit {meta.get('commit')}), "
+          f"flagging changes for the worse over {threshold:.0%}")
+    base_calibration = meta.get('calibration_ms')
+    calibration = current.get('meta', {}).get('calibration_ms')
+    if base_calibration and calibration and abs(calibration / base_calibration - 1) > threshold:
+        print(f"Warning: the calibration workload took {calibration:.1f} ms against {base_calibration:.1f} ms for "
+              f"the baseline, the machine's speed changed and so may every result")
+    previous = {metric_key(metric): metric for metric in baseline['metrics']}
+    regressions = []
+    for metric in current['metrics']:
+        key = metric_key(metric)
+        old = previous.get(key)
+        if old is None:
+            continue
+        value = metric['value']
+        if old['value']:
+            change = (value - old['value']) / old['value']
+            worse = change > threshold if metric['better'] == 'lower' else change < -threshold
+            shown = f"{change:+7.1%}"
+        else:
+            worse = value > 0 if metric['better'] == 'lower' else False
+            shown = '    new' if value else '      ='
+        if worse:
+            regressions.append(key)
+        print(f"  {key:<72} {old['value']:12.3f} -> {value:12.3f} {metric['unit']:<8} {shown}"
+              f"{'  REGRESSION' if worse else ''}")
+    print(f"{len(regressions)} regression(s)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--groups', nargs='+', choices=GROUPS, default=list(GROUPS))
+    parser.add_argument('--output', type=Path, help="save the results to this JSON file")
+    parser.add_argument('--baseline', type=Path, help="results of an earlier run to compare with")
+    parser.add_argument('--threshold', type=float, default=0.2, help="relative change counted as a regression")
+    parser.add_argument('--compare', type=Path, nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help="only compare two saved runs")
+    # service
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 10000])
+    parser.add_argument('--languages', type=int, nargs='+', default=[3], help="languages of the catalogues")
+    parser.add_argument('--stores', nargs='+', choices=['json', 'database'], default=['json'])
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5, help="runs of the iterations, the median run is kept")
+    # http
+    parser.add_argument('--http-size', type=int, default=10000)
+    parser.add_argument('--endpoints', nargs='+', choices=HTTP_ENDPOINTS, default=list(HTTP_ENDPOINTS))
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--http-requests', type=int, default=2000, help="requests per concurrency level")
+    parser.add_argument('--workers', type=int, default=1, help="API worker processes")
+    parser.add_argument('--port', type=int, default=8766)
+    # pipeline
+    parser.add_argument('--pdf-dir', type=Path, default=PDF_DIR)
+    parser.add_argument('--nlp-mode', default='sentencizer', help="sentencizer needs no spaCy model")
+    parser.add_argument('--processor-workers', type=int, default=1)
+    parser.add_argument('--pipeline-languages', type=int, default=3)
+    parser.add_argument('--translation-latency', type=float, default=0.05, help="seconds per fake backend request")
+    args = parser.parse_args()
+
+    if args.compare:
+        runs = []
+        for path in args.compare:
+            with open(path, encoding='utf-8') as f:
+                runs.append(json.load(f))
+        sys.exit(1 if compare(*runs, args.threshold) else 0)
+
+    results = Results(args)
+    print(f"commit {results.meta['commit']}, Python {results.meta['python']}, {results.meta['cpus']} CPUs, "
+          f"calibration workload {results.meta['calibration_ms']:.1f} ms")
+    benchmarks = {'service': bench_service, 'http': bench_http, 'pipeline': bench_pipeline}
+    for group in args.groups:
+        benchmarks[group](results, args)
+    if args.output:
+        results.save(args.output)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(baseline, {'meta': results.meta, 'metrics': results.metrics}, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
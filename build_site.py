@@ -0,0 +1,14 @@
+from src.api.service import SchemeService
+from src.api.site import build_site
+from config import SITE_DIR
+
+def build():
+    # Reads the scheme database (or the JSON files) the way the API does
+    service = SchemeService(background_indexes=False)
+    counts = build_site(service)
+    for lang, count in counts.items():
+        print(f"{lang}: {count} schemes")
+    print(f"Site saved to: {SITE_DIR}")
+
+if __name__ == "__main__":
+    build()
@@ -13,4 +13,118 @@ PDF_DIR.mkdir(parents=True, exist_ok=True)
 # Base URL for scraping
 BASE_URL = "https://agriwelfare.gov.in/en/Major"
 
+# Concurrent PDF downloads in total and per host
+SCRAPER_CONCURRENCY = int(os.getenv('SCRAPER_CONCURRENCY', '8'))
+SCRAPER_PER_HOST = int(os.getenv('SCRAPER_PER_HOST', '4'))
+
+# Pages crawled besides BASE_URL, e.g. division pages and state portals (comma separated)
+CRAWL_EXTRA_URLS = [url for url in os.getenv('CRAWL_EXTRA_URLS', '').split(',') if url]
+
+# Hosts the crawler may visit (subdomains included), empty means the start URLs' hosts
+CRAWL_ALLOWED_DOMAINS = [domain for domain in os.getenv('CRAWL_ALLOWED_DOMAINS', '').split(',') if domain]
+
+# Link depth from the start pages, page budget and seconds between requests to a host
+CRAWL_MAX_DEPTH = int(os.getenv('CRAWL_MAX_DEPTH', '2'))
+CRAWL_MAX_PAGES = int(os.getenv('CRAWL_MAX_PAGES', '1000'))
+CRAWL_DELAY = float(os.getenv('CRAWL_DELAY', '1'))
+
+# Frontier and seen URLs of the last crawl, so an interrupted crawl resumes
+CRAWL_STATE = BASE_DIR / 'data' / 'cache' / 'crawl_state.json'
+
+# ETag/Last-Modified of downloaded PDFs, for conditional requests on the next run
+SCRAPER_MANIFEST = BASE_DIR / 'data' / 'cache' / 'scraper_manifest.json'
+
+# Worker processes for PDF processing, 1 processes documents serially
+PROCESSOR_WORKERS = int(os.getenv('PROCESSOR_WORKERS', '1'))
+
+# Documents longer than this many pages are extracted in page chunks across workers
+PDF_PAGE_CHUNK_SIZE = int(os.getenv('PDF_PAGE_CHUNK_SIZE', '32'))
+
+# Extracted pages and scheme data from earlier runs, keyed by PDF content hash
+PROCESSOR_CACHE_DIR = BASE_DIR / 'data' / 'cache' / 'pdf_processor'
+
+# spaCy pipeline for scheme descriptions: 'full' (en_core_web_sm), 'senter' (the
+# model's sentence recognizer only) or 'sentencizer' (rule-based, no model needed)
+NLP_MODE = os.getenv('NLP_MODE', 'full')
+
+# Documents described together in one nlp.pipe call
+NLP_BATCH_SIZE = int(os.getenv('NLP_BATCH_SIZE', '8'))
+
+# Seconds between checks for regenerated scheme files, 0 disables hot reload
+SCHEME_RELOAD_INTERVAL = float(os.getenv('SCHEME_RELOAD_INTERVAL', '5'))
+
+# Translation service (see src/translators/backends.py) and target languages, code -> file name
+TRANSLATION_BACKEND = os.getenv('TRANSLATION_BACKEND', 'google')
+TRANSLATION_LANGUAGES = {
+    'hi': 'hindi',
+    'mr': 'marathi'
+}
+
+# Backend requests per second (bursts of up to TRANSLATION_BURST) and requests in flight
+TRANSLATION_RATE = float(os.getenv('TRANSLATION_RATE', '1'))
+TRANSLATION_BURST = int(os.getenv('TRANSLATION_BURST', '1'))
+TRANSLATION_CONCURRENCY = int(os.getenv('TRANSLATION_CONCURRENCY', '4'))
+
+# Sentence translations from earlier runs, and how many to keep (least recently used go first)
+TRANSLATION_MEMORY_PATH = BASE_DIR / 'data' / 'cache' / 'translation_memory.sqlite3'
+TRANSLATION_MEMORY_MAX_ENTRIES = int(os.getenv('TRANSLATION_MEMORY_MAX_ENTRIES', '100000'))
+
+# Kept next to the translations: the English file they were made from, and what the last run changed
+TRANSLATION_SNAPSHOT_FILE = 'source_snapshot.json'
+TRANSLATION_CHANGES_FILE = 'changes.json'
+
+# SQLite database converted from the processed and translated JSON files, kept in data/ next to
+# their folders; the API reads schemes from it on demand instead of loading the JSON files
+SCHEME_DATABASE_FILE = 'schemes.sqlite3'
+
+# Schemes each API worker keeps decoded in memory, and bytes of the database it memory-maps
+# (mapped pages live in the OS page cache, shared by every worker)
+SCHEME_DATABASE_CACHE_SIZE = int(os.getenv('SCHEME_DATABASE_CACHE_SIZE', '1024'))
+SCHEME_DATABASE_MMAP_BYTES = int(os.getenv('SCHEME_DATABASE_MMAP_BYTES', str(1 << 30)))
+
+# Build the search, name and eligibility indexes over the database in the background after
+# it is opened (0 builds each on the first request that needs it)
+SCHEME_DATABASE_WARM_INDEXES = os.getenv('SCHEME_DATABASE_WARM_INDEXES', '1') != '0'
+
+# Address of the API server, and its worker processes
+API_HOST = os.getenv('API_HOST', '0.0.0.0')
+API_PORT = int(os.getenv('API_PORT', '8000'))
+API_WORKERS = int(os.getenv('API_WORKERS', '1'))
+
+# Load the scheme data (and build its indexes) once before forking the workers, so they
+# share it copy-on-write instead of each loading its own; only used with API_WORKERS > 1
+API_PRELOAD = os.getenv('API_PRELOAD', '1') != '0'
+
+# Pipeline log file, rotated when it reaches LOG_MAX_BYTES (0 never) or, if LOG_ROTATE_WHEN is set,
+# on a schedule instead (e.g. 'midnight', see TimedRotatingFileHandler); LOG_BACKUP_COUNT rotated files are kept
+LOG_FILE = BASE_DIR / 'logs' / 'pipeline.log'
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', str(10 << 20)))
+LOG_ROTATE_WHEN = os.getenv('LOG_ROTATE_WHEN', '')
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '5'))
+
+# Log lines as 'text' or 'json' (one object per line)
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+
+# Level of the pipeline loggers, and levels of single loggers, e.g. 'pdf_downloader=DEBUG,crawler=WARNING'
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_LEVELS = {
+    name.strip(): level.strip().upper()
+    for name, level in (item.split('=', 1) for item in os.getenv('LOG_LEVELS', '').split(',') if '=' in item)
+}
+
+# Schemes whose text is at least this similar (estimated Jaccard similarity of their word 3-grams)
+# are merged into one, and the MinHash permutations each scheme's similarity is estimated from
+DEDUP_THRESHOLD = float(os.getenv('DEDUP_THRESHOLD', '0.5'))
+DEDUP_NUM_PERM = int(os.getenv('DEDUP_NUM_PERM', '128'))
+
+# Scheme IDs given out so far, by source link, so reprocessing never renumbers a published scheme
+SCHEME_ID_FILE = BASE_DIR / 'data' / 'scheme_ids.json'
+
+# What each pipeline stage last ran on, and its results by content hash (see run_pipeline.py)
+PIPELINE_STATE_DIR = BASE_DIR / 'data' / 'cache' / 'pipeline'
+
+# Static frontend built by build_site.py (and the pipeline): a page per language with its
+# schemes in it and fingerprinted assets, served by the API or any static file server
+SITE_DIR = BASE_DIR / 'data' / 'site'
+
 # Configure any other constants here 
\ No newline at end of file
@@ -0,0 +1,17 @@
+from src.api.database import scheme_files, write_scheme_database
+from config import SCHEME_DATABASE_FILE
+from pathlib import Path
+
+def convert_schemes():
+    # Processed and translated files, as the API loads them
+    english_file = Path('data/processed_pdfs/processed_schemes.json')
+    data_dir = Path('data/translated_schemes')
+    database_file = data_dir.parent / SCHEME_DATABASE_FILE
+
+    counts = write_scheme_database(database_file, scheme_files(english_file, data_dir))
+    for lang, count in counts.items():
+        print(f"{lang}: {count} schemes")
+    print(f"Scheme database saved to: {database_file}")
+
+if __name__ == "__main__":
+    convert_schemes()
@@ -1,5 +1,5 @@
-import uvicorn
-from src.api.main import app
+from src.api.server import serve
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    # API_HOST, API_PORT, API_WORKERS and API_PRELOAD in config.py
+    serve()
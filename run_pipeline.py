@@ -0,0 +1,32 @@
+from src.pipeline.graph import RAN, FAILED, BLOCKED
+from src.pipeline.stages import SchemePipeline, SCRAPE_MODES
+from config import PROCESSOR_WORKERS, NLP_MODE
+import argparse
+import sys
+
+def run_pipeline():
+    parser = argparse.ArgumentParser(description="Scrape, process, translate and publish the schemes whose sources changed")
+    parser.add_argument('--scrape', choices=SCRAPE_MODES, help="Download PDFs first, from BASE_URL or by crawling")
+    parser.add_argument('--workers', type=int, default=PROCESSOR_WORKERS, help="Worker processes for PDF processing")
+    parser.add_argument('--nlp-mode', default=NLP_MODE)
+    parser.add_argument('--force', action='store_true', help="Rerun every stage, even if its inputs are unchanged")
+    args = parser.parse_args()
+
+    pipeline = SchemePipeline(scrape=args.scrape, workers=args.workers, nlp_mode=args.nlp_mode, force=args.force)
+    status = pipeline.run()
+
+    # Per-document stages are summed up, the others listed
+    print("\nPipeline Summary:")
+    print("-" * 50)
+    for name, outcome in status.items():
+        if ':' not in name:
+            print(f"{name}: {outcome}")
+    documents = [outcome for name, outcome in status.items() if name.startswith('process:')]
+    print(f"Documents processed: {documents.count(RAN)} of {len(documents)}")
+    failed = [name for name, outcome in status.items() if outcome in (FAILED, BLOCKED)]
+    if failed:
+        print(f"Failed or blocked: {', '.join(failed)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    run_pipeline()
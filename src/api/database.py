@@ -0,0 +1,534 @@
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import zlib
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from .responses import GZIP_LEVEL, BROTLI_QUALITY, MIN_COMPRESS_BYTES, SCHEME_FIELDS, EMPTY_VIEW, brotli, \
+    encode_scheme, parse_accept_encoding
+from .store import SchemeStore, SCHEME_LEVELS
+from .search import SearchIndex
+from .names import NameIndex
+from .eligibility import ELIGIBILITY_LANGUAGE, EligibilityIndex
+from config import SCHEME_DATABASE_CACHE_SIZE, SCHEME_DATABASE_MMAP_BYTES, TRANSLATION_LANGUAGES
+
+# Bumped whenever the tables change, older databases are not opened
+DATABASE_VERSION = 2
+# Rows fetched per query when streaming fragments
+DATABASE_BATCH_ROWS = 256
+# Bytes of a view body collected before they go through the compressors
+VIEW_WRITE_BYTES = 1 << 16
+
+SCHEMA = """
+    CREATE TABLE meta (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+    -- One row per scheme and language, row IDs in catalogue order
+    CREATE TABLE schemes (
+        id INTEGER PRIMARY KEY,
+        lang TEXT NOT NULL,
+        level TEXT NOT NULL,
+        scheme_id TEXT NOT NULL,
+        -- Encoded response entry, NULL if the scheme does not validate
+        fragment BLOB,
+        -- JSON of the detail fields the fragment leaves out (all of them without one), NULL if none
+        extra TEXT
+    );
+    CREATE INDEX schemes_by_scheme_id ON schemes (lang, scheme_id, id);
+    -- Row IDs (int64, native byte order) of a view's schemes and of those in its encoded body
+    CREATE TABLE views (
+        lang TEXT NOT NULL,
+        level TEXT NOT NULL,
+        entries BLOB NOT NULL,
+        valid BLOB NOT NULL,
+        etag TEXT NOT NULL,
+        PRIMARY KEY (lang, level)
+    );
+    -- Encoded view bodies; the plain one is only stored if too small to compress
+    CREATE TABLE bodies (
+        lang TEXT NOT NULL,
+        level TEXT NOT NULL,
+        encoding TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        body BLOB,
+        PRIMARY KEY (lang, level, encoding)
+    );
+"""
+
+
+def scheme_files(english_file: Path, data_dir: Path, languages: Optional[Dict[str, str]] = None) -> Dict[str, Path]:
+    """Language code -> processed scheme file, English first, then the translations the pipeline writes
+
+    languages maps codes to the names in the translated file names,
+    TRANSLATION_LANGUAGES by default.
+    """
+    languages = TRANSLATION_LANGUAGES if languages is None else languages
+    return {
+        'en': Path(english_file),
+        **{lang: Path(data_dir) / f'processed_schemes_{name}.json' for lang, name in languages.items()}
+    }
+
+
+def file_signature(file_path: Path) -> Optional[Tuple[int, int]]:
+    """Get the (mtime, size) pair used to detect changed files"""
+    try:
+        stat = Path(file_path).stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def view_level(level: Optional[str]) -> str:
+    """Level key of a view in the database, '' for every level"""
+    return level or ''
+
+
+class ViewWriter:
+    """Builds a view's JSON array body piece by piece: its ETag and compressed variants
+
+    Matches the body and ETag of an EncodedView over the same fragments,
+    without holding the plain body in memory.
+    """
+
+    def __init__(self):
+        self.digest = hashlib.blake2b(digest_size=16)
+        self.compressors = {'gzip': zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)}
+        if brotli is not None:
+            self.compressors['br'] = brotli.Compressor(quality=BROTLI_QUALITY)
+        self.bodies = {encoding: [] for encoding in self.compressors}
+        self.pending = [b"["]
+        self.pending_size = 1
+        self.size = 0
+        # Kept while the body is small enough to be sent plain
+        self.plain = []
+        self.count = 0
+
+    def add(self, fragment: bytes):
+        piece = b"," + fragment if self.count else fragment
+        self.count += 1
+        self.pending.append(piece)
+        self.pending_size += len(piece)
+        if self.pending_size >= VIEW_WRITE_BYTES:
+            self.flush()
+
+    def flush(self):
+        data = b"".join(self.pending)
+        self.pending, self.pending_size = [], 0
+        self.size += len(data)
+        self.digest.update(data)
+        if self.plain is not None:
+            self.plain.append(data)
+            if self.size >= MIN_COMPRESS_BYTES:
+                self.plain = None
+        self.bodies['gzip'].append(self.compressors['gzip'].compress(data))
+        if 'br' in self.compressors:
+            self.bodies['br'].append(self.compressors['br'].process(data))
+
+    def finish(self) -> Tuple[str, Dict[str, Tuple[int, Optional[bytes]]]]:
+        """ETag and encoding -> (size, body), the plain body being None unless it is small"""
+        self.pending.append(b"]")
+        self.flush()
+        self.bodies['gzip'].append(self.compressors['gzip'].flush())
+        if 'br' in self.compressors:
+            self.bodies['br'].append(self.compressors['br'].finish())
+        encodings = {'identity': (self.size, b"".join(self.plain) if self.plain is not None else None)}
+        for encoding, parts in self.bodies.items():
+            body = b"".join(parts)
+            encodings[encoding] = (len(body), body)
+        return 'W/"' + self.digest.hexdigest() + '"', encodings
+
+
+def encode_fragment(lang: str, entry: Dict) -> Optional[bytes]:
+    """Encode one response entry, None if it does not validate"""
+    try:
+        return encode_scheme(entry)
+    except ValidationError as e:
+        print(f"Warning: Skipping invalid scheme {entry['scheme_id']} ({lang}): {e.error_count()} errors")
+        return None
+
+
+def write_scheme_database(database_file: Path, files: Dict[str, Path]) -> Dict[str, int]:
+    """Convert the processed scheme files into a scheme database, returning the schemes per language
+
+    English is always converted, translations only when their file exists,
+    like the API loads them. The database is built in a temporary file and
+    moved into place, so a serving API only ever opens a complete one (and
+    keeps reading the one it has open until it reloads).
+    """
+    database_file = Path(database_file)
+    database_file.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=database_file.parent, prefix=f".{database_file.name}.", suffix=".tmp")
+    os.close(fd)
+    counts = {}
+    sources = {}
+    try:
+        connection = sqlite3.connect(tmp_path)
+        connection.executescript(SCHEMA)
+        for lang, file_path in files.items():
+            if lang != 'en' and not file_path.exists():
+                continue
+            sources[lang] = file_signature(file_path)
+            try:
+                with open(file_path, 'rb') as f:
+                    data = json.loads(f.read())
+            except FileNotFoundError:
+                print(f"Warning: File not found: {file_path}")
+                data = {}
+            counts[lang] = write_language(connection, lang, data)
+            # Parsed data of one language at a time
+            del data
+
+        connection.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ('version', str(DATABASE_VERSION)),
+            ('languages', json.dumps(list(counts))),
+            ('sources', json.dumps(sources))
+        ])
+        connection.commit()
+        connection.execute("VACUUM")
+        connection.close()
+        os.replace(tmp_path, database_file)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return counts
+
+
+def write_language(connection: sqlite3.Connection, lang: str, data: Dict) -> int:
+    """Insert one language's schemes and its encoded views"""
+    levels = (None,) + SCHEME_LEVELS
+    writers = {level: ViewWriter() for level in levels}
+    entries = {level: array('q') for level in levels}
+    valid = {level: array('q') for level in levels}
+    count = 0
+
+    for scheme_level, schemes in data.items():
+        for scheme_id, scheme_details in schemes.items():
+            fragment = encode_fragment(lang, {"scheme_id": scheme_id, "level": scheme_level, "details": scheme_details})
+            # Validated fields are only stored once, in the fragment
+            extra = {
+                field: value for field, value in scheme_details.items()
+                if fragment is None or field not in SCHEME_FIELDS
+            }
+            rowid = connection.execute(
+                "INSERT INTO schemes (lang, level, scheme_id, fragment, extra) VALUES (?, ?, ?, ?, ?)",
+                (lang, scheme_level, scheme_id, fragment, json.dumps(extra, ensure_ascii=False) if extra else None)
+            ).lastrowid
+            count += 1
+            for level in (None, scheme_level) if scheme_level in SCHEME_LEVELS else (None,):
+                entries[level].append(rowid)
+                if fragment is not None:
+                    valid[level].append(rowid)
+                    writers[level].add(fragment)
+
+    for level in levels:
+        etag, encodings = writers[level].finish()
+        connection.execute("INSERT INTO views VALUES (?, ?, ?, ?, ?)", (
+            lang, view_level(level), entries[level].tobytes(), valid[level].tobytes(), etag
+        ))
+        connection.executemany("INSERT INTO bodies VALUES (?, ?, ?, ?, ?)", [
+            (lang, view_level(level), encoding, size, body) for encoding, (size, body) in encodings.items()
+        ])
+    return count
+
+
+class SchemeDatabase:
+    """Read-only access to a scheme database, with a small cache of decoded entries
+
+    Every thread, and every forked worker, opens its own connection. The file
+    is memory-mapped, so workers share its pages through the OS page cache and
+    only hold the entries they served recently as Python objects.
+    """
+
+    def __init__(self, path: Path, cache_size: int = SCHEME_DATABASE_CACHE_SIZE,
+                 mmap_bytes: int = SCHEME_DATABASE_MMAP_BYTES):
+        self.path = Path(path).resolve()
+        self.cache_size = cache_size
+        self.mmap_bytes = mmap_bytes
+        self.local = threading.local()
+        # Row ID -> response entry, least recently used first
+        self.cache: OrderedDict = OrderedDict()
+        self.cache_lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+        meta = dict(self.connection().execute("SELECT key, value FROM meta"))
+        if meta.get('version') != str(DATABASE_VERSION):
+            raise ValueError(f"Unsupported scheme database version {meta.get('version')} in {self.path}")
+        self.languages: List[str] = json.loads(meta['languages'])
+        # Language code -> (mtime, size) of the file it was converted from
+        self.sources: Dict[str, Optional[List[int]]] = json.loads(meta['sources'])
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use"""
+        connection = getattr(self.local, 'connection', None)
+        if connection is None or self.local.pid != os.getpid():
+            # Databases are replaced, never written in place, so SQLite can skip locking
+            connection = sqlite3.connect(f"{self.path.as_uri()}?mode=ro&immutable=1", uri=True)
+            connection.execute(f"PRAGMA mmap_size = {int(self.mmap_bytes)}")
+            self.local.connection, self.local.pid = connection, os.getpid()
+        return connection
+
+    def stale_languages(self, files: Dict[str, Path]) -> List[str]:
+        """Languages whose scheme file changed, appeared or went away since the conversion"""
+        stale = []
+        for lang, file_path in files.items():
+            signature = file_signature(file_path)
+            if lang in self.sources:
+                recorded = self.sources[lang]
+                if (list(signature) if signature else None) != recorded:
+                    stale.append(lang)
+            elif signature is not None:
+                stale.append(lang)
+        return stale
+
+    def entry(self, rowid: int) -> Optional[Dict]:
+        """Response entry of a row, decoded once while it stays in the cache"""
+        with self.cache_lock:
+            entry = self.cache.get(rowid)
+            if entry is not None:
+                self.cache.move_to_end(rowid)
+                self.stats['hits'] += 1
+                return entry
+            self.stats['misses'] += 1
+
+        row = self.connection().execute(
+            "SELECT scheme_id, level, fragment, extra FROM schemes WHERE id = ?", (rowid,)
+        ).fetchone()
+        if row is None:
+            return None
+        scheme_id, level, fragment, extra = row
+        details = json.loads(fragment)["details"] if fragment is not None else {}
+        if extra is not None:
+            details.update(json.loads(extra))
+        entry = {"scheme_id": scheme_id, "level": level, "details": details}
+        with self.cache_lock:
+            self.cache[rowid] = entry
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return entry
+
+    def lookup(self, lang: str, scheme_id: str) -> Optional[Dict]:
+        """Response entry of a scheme, the first one if an ID is repeated across levels"""
+        row = self.connection().execute(
+            "SELECT id FROM schemes WHERE lang = ? AND scheme_id = ? ORDER BY id LIMIT 1", (lang, scheme_id)
+        ).fetchone()
+        return self.entry(row[0]) if row else None
+
+    def valid_rows(self, lang: str) -> List[Tuple[int, str, str]]:
+        """(row ID, level, scheme_id) of the schemes of a language that validate, in catalogue order"""
+        return self.connection().execute(
+            "SELECT id, level, scheme_id FROM schemes WHERE lang = ? AND fragment IS NOT NULL ORDER BY id", (lang,)
+        ).fetchall()
+
+    def view_rows(self, lang: str, level: Optional[str]) -> Optional[Tuple[array, array, str]]:
+        """Row IDs of a view's schemes and of its valid ones, and its ETag"""
+        row = self.connection().execute(
+            "SELECT entries, valid, etag FROM views WHERE lang = ? AND level = ?", (lang, view_level(level))
+        ).fetchone()
+        if row is None:
+            return None
+        entries, valid = array('q'), array('q')
+        entries.frombytes(row[0])
+        valid.frombytes(row[1])
+        return entries, valid, row[2]
+
+    def fragments(self, rowids: Sequence) -> Iterator[bytes]:
+        """Encoded entries of the given rows in order, fetched in batches as the iterator is consumed"""
+        for start in range(0, len(rowids), DATABASE_BATCH_ROWS):
+            batch = list(rowids[start:start + DATABASE_BATCH_ROWS])
+            found = dict(self.connection().execute(
+                f"SELECT id, fragment FROM schemes WHERE id IN ({','.join('?' * len(batch))})", batch
+            ).fetchall())
+            for rowid in batch:
+                yield found[rowid]
+
+    def body_sizes(self, lang: str, level: Optional[str]) -> Dict[str, int]:
+        """Encoding -> size of the stored bodies of a view"""
+        return dict(self.connection().execute(
+            "SELECT encoding, size FROM bodies WHERE lang = ? AND level = ?", (lang, view_level(level))
+        ).fetchall())
+
+    def body(self, lang: str, level: Optional[str], encoding: str) -> Optional[bytes]:
+        row = self.connection().execute(
+            "SELECT body FROM bodies WHERE lang = ? AND level = ? AND encoding = ?", (lang, view_level(level), encoding)
+        ).fetchone()
+        return row[0] if row else None
+
+
+class StoredView:
+    """Pre-encoded view whose bodies stay in the database until a request selects one"""
+
+    def __init__(self, database: SchemeDatabase, lang: str, level: Optional[str], etag: str):
+        self.database = database
+        self.lang = lang
+        self.level = level
+        self.etag = etag
+        self.sizes = database.body_sizes(lang, level)
+
+    def select(self, accept_encoding: str):
+        """Pick the smallest body the client accepts, returning (body, encoding)"""
+        accepted = parse_accept_encoding(accept_encoding)
+        best_encoding = None
+        for encoding, size in self.sizes.items():
+            if encoding in accepted and size < self.sizes.get('identity', 0):
+                if best_encoding is None or size < self.sizes[best_encoding]:
+                    best_encoding = encoding
+        if best_encoding:
+            return self.database.body(self.lang, self.level, best_encoding), best_encoding
+        body = self.database.body(self.lang, self.level, 'identity')
+        if body is None:
+            # Large plain bodies are not stored, clients that take no compression are rare
+            body = gzip.decompress(self.database.body(self.lang, self.level, 'gzip'))
+        return body, None
+
+
+class StoredEntry(Mapping):
+    """Response entry that reads its details from the database on access
+
+    Indexes hold these instead of the decoded entries, so building one does
+    not keep every scheme in memory.
+    """
+
+    __slots__ = ('database', 'rowid', 'scheme_id', 'level')
+
+    def __init__(self, database: SchemeDatabase, rowid: int, scheme_id: str, level: str):
+        self.database = database
+        self.rowid = rowid
+        self.scheme_id = scheme_id
+        self.level = level
+
+    def __getitem__(self, key):
+        if key == 'scheme_id':
+            return self.scheme_id
+        if key == 'level':
+            return self.level
+        if key == 'details':
+            return self.database.entry(self.rowid)['details']
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(('scheme_id', 'level', 'details'))
+
+    def __len__(self) -> int:
+        return 3
+
+
+class StoredEntries(Sequence):
+    """Response entries of a view, read from the database as they are indexed"""
+
+    def __init__(self, database: SchemeDatabase, rowids: array):
+        self.database = database
+        self.rowids = rowids
+
+    def __len__(self) -> int:
+        return len(self.rowids)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self.database.entry(rowid) for rowid in self.rowids[idx]]
+        return self.database.entry(self.rowids[idx])
+
+
+class DatabaseStore(SchemeStore):
+    """SchemeStore over a scheme database, reading schemes on demand
+
+    Views only load their row IDs; entries, fragments and encoded bodies are
+    read as requests need them. The search, name and eligibility indexes are
+    built on first use.
+    """
+
+    def __init__(self, database: SchemeDatabase, generation: int = 0):
+        # Scheme data stays in the database
+        super().__init__({}, generation)
+        self.database = database
+        self.index_lock = threading.Lock()
+        self.eligibility_indexes: Dict[str, EligibilityIndex] = {}
+
+    @property
+    def languages(self) -> List[str]:
+        return list(self.database.languages)
+
+    def load_view(self, lang: str, level: Optional[str]):
+        key = (lang, level)
+        rows = self.database.view_rows(lang, level) if lang in self.database.languages else None
+        if rows is None:
+            self.views[key], self.valid[key], self.encoded[key] = [], [], EMPTY_VIEW
+            return
+        entries, valid, etag = rows
+        self.views[key] = StoredEntries(self.database, entries)
+        self.valid[key] = StoredEntries(self.database, valid)
+        self.encoded[key] = StoredView(self.database, lang, level, etag)
+
+    def get_view(self, lang: str, level: Optional[str] = None) -> List[Dict]:
+        if (lang, level) not in self.views:
+            self.load_view(lang, level)
+        return self.views[(lang, level)]
+
+    def get_encoded(self, lang: str, level: Optional[str] = None):
+        if (lang, level) not in self.encoded:
+            self.load_view(lang, level)
+        return self.encoded[(lang, level)]
+
+    def get_valid(self, lang: str, level: Optional[str] = None) -> List[Dict]:
+        if (lang, level) not in self.valid:
+            self.load_view(lang, level)
+        return self.valid[(lang, level)]
+
+    def get_fragments(self, lang: str, level: Optional[str], start: int, end: int) -> Iterator[bytes]:
+        valid = self.get_valid(lang, level)
+        if not valid:
+            return iter(())
+        return self.database.fragments(valid.rowids[start:end])
+
+    def get_entry(self, lang: str, scheme_id: str) -> Optional[Dict]:
+        if lang not in self.database.languages:
+            return None
+        return self.database.lookup(lang, scheme_id)
+
+    def searchable(self, lang: str) -> List[Tuple[str, StoredEntry]]:
+        """(level, entry) pairs of the valid schemes of a language, for building its indexes"""
+        return [
+            (level, StoredEntry(self.database, rowid, scheme_id, level))
+            for rowid, level, scheme_id in self.database.valid_rows(lang)
+        ]
+
+    def build_index(self, indexes: Dict, lang: str, build):
+        """Build a language's index into indexes unless it is there already"""
+        if lang in indexes or lang not in self.database.languages:
+            return
+        with self.index_lock:
+            if lang not in indexes:
+                indexes[lang] = build(self.searchable(lang))
+
+    def build_indexes(self):
+        """Build every index now rather than on first use"""
+        for lang in self.database.languages:
+            self.build_index(self.search, lang, SearchIndex.build)
+            self.build_index(self.names, lang, NameIndex.build)
+        self.build_index(self.eligibility_indexes, ELIGIBILITY_LANGUAGE, EligibilityIndex.build)
+
+    def search_schemes(self, lang: str, query: str, limit: int = 10, level: Optional[str] = None,
+                       prefix: bool = True) -> List[Tuple[float, Dict]]:
+        self.build_index(self.search, lang, SearchIndex.build)
+        return super().search_schemes(lang, query, limit, level, prefix)
+
+    def match_names(self, query: str, limit: int = 10) -> List[Tuple[float, str, Dict]]:
+        for lang in self.database.languages:
+            self.build_index(self.names, lang, NameIndex.build)
+        return super().match_names(query, limit)
+
+    def match_profile(self, profile: Dict, limit: int = 10, level: Optional[str] = None,
+                      strict: bool = False) -> List[Tuple[int, List[str], List[str], Dict]]:
+        self.build_index(self.eligibility_indexes, ELIGIBILITY_LANGUAGE, EligibilityIndex.build)
+        self.eligibility = self.eligibility_indexes.get(ELIGIBILITY_LANGUAGE, self.eligibility)
+        return super().match_profile(profile, limit, level, strict)
@@ -0,0 +1,225 @@
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.processors.eligibility import compile_eligibility, holding_categories, HOLDING_CATEGORIES
+
+# Scheme texts the eligibility rules are compiled from, translations share them
+ELIGIBILITY_LANGUAGE = 'en'
+# Criteria a match can satisfy, in the order they are reported
+CRITERIA = ('state', 'category', 'land', 'age', 'land_required')
+
+
+def to_bitset(numbers: List[int]) -> int:
+    """Bitset with the given bits set, built in one go rather than one OR per bit"""
+    if not numbers:
+        return 0
+    buffer = bytearray(max(numbers) // 8 + 1)
+    for number in numbers:
+        buffer[number >> 3] |= 1 << (number & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+def set_bits(bits: int) -> Iterator[int]:
+    """Positions of the set bits, lowest first"""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class IntervalIndex:
+    """Schemes whose [min, max] range holds a value, as one bitset per elementary interval
+
+    Range ends split the number line into single points and the open
+    intervals between them; a lookup bisects to one of those and reads its
+    precomputed bitset of covering schemes.
+    """
+
+    def __init__(self, ranges: List[Optional[List[Optional[float]]]]):
+        self.points = sorted({bound for bounds in ranges if bounds for bound in bounds if bound is not None})
+        starts = defaultdict(list)
+        ends = defaultdict(list)
+        restricted = []
+        for number, bounds in enumerate(ranges):
+            if not bounds:
+                continue
+            low, high = bounds
+            restricted.append(number)
+            starts[0 if low is None else self.segment(low)].append(number)
+            ends[2 * len(self.points) + 1 if high is None else self.segment(high) + 1].append(number)
+        # Schemes with a range, unlimited ones match any value
+        self.restricted = to_bitset(restricted)
+
+        self.segments = []
+        covering = 0
+        for segment in range(2 * len(self.points) + 1):
+            covering = (covering | to_bitset(starts[segment])) & ~to_bitset(ends[segment])
+            self.segments.append(covering)
+
+    def segment(self, value: float) -> int:
+        """Elementary interval of a value: 2i + 1 is points[i], 2i the interval before it"""
+        idx = bisect_left(self.points, value)
+        return 2 * idx + 1 if idx < len(self.points) and self.points[idx] == value else 2 * idx
+
+    def lookup(self, value: float) -> int:
+        """Restricted schemes whose range holds value"""
+        return self.segments[self.segment(value)]
+
+
+class EligibilityIndex:
+    """Bitsets and interval indexes over compiled eligibility rules, answering profile queries
+
+    Bit n stands for the n-th scheme in catalogue order. A query ANDs one
+    bitset per profile attribute, so its cost depends on the number of
+    criteria and words per bitset, not on testing schemes one by one.
+    """
+
+    def __init__(self):
+        self.entries: List[Tuple[str, Dict]] = []
+        self.everyone = 0
+        self.farmers = 0
+        self.levels: Dict[str, int] = {}
+        self.land_required = 0
+        # Attribute value -> schemes limited to it, and schemes limited to any value
+        self.states: Dict[str, int] = {}
+        self.state_restricted = 0
+        self.categories: Dict[str, int] = {}
+        self.category_restricted = 0
+        # Schemes limited to any category the land holding does not decide
+        self.social_restricted = 0
+        # District -> schemes excluding it
+        self.excluded_districts: Dict[str, int] = {}
+        self.age = IntervalIndex([])
+        self.land = IntervalIndex([])
+
+    @classmethod
+    def build(cls, entries: List[Tuple[str, Dict]]) -> 'EligibilityIndex':
+        """Index (level, response entry) pairs, compiling rules the data does not carry"""
+        index = cls()
+        index.entries = entries
+        farmers, land_required = [], []
+        levels, states, categories, excluded = (defaultdict(list) for _ in range(4))
+        ages, lands = [], []
+        for number, (level, entry) in enumerate(entries):
+            details = entry['details']
+            rules = details.get('eligibility_rules') or compile_eligibility(details.get('eligibility'))
+            levels[level].append(number)
+            if rules['farmers']:
+                farmers.append(number)
+            if rules['land_required']:
+                land_required.append(number)
+            for state in rules['states']:
+                states[state.casefold()].append(number)
+            for category in rules['categories']:
+                categories[category].append(number)
+            for district in rules['excluded_districts']:
+                excluded[district.casefold()].append(number)
+            ages.append(rules['age'])
+            lands.append(rules['land_hectares'])
+
+        index.everyone = (1 << len(entries)) - 1
+        index.farmers = to_bitset(farmers)
+        index.land_required = to_bitset(land_required)
+        index.levels = {level: to_bitset(numbers) for level, numbers in levels.items()}
+        index.states = {state: to_bitset(numbers) for state, numbers in states.items()}
+        index.state_restricted = to_bitset(sorted({number for numbers in states.values() for number in numbers}))
+        index.categories = {category: to_bitset(numbers) for category, numbers in categories.items()}
+        index.category_restricted = to_bitset(
+            sorted({number for numbers in categories.values() for number in numbers})
+        )
+        index.social_restricted = to_bitset(sorted({
+            number for category, numbers in categories.items() if category not in HOLDING_CATEGORIES
+            for number in numbers
+        }))
+        index.excluded_districts = {district: to_bitset(numbers) for district, numbers in excluded.items()}
+        index.age = IntervalIndex(ages)
+        index.land = IntervalIndex(lands)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def evaluate(self, profile: Dict, level: Optional[str] = None,
+                 strict: bool = False) -> Tuple[int, Dict[str, int], Dict[str, int]]:
+        """(eligible, satisfied, unverified) bitsets for a farmer profile
+
+        satisfied and unverified map each criterion to the schemes limited by
+        it that the profile meets, or leaves unknown. Unknown attributes only
+        rule schemes out when strict.
+        """
+        eligible = self.farmers if level is None else self.farmers & self.levels.get(level, 0)
+        satisfied = {}
+        unverified = {}
+        land = profile.get('land_hectares')
+
+        def limit(name, restricted, matching, unknown):
+            """Keep schemes not restricted, matching ones and, unless strict, the unknown ones"""
+            nonlocal eligible
+            unknown &= ~matching
+            kept = matching | (self.everyone & ~restricted)
+            eligible &= kept if strict else kept | unknown
+            if restricted & ~unknown:
+                satisfied[name] = matching & restricted
+            if unknown:
+                unverified[name] = unknown
+
+        state = profile.get('state')
+        limit('state', self.state_restricted, self.states.get(state.casefold(), 0) if state else 0,
+              0 if state else self.state_restricted)
+
+        categories = set(profile.get('categories') or []) | set(holding_categories(land))
+        matching = 0
+        for category in categories:
+            matching |= self.categories.get(category, 0)
+        # Categories are unknown unless given; the land holding only decides the holding categories
+        if profile.get('categories'):
+            unknown = 0
+        elif land is not None:
+            unknown = self.social_restricted
+        else:
+            unknown = self.category_restricted
+        limit('category', self.category_restricted, matching, unknown)
+
+        limit('land', self.land.restricted, self.land.lookup(land) if land is not None else 0,
+              0 if land is not None else self.land.restricted)
+        age = profile.get('age')
+        limit('age', self.age.restricted, self.age.lookup(age) if age is not None else 0,
+              0 if age is not None else self.age.restricted)
+        limit('land_required', self.land_required, self.land_required if land else 0,
+              0 if land is not None else self.land_required)
+
+        district = profile.get('district')
+        if district:
+            eligible &= ~self.excluded_districts.get(district.casefold(), 0)
+        return eligible, satisfied, unverified
+
+    def match(self, profile: Dict, limit: int = 10, level: Optional[str] = None,
+              strict: bool = False) -> List[Tuple[int, List[str], List[str], Tuple[str, Dict]]]:
+        """Eligible schemes as (score, matched criteria, unverified criteria, (level, entry))
+
+        The score counts the criteria the profile was checked against and
+        meets, so targeted schemes come before ones open to everybody.
+        """
+        eligible, satisfied, unverified = self.evaluate(profile, level, strict)
+
+        # Bit-sliced counter: bit k of scheme n's score is bit n of counter[k]
+        counter = [0, 0, 0]
+        for bits in satisfied.values():
+            carry = bits & eligible
+            for position in range(len(counter)):
+                counter[position], carry = counter[position] ^ carry, counter[position] & carry
+
+        results = []
+        for score in range(len(satisfied), -1, -1):
+            with_score = eligible
+            for position, bits in enumerate(counter):
+                with_score &= bits if score >> position & 1 else ~bits
+            for number in set_bits(with_score):
+                bit = 1 << number
+                matched = [name for name in CRITERIA if satisfied.get(name, 0) & bit]
+                unknown = [name for name in CRITERIA if unverified.get(name, 0) & bit]
+                results.append((score, matched, unknown, self.entries[number]))
+                if len(results) >= limit:
+                    return results
+        return results
@@ -1,17 +1,43 @@
 from fastapi import FastAPI, HTTPException, Query
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
 from fastapi.requests import Request
 from .service import SchemeService
-from .models import SchemeResponse
+from .models import SchemeResponse, SearchResult, NameMatch, FarmerProfile, MatchResult
+from .responses import encoded_response, page_response, ndjson_response
+from .site import StaticSite, StaticSiteMiddleware, page_context
+from .reloader import DataReloader
+from .metrics import Metrics, MetricsMiddleware, ServiceCall, current_request, CONTENT_TYPE
+from config import SCHEME_RELOAD_INTERVAL, TRANSLATION_LANGUAGES
+from contextlib import asynccontextmanager
 from typing import List, Optional
 from pathlib import Path
+from starlette.convertors import StringConvertor, register_url_convertor
+
+def create_service(**options) -> SchemeService:
+    """Scheme service the app serves, created at startup or by the server before forking workers"""
+    return SchemeService(**options)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global scheme_service
+    # Loaded here rather than at import, unless the server preloaded it before forking
+    if scheme_service is None:
+        scheme_service = create_service()
+    # Pick up regenerated scheme files without restarting the workers
+    reloader = DataReloader(scheme_service, SCHEME_RELOAD_INTERVAL)
+    if SCHEME_RELOAD_INTERVAL > 0:
+        reloader.start()
+    yield
+    reloader.stop()
 
 app = FastAPI(
     title="Agricultural Schemes API",
-    description="API for accessing agricultural schemes in multiple languages"
+    description="API for accessing agricultural schemes in multiple languages",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -21,27 +47,126 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Link", "ETag"],
 )
 
+# Pages and fingerprinted assets built by build_site.py, served ahead of the routes once built
+# (and counted by the metrics)
+site = StaticSite()
+app.add_middleware(StaticSiteMiddleware, site=site)
+
+# Request counters and timings of this worker process, served at /metrics
+metrics = Metrics()
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="src/frontend/static"), name="static")
 
-# Templates
-templates = Jinja2Templates(directory="src/frontend/templates")
+# Templates, loaded with jinja2 on the first page view since the API does not need them
+templates = None
 
-scheme_service = SchemeService()
+scheme_service: Optional[SchemeService] = None
+
+def language_page(request: Request, lang: str):
+    """A language's page rendered from the template without schemes, while the site is not built"""
+    global templates
+    if lang not in scheme_service.store.languages:
+        raise HTTPException(status_code=404, detail="Page not found")
+    if templates is None:
+        from fastapi.templating import Jinja2Templates
+        templates = Jinja2Templates(directory="src/frontend/templates")
+    return templates.TemplateResponse("index.html", {"request": request, **page_context(lang)})
 
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+    return language_page(request, "en")
+
+@app.exception_handler(RequestValidationError)
+async def validation_exception_handler(request: Request, exc: RequestValidationError):
+    record = current_request.get()
+    if record is not None and exc.errors():
+        # Query and path errors name the parameter, body errors the request body
+        loc = exc.errors()[0]["loc"]
+        record.parameter = loc[1] if loc[0] in ("query", "path") and len(loc) > 1 else loc[0]
+    return await request_validation_exception_handler(request, exc)
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
+
+@app.get("/status")
+async def get_status():
+    store = scheme_service.store
+    return {
+        "generation": store.generation,
+        "languages": {lang: len(store.get_view(lang)) for lang in store.languages}
+    }
 
 @app.get("/schemes/", response_model=List[SchemeResponse])
 async def get_schemes(
+    request: Request,
+    lang: str = Query("en", description="Language code (en/hi/mr)"),
+    level: Optional[str] = Query(None, description="Scheme level (central/state)"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Schemes per page, all of them when omitted"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    fields: Optional[str] = Query(None, description="Detail fields to include, e.g. scheme_name,category"),
+    output_format: str = Query("json", alias="format", pattern="^(json|ndjson)$",
+                               description="json array, or ndjson streamed one scheme per line")
+):
+    try:
+        if output_format == "ndjson":
+            with ServiceCall(lang, level):
+                lines, next_cursor = scheme_service.get_scheme_slice(lang, level, limit, cursor, fields)
+            return ndjson_response(request, lines, next_cursor)
+        if limit is None and cursor is None and fields is None:
+            # Bodies are validated and encoded at load time, so skip response_model here
+            with ServiceCall(lang, level):
+                view = scheme_service.get_encoded_schemes(lang, level)
+            return encoded_response(request, view)
+        with ServiceCall(lang, level):
+            lines, next_cursor = scheme_service.get_scheme_slice(lang, level, limit, cursor, fields)
+            lines = list(lines)
+        return page_response(request, lines, next_cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/search", response_model=List[SearchResult])
+async def search_schemes(
+    q: str = Query(..., min_length=1, description="Search text, in the language of lang"),
     lang: str = Query("en", description="Language code (en/hi/mr)"),
-    level: Optional[str] = Query(None, description="Scheme level (central/state)")
+    level: Optional[str] = Query(None, description="Scheme level (central/state)"),
+    limit: int = Query(10, ge=1, le=100, description="Number of results"),
+    prefix: bool = Query(True, description="Also match words starting with the last term")
 ):
     try:
-        return scheme_service.get_all_schemes(lang, level)
+        with ServiceCall(lang, level):
+            return scheme_service.search_schemes(q, lang, level, limit, prefix)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/search/names", response_model=List[NameMatch])
+async def match_scheme_names(
+    q: str = Query(..., min_length=1, description="Scheme name or part of it, in Latin or Devanagari script"),
+    lang: str = Query("en", description="Language code (en/hi/mr) of the returned details"),
+    limit: int = Query(10, ge=1, le=100, description="Number of results")
+):
+    try:
+        with ServiceCall(lang):
+            return scheme_service.match_scheme_names(q, lang, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/match", response_model=List[MatchResult])
+async def match_schemes(
+    profile: FarmerProfile,
+    lang: str = Query("en", description="Language code (en/hi/mr) of the returned details"),
+    level: Optional[str] = Query(None, description="Scheme level (central/state)"),
+    limit: int = Query(10, ge=1, le=100, description="Number of results"),
+    strict: bool = Query(False, description="Leave out schemes with limits the profile does not answer")
+):
+    try:
+        with ServiceCall(lang, level):
+            return scheme_service.match_schemes(profile.model_dump(), lang, level, limit, strict)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -51,9 +176,20 @@ async def get_scheme(
     lang: str = Query("en", description="Language code (en/hi/mr)")
 ):
     try:
-        scheme = scheme_service.get_scheme_by_id(scheme_id, lang)
+        with ServiceCall(lang):
+            scheme = scheme_service.get_scheme_by_id(scheme_id, lang)
         if not scheme:
             raise HTTPException(status_code=404, detail="Scheme not found")
         return scheme
     except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e)) 
+
+class LanguageConvertor(StringConvertor):
+    """Matches only the codes of the languages served, so /search/ and the like still redirect to /search"""
+    regex = '|'.join(['en', *TRANSLATION_LANGUAGES])
+
+register_url_convertor('language', LanguageConvertor())
+
+@app.get("/{lang:language}/", response_class=HTMLResponse, include_in_schema=False)
+async def language_home(request: Request, lang: str):
+    return language_page(request, lang)
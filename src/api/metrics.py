@@ -0,0 +1,236 @@
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Dict, Iterator, Optional, Tuple
+
+# Upper bounds in seconds; cached bodies are served in well under a millisecond
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+                   5.0, 10.0)
+# Upper bounds in bytes, from one scheme to a whole catalogue
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+# Where the time of a request goes: the service call, everything else until the response
+# starts (parameter and response model validation, JSON encoding), and sending the body
+PHASES = ('service', 'serialize', 'send')
+# Prometheus text format; Starlette appends the charset to text/ media types
+CONTENT_TYPE = 'text/plain; version=0.0.4'
+
+
+def observe(series: list, bounds: Tuple[float, ...], value: float):
+    """Add a value to a histogram series, [count per bucket, sum]"""
+    series[0][bisect_left(bounds, value)] += 1
+    series[1] += value
+
+
+def format_labels(names: Tuple[str, ...], values: Tuple) -> str:
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(names, values)) + '}'
+
+
+class Counter:
+    """Prometheus counter, one value per combination of label values"""
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.values: Dict[Tuple, int] = defaultdict(int)
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for values, count in sorted(self.values.items()):
+            yield f"{self.name}{format_labels(self.labels, values)} {count}"
+
+
+class Histogram:
+    """Prometheus histogram with fixed buckets, one per combination of label values"""
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...], bounds: Tuple[float, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.bounds = bounds
+        self.series: Dict[Tuple, list] = {}
+
+    def get_series(self, values: Tuple) -> list:
+        """Series of some label values, [count per bucket (the last one above every bound), sum]"""
+        series = self.series.get(values)
+        if series is None:
+            series = self.series[values] = [[0] * (len(self.bounds) + 1), 0]
+        return series
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for values, (counts, total) in sorted(self.series.items()):
+            labels = ','.join(f'{name}="{value}"' for name, value in zip(self.labels, values))
+            cumulative = 0
+            for bound, count in zip((*self.bounds, '+Inf'), counts):
+                cumulative += count
+                yield f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+            yield f"{self.name}_sum{{{labels}}} {total}"
+            yield f"{self.name}_count{{{labels}}} {cumulative}"
+
+
+class RequestRecord:
+    """What the endpoint of one request reports to the middleware"""
+    __slots__ = ('service', 'lang', 'level', 'parameter')
+
+    def __init__(self):
+        self.service = 0.0
+        self.lang: Optional[str] = None
+        self.level: Optional[str] = None
+        # Parameter the request was rejected for
+        self.parameter: Optional[str] = None
+
+
+# Record of the request being handled, set by the middleware
+current_request: ContextVar[Optional[RequestRecord]] = ContextVar('current_request', default=None)
+
+
+class ServiceCall:
+    """Context manager timing a service call of the current request
+
+    On success the request counts as a hit for lang and level (all levels
+    when None); a ParameterError (or anything else with a parameter
+    attribute) counts as a request rejected for that parameter.
+    """
+    __slots__ = ('lang', 'level', 'start')
+
+    def __init__(self, lang: str, level: Optional[str] = None):
+        self.lang = lang
+        self.level = level
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record = current_request.get()
+        if record is None:
+            return False
+        record.service += perf_counter() - self.start
+        if exc_type is None:
+            # Validated by the service by now, so these cannot grow the label sets
+            record.lang = self.lang
+            record.level = self.level.lower() if self.level else 'all'
+        else:
+            record.parameter = getattr(exc, 'parameter', None)
+        return False
+
+
+class Metrics:
+    """Counters and histograms of the API requests served by this process"""
+
+    def __init__(self):
+        self.requests = Counter('krishi_api_requests_total', 'Requests answered, by route, method and status',
+                                ('route', 'method', 'status'))
+        self.duration = Histogram('krishi_api_request_duration_seconds',
+                                  'Time from receiving a request to sending the end of its response',
+                                  ('route',), LATENCY_BUCKETS)
+        self.response_size = Histogram('krishi_api_response_size_bytes', 'Response body bytes as sent',
+                                       ('route',), SIZE_BUCKETS)
+        self.scheme_requests = Counter('krishi_api_scheme_requests_total',
+                                       'Requests served, by route, language and scheme level',
+                                       ('route', 'lang', 'level'))
+        self.rejected = Counter('krishi_api_rejected_requests_total',
+                                'Requests rejected for an invalid parameter, by route and parameter',
+                                ('route', 'parameter'))
+        self.in_progress = 0
+        # Route -> seconds spent in each of PHASES; totals rather than histograms, which would
+        # cost each request three more observations
+        self.phase_seconds: Dict[str, list] = {}
+        # Route -> its duration series, size series and phase totals, looked up once per request
+        self.routes: Dict[str, tuple] = {}
+
+    def route_series(self, route: str) -> tuple:
+        self.phase_seconds[route] = [0.0] * len(PHASES)
+        series = self.routes[route] = (
+            self.duration.get_series((route,)),
+            self.response_size.get_series((route,)),
+            self.phase_seconds[route]
+        )
+        return series
+
+    def record(self, route: str, method: str, status: int, start: float, response_start: Optional[float],
+               end: float, size: int, request: RequestRecord):
+        duration, response_size, phases = self.routes.get(route) or self.route_series(route)
+        self.requests.values[(route, method, status)] += 1
+        observe(duration, LATENCY_BUCKETS, end - start)
+        observe(response_size, SIZE_BUCKETS, size)
+        if response_start is not None:
+            phases[0] += request.service
+            phases[1] += response_start - start - request.service
+            phases[2] += end - response_start
+        if request.lang is not None:
+            self.scheme_requests.values[(route, request.lang, request.level)] += 1
+        if request.parameter is not None:
+            self.rejected.values[(route, request.parameter)] += 1
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = [
+            '# HELP krishi_api_requests_in_progress Requests being handled',
+            '# TYPE krishi_api_requests_in_progress gauge',
+            f'krishi_api_requests_in_progress {self.in_progress}'
+        ]
+        for metric in (self.requests, self.duration, self.response_size, self.scheme_requests, self.rejected):
+            lines.extend(metric.render())
+        lines.append('# HELP krishi_api_request_phase_seconds_total Request time in the scheme service, until the '
+                     'response starts (validation and serialization) and sending the body')
+        lines.append('# TYPE krishi_api_request_phase_seconds_total counter')
+        for route, seconds in sorted(self.phase_seconds.items()):
+            for phase, total in zip(PHASES, seconds):
+                lines.append(f'krishi_api_request_phase_seconds_total{{route="{route}",phase="{phase}"}} {total}')
+        return '\n'.join(lines) + '\n'
+
+
+def route_label(scope: Dict) -> str:
+    """Path template of the route that handled a request, so IDs in paths don't become labels"""
+    route = scope.get('route')
+    if route is not None:
+        return route.path
+    # Mounted apps (static files) leave their mount path as root_path
+    if scope.get('endpoint') is not None:
+        return scope.get('root_path') or '/'
+    return 'unmatched'
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording every HTTP request in a Metrics"""
+
+    def __init__(self, app, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        request = RequestRecord()
+        token = current_request.set(request)
+        start = perf_counter()
+        status = 500
+        response_start = None
+        size = 0
+
+        async def send_timed(message):
+            nonlocal status, response_start, size
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                response_start = perf_counter()
+            else:
+                size += len(message.get('body', b''))
+            await send(message)
+
+        metrics.in_progress += 1
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            metrics.in_progress -= 1
+            current_request.reset(token)
+            metrics.record(route_label(scope), scope['method'], status, start, response_start, perf_counter(), size,
+                           request)
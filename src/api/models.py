@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, Dict, List
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, List, Literal
 
 class SchemeBase(BaseModel):
     scheme_name: str
@@ -10,8 +10,31 @@ class SchemeBase(BaseModel):
     application_process: Optional[str] = None
     deadline: Optional[str] = None
     source_link: Optional[str] = None
+    # Every PDF the scheme was found in, source_link first
+    source_links: Optional[List[str]] = None
     category: Optional[str] = None
 
 class SchemeResponse(BaseModel):
     scheme_id: str
-    details: SchemeBase 
\ No newline at end of file
+    # Level the scheme is listed under (central/state), untranslated unlike details.scheme_level
+    level: Optional[str] = None
+    details: SchemeBase 
+
+class SearchResult(SchemeResponse):
+    score: float
+
+class NameMatch(SearchResult):
+    matched_lang: str
+
+class FarmerProfile(BaseModel):
+    state: Optional[str] = None
+    district: Optional[str] = None
+    age: Optional[int] = Field(None, ge=0, le=120)
+    land_hectares: Optional[float] = Field(None, ge=0)
+    # Marginal and small also follow from land_hectares
+    categories: List[Literal['marginal', 'small', 'sc', 'st', 'women']] = []
+
+class MatchResult(SchemeResponse):
+    score: int
+    matched: List[str]
+    unverified: List[str]
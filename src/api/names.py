@@ -0,0 +1,243 @@
+import heapq
+import math
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .search import TOKEN_PATTERN, normalize_text
+
+# Share of a query's trigrams a name must contain to be considered at all
+MIN_SHARED_GRAMS = 0.5
+# Names per language re-ranked by edit distance, those sharing most trigrams
+MAX_CANDIDATES = 64
+# Matches scoring below this (1 - edits / query length) are dropped
+MIN_SIMILARITY = 0.6
+
+# Devanagari letters spelled in Latin, without the inherent vowel, which
+# name keys drop along with every other short a
+CONSONANTS = ('k kh g gh n ch chh j jh n t th d dh n t th d dh n n '
+              'p ph b bh m y r r l l l v sh sh s h').split()
+VOWELS = 'a aa i ii u uu ri li e e e ai o o o au'.split()
+VOWEL_SIGNS = 'aa i ii u uu ri rii e e e ai o o o au'.split()
+TRANSLITERATION = {
+    **dict(zip(range(0x0915, 0x093A), CONSONANTS)),
+    **dict(zip(range(0x0905, 0x0915), VOWELS)),
+    **dict(zip(range(0x093E, 0x094D), VOWEL_SIGNS)),
+    0x0902: 'n',  # anusvara, chandrabindu is folded into it
+    0x0903: 'h',
+    0x094D: ''  # virama
+}
+# Applied in order to each word: aspirates, sibilants and vowel lengths merged,
+# short a dropped, doubled letters collapsed
+LATIN_FOLDS = [(re.compile(pattern), replacement) for pattern, replacement in [
+    (r'x', 'ks'),
+    (r'chh?', '\0'),
+    (r'sh', 's'),
+    (r'([kgjtdpb])h', r'\1'),
+    (r'c', 'k'),
+    (r'\0', 'c'),
+    (r'f', 'p'),
+    (r'w', 'v'),
+    (r'z', 'j'),
+    (r'q', 'k'),
+    (r'([aiu])\1+', r'\1'),
+    (r'ee', 'i'),
+    (r'oo', 'u'),
+    (r'ai', 'e'),
+    (r'au', 'o'),
+    (r'a', ''),
+    (r'm(?=[pb])', 'n'),
+    (r'(.)\1+', r'\1')
+]]
+# Abbreviations spelled out letter by letter in Devanagari, as folded words
+SPELLED_ABBREVIATIONS = {'piem': 'pm', 'siem': 'cm'}
+
+
+def fold_word(word: str) -> str:
+    """Latin skeleton of one normalized word in Latin or Devanagari script"""
+    word = word.translate(TRANSLITERATION)
+    for pattern, replacement in LATIN_FOLDS:
+        word = pattern.sub(replacement, word)
+    return SPELLED_ABBREVIATIONS.get(word, word)
+
+
+def name_words(text: str) -> List[str]:
+    """Skeletons of the words of a name, so spellings in either script compare equal"""
+    return [folded for folded in map(fold_word, TOKEN_PATTERN.findall(normalize_text(text))) if folded]
+
+
+def compact(words: List[str]) -> str:
+    """Words run together, so "PM Kisan" and "pmkisan" give the same key"""
+    return LATIN_FOLDS[-1][0].sub(LATIN_FOLDS[-1][1], ''.join(words))
+
+
+# Abbreviations of common name prefixes, indexed alongside the spelled out words
+ABBREVIATIONS = {
+    abbreviation: compact(name_words(expansion))
+    for abbreviation, expansion in {'pm': 'pradhan mantri', 'cm': 'mukhya mantri'}.items()
+}
+
+
+def name_keys(name: str) -> List[str]:
+    """Keys a name is indexed under: its words run together, and again with abbreviations"""
+    key = compact(name_words(name))
+    keys = [key] + [key.replace(expansion, abbreviation) for abbreviation, expansion in ABBREVIATIONS.items()]
+    return [key for key in dict.fromkeys(keys) if key]
+
+
+def trigrams(key: str) -> List[str]:
+    """Distinct trigrams of a key, a shorter key is its own gram"""
+    if len(key) < 3:
+        return [key]
+    return list(dict.fromkeys(key[idx:idx + 3] for idx in range(len(key) - 2)))
+
+
+def substring_distance(pattern: str, text: str) -> int:
+    """Fewest edits turning pattern into some substring of text
+
+    Myers' bit-parallel algorithm: one pass over text with the pattern's
+    column of the edit distance matrix packed into integers.
+    """
+    size = len(pattern)
+    if not size:
+        return 0
+    masks = {}
+    for idx, char in enumerate(pattern):
+        masks[char] = masks.get(char, 0) | 1 << idx
+    full = (1 << size) - 1
+    last = 1 << (size - 1)
+    plus, minus = full, 0
+    score = best = size
+    for char in text:
+        eq = masks.get(char, 0)
+        xv = eq | minus
+        xh = (((eq & plus) + plus) ^ plus) | eq
+        horizontal_plus = minus | ~(xh | plus) & full
+        horizontal_minus = plus & xh
+        if horizontal_plus & last:
+            score += 1
+        elif horizontal_minus & last:
+            score -= 1
+        # Shifting in zeros lets a match start anywhere in text
+        horizontal_plus = horizontal_plus << 1 & full
+        horizontal_minus = horizontal_minus << 1 & full
+        plus = horizontal_minus | ~(xv | horizontal_plus) & full
+        minus = horizontal_plus & xv
+        if score < best:
+            best = score
+    return best
+
+
+class NameIndex:
+    """Trigram index over the transliterated name keys of one language's schemes
+
+    A query reads the postings of only as many of its rarest trigrams as a
+    name must share with it, then re-ranks the names sharing most of them by
+    edit distance from the query to the closest part of the name.
+    """
+
+    def __init__(self):
+        # Indexed keys and the (level, response entry) each belongs to, by key number
+        self.keys: List[str] = []
+        self.entries: List[Tuple[str, Dict]] = []
+        self.key_lengths = np.zeros(0, dtype=np.int32)
+        # Trigram -> sorted key numbers
+        self.postings: Dict[str, np.ndarray] = {}
+        # Sorted trigrams, to find those starting with a query key shorter than one
+        self.grams: List[str] = []
+
+    @classmethod
+    def build(cls, entries: List[Tuple[str, Dict]]) -> 'NameIndex':
+        index = cls()
+        postings = defaultdict(list)
+        for level, entry in entries:
+            for key in name_keys(entry['details'].get('scheme_name') or ''):
+                number = len(index.keys)
+                index.keys.append(key)
+                index.entries.append((level, entry))
+                # The last two letters too, for short keys at the end of a name
+                for gram in dict.fromkeys(trigrams(key) + [key[-2:]]):
+                    postings[gram].append(number)
+        index.key_lengths = np.fromiter(map(len, index.keys), dtype=np.int32, count=len(index.keys))
+        index.postings = {gram: np.array(numbers, dtype=np.int32) for gram, numbers in postings.items()}
+        index.grams = sorted(index.postings)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def candidates(self, key: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Key numbers of the names sharing most trigrams with a query key, with the
+        highest similarity each could reach, best first"""
+        key_grams = trigrams(key)
+        if len(key) < 3:
+            # Names containing a short key contain one of the trigrams it begins
+            start = bisect_left(self.grams, key)
+            end = bisect_left(self.grams, key + '\uffff', start)
+            scanned = [self.postings[gram] for gram in self.grams[start:end]]
+        else:
+            query_grams = [self.postings[gram] for gram in key_grams if gram in self.postings]
+            needed = max(1, math.ceil(len(key_grams) * MIN_SHARED_GRAMS))
+            # A name sharing `needed` grams has at least one among the rarest len - needed + 1
+            scanned = sorted(query_grams, key=len)[:len(query_grams) - needed + 1]
+        if not scanned:
+            return np.zeros(0, dtype=np.int32), np.zeros(0)
+        numbers, counts = np.unique(np.concatenate(scanned), return_counts=True)
+        if len(numbers) > MAX_CANDIDATES:
+            # Fewer shared grams always loses, a longer name only among equal counts
+            ranking = counts * 1024 - np.minimum(self.key_lengths[numbers], 1023)
+            numbers = numbers[np.argpartition(-ranking, MAX_CANDIDATES)[:MAX_CANDIDATES]]
+
+        if len(key) < 3:
+            bounds = np.ones(len(numbers))
+        else:
+            shared = np.zeros(len(numbers), dtype=np.int32)
+            for postings in query_grams:
+                shared += postings[np.minimum(np.searchsorted(postings, numbers), len(postings) - 1)] == numbers
+            # Every edit removes at most three of the query's trigrams from the name
+            missing = len(key_grams) - shared
+            bounds = 1 - np.ceil(missing / 3) / len(key)
+        order = np.lexsort((self.key_lengths[numbers], -bounds))
+        return numbers[order], bounds[order]
+
+    def match(self, query: str, limit: int = 10) -> List[Tuple[float, str, Tuple[str, Dict]]]:
+        """Best (similarity, matched key, (level, entry)) matches, one per scheme"""
+        key = compact(name_words(query))
+        if len(key) < 2:
+            return []
+        best: Dict[str, Tuple[float, int, str, Tuple[str, Dict]]] = {}
+        # Similarity of the limit-th best scheme so far, no name reaching less can enter
+        floor = MIN_SIMILARITY
+        numbers, bounds = self.candidates(key)
+        for number, bound in zip(numbers.tolist(), bounds.tolist()):
+            if bound < floor:
+                break
+            similarity = 1 - substring_distance(key, self.keys[number]) / len(key)
+            if similarity < floor:
+                continue
+            entry = self.entries[number]
+            rank = (similarity, -len(self.keys[number]))
+            scheme_id = entry[1]['scheme_id']
+            if scheme_id not in best or rank > best[scheme_id][:2]:
+                best[scheme_id] = (*rank, self.keys[number], entry)
+                if len(best) >= limit:
+                    floor = heapq.nlargest(limit, (item[0] for item in best.values()))[-1]
+        ranked = sorted(best.values(), key=lambda item: item[:2], reverse=True)[:limit]
+        return [(similarity, key, entry) for similarity, _, key, entry in ranked]
+
+
+def merge_matches(matches: Dict[str, List[Tuple[float, str, Tuple[str, Dict]]]],
+                  limit: int) -> List[Tuple[float, str, Dict]]:
+    """Best (similarity, language, entry) per scheme across the per-language matches"""
+    best: Dict[str, Tuple[float, int, str, Dict]] = {}
+    for lang, results in matches.items():
+        for similarity, key, (_, entry) in results:
+            rank = (similarity, -len(key))
+            scheme_id = entry['scheme_id']
+            if scheme_id not in best or rank > best[scheme_id][:2]:
+                best[scheme_id] = (*rank, lang, entry)
+    ranked = sorted(best.values(), key=lambda item: item[:2], reverse=True)[:limit]
+    return [(similarity, lang, entry) for similarity, _, lang, entry in ranked]
@@ -0,0 +1,34 @@
+import threading
+
+
+class DataReloader:
+    """Background thread that polls the scheme files and hot-swaps changes"""
+
+    def __init__(self, service, interval: float = 5.0):
+        self.service = service
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start polling in a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="scheme-reloader", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop polling and wait for an in-progress reload to finish"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.service.reload_changed()
+            except Exception as e:
+                # A bad reload must never take the serving thread down
+                print(f"Warning: Scheme data reload failed: {str(e)}")
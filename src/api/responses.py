@@ -0,0 +1,203 @@
+import gzip
+import hashlib
+import json
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+from fastapi.requests import Request
+from fastapi.responses import Response, StreamingResponse
+
+from .models import SchemeBase, SchemeResponse
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# Compression runs once per data load; these levels keep large catalogues
+# loading in seconds while staying close to the best ratios
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 6
+# Page bodies smaller than this go out uncompressed
+MIN_COMPRESS_BYTES = 1024
+# Lines collected into each write of a streamed NDJSON response
+NDJSON_CHUNK_LINES = 256
+# Detail fields a projection may select
+SCHEME_FIELDS = tuple(SchemeBase.model_fields)
+
+
+def encode_scheme(entry: Dict) -> bytes:
+    """Encode one response entry the way FastAPI serializes a SchemeResponse"""
+    scheme = SchemeResponse.model_validate(entry)
+    return json.dumps(
+        scheme.model_dump(),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+def encode_projection(entry: Dict, fields: List[str]) -> bytes:
+    """Encode a response entry with only the given detail fields"""
+    details = entry["details"]
+    return json.dumps(
+        {"scheme_id": entry["scheme_id"], "level": entry.get("level"),
+         "details": {field: details.get(field) for field in fields}},
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+def weak_etag(body: bytes) -> str:
+    """Weak ETag of a body, its compressed variants are the same representation"""
+    return 'W/"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+class EncodedBody:
+    """A response body with its compressed variants and ETag, all computed once"""
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = weak_etag(self.body)
+        self.encodings = {'gzip': gzip.compress(self.body, compresslevel=GZIP_LEVEL, mtime=0)}
+        if brotli is not None:
+            self.encodings['br'] = brotli.compress(self.body, quality=BROTLI_QUALITY)
+
+    def select(self, accept_encoding: str):
+        """Pick the smallest body the client accepts, returning (body, encoding)"""
+        accepted = parse_accept_encoding(accept_encoding)
+        best_body, best_encoding = self.body, None
+        for encoding, body in self.encodings.items():
+            if encoding in accepted and len(body) < len(best_body):
+                best_body, best_encoding = body, encoding
+        return best_body, best_encoding
+
+
+class EncodedView(EncodedBody):
+    """A JSON array body encoded once, with its compressed variants and ETag"""
+
+    def __init__(self, fragments: List[bytes]):
+        self.fragments = fragments
+        super().__init__(b"[" + b",".join(fragments) + b"]")
+
+
+EMPTY_VIEW = EncodedView([])
+
+
+def parse_accept_encoding(header: str) -> set:
+    """Return the codings accepted by an Accept-Encoding header"""
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = params.strip()
+        if q.startswith('q='):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding)
+    if '*' in accepted:
+        accepted.update(('gzip', 'br'))
+    return accepted
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag using weak comparison"""
+    if not if_none_match:
+        return False
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return True
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def encoded_response(request: Request, view: EncodedView) -> Response:
+    """Serve a pre-encoded view, answering conditional requests with 304"""
+    headers = {
+        'ETag': view.etag,
+        'Cache-Control': 'no-cache',
+        'Vary': 'Accept-Encoding'
+    }
+    if etag_matches(request.headers.get('if-none-match'), view.etag):
+        return Response(status_code=304, headers=headers)
+
+    body, encoding = view.select(request.headers.get('accept-encoding', ''))
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return Response(content=body, media_type='application/json', headers=headers)
+
+
+def next_page_headers(request: Request, next_cursor: Optional[str]) -> Dict[str, str]:
+    """X-Next-Cursor and Link headers pointing at the next page, if there is one"""
+    if not next_cursor:
+        return {}
+    return {
+        'X-Next-Cursor': next_cursor,
+        'Link': f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+    }
+
+
+def page_response(request: Request, fragments: List[bytes], next_cursor: Optional[str]) -> Response:
+    """Serve one page of encoded entries as a JSON array, compressed for the client"""
+    body = b"[" + b",".join(fragments) + b"]"
+    headers = {
+        'ETag': weak_etag(body),
+        'Cache-Control': 'no-cache',
+        'Vary': 'Accept-Encoding',
+        **next_page_headers(request, next_cursor)
+    }
+    if etag_matches(request.headers.get('if-none-match'), headers['ETag']):
+        return Response(status_code=304, headers=headers)
+
+    # Pages are cut per request, so only the one encoding sent is compressed
+    accepted = parse_accept_encoding(request.headers.get('accept-encoding', ''))
+    if len(body) >= MIN_COMPRESS_BYTES:
+        if brotli is not None and 'br' in accepted:
+            body = brotli.compress(body, quality=BROTLI_QUALITY)
+            headers['Content-Encoding'] = 'br'
+        elif 'gzip' in accepted:
+            body = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+            headers['Content-Encoding'] = 'gzip'
+    return Response(content=body, media_type='application/json', headers=headers)
+
+
+def ndjson_response(request: Request, lines: Iterable[bytes], next_cursor: Optional[str]) -> StreamingResponse:
+    """Stream encoded entries one per line, gzipped as they go if the client accepts it
+
+    Lines are written in chunks as the iterable yields them, so the body is
+    never held in memory whole.
+    """
+    headers = {'Vary': 'Accept-Encoding', **next_page_headers(request, next_cursor)}
+    compressor = None
+    if 'gzip' in parse_accept_encoding(request.headers.get('accept-encoding', '')):
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        headers['Content-Encoding'] = 'gzip'
+
+    def chunks():
+        batch = []
+        for line in lines:
+            batch.append(line)
+            if len(batch) >= NDJSON_CHUNK_LINES:
+                data = b"\n".join(batch) + b"\n"
+                batch = []
+                data = compressor.compress(data) if compressor else data
+                if data:
+                    yield data
+        data = b"\n".join(batch) + b"\n" if batch else b""
+        if compressor:
+            data = compressor.compress(data) + compressor.flush()
+        if data:
+            yield data
+
+    return StreamingResponse(chunks(), media_type='application/x-ndjson', headers=headers)
@@ -0,0 +1,344 @@
+import math
+import re
+import sys
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+# A term in these fields counts as several occurrences, other text fields count once
+FIELD_WEIGHTS = {
+    'scheme_name': 3,
+    'category': 2
+}
+# The last query term matches words starting with it once it is this long
+PREFIX_MIN_LENGTH = 2
+# Completions of a prefix that are searched, the most common ones first
+PREFIX_EXPANSIONS = 8
+# Postings read per term in the first round of a search, doubled every round after
+SEARCH_CHUNK = 64
+
+# Letters and digits, plus Devanagari vowel signs and viramas, which are not \w
+TOKEN_PATTERN = re.compile(r'(?:[^\W_]|[\u0900-\u0963\u0966-\u097F])+')
+# Applied to decomposed text: drops zero width (non-)joiners, soft hyphens, the nukta and
+# Latin accents, spells chandrabindu as anusvara and Devanagari digits as ASCII
+FOLDS = {
+    **dict.fromkeys(map(ord, '\u200c\u200d\u00ad\u093c')),
+    **dict.fromkeys(range(0x0300, 0x0370)),
+    0x0901: 0x0902,
+    **{0x0966 + digit: ord('0') + digit for digit in range(10)}
+}
+
+
+def normalize_text(text: str) -> str:
+    """Fold case, accents, nukta and spelling variants so equivalent spellings match"""
+    text = unicodedata.normalize('NFD', text).translate(FOLDS)
+    return unicodedata.normalize('NFC', text).casefold()
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(normalize_text(text))
+
+
+def rank_of(ranked_docs: np.ndarray, ranked_weights: np.ndarray, doc: int, negated: np.float32) -> int:
+    """Position of a posting in weight order, among equal weights in document order"""
+    low = np.searchsorted(ranked_weights, negated, 'left')
+    high = np.searchsorted(ranked_weights, negated, 'right')
+    return low + np.searchsorted(ranked_docs[low:high], doc)
+
+
+class Postings:
+    """Documents containing a term with their BM25 term weights, without the IDF factor
+
+    Kept in document order for lookups and in weight order for top-k scans,
+    ties in document order; the IDF is the same for every document of a term,
+    so it can't change the order.
+    """
+
+    __slots__ = ('docs', 'weights', 'ranked_docs', 'ranked_weights')
+
+    def __init__(self, docs: np.ndarray, weights: np.ndarray):
+        """Postings from int32 documents in ascending order and their float32 weights"""
+        self.docs = docs
+        self.weights = weights
+        ranks = np.argsort(-weights, kind='stable')
+        self.ranked_docs = docs[ranks]
+        # Negated, so the highest weights come first in ascending order for searchsorted
+        self.ranked_weights = -weights[ranks]
+
+    @classmethod
+    def from_pairs(cls, pairs: List[Tuple[int, float]]) -> 'Postings':
+        pairs.sort()
+        return cls(np.array([doc for doc, _ in pairs], dtype=np.int32),
+                   np.array([weight for _, weight in pairs], dtype=np.float32))
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def replaced(self, gone: Set[int], added: List[Tuple[int, float]]) -> 'Postings':
+        """Copy without the gone documents and with the added ones, splicing instead of re-sorting"""
+        docs, weights = self.docs, self.weights
+        ranked_docs, ranked_weights = self.ranked_docs, self.ranked_weights
+
+        positions = [pos for pos in np.searchsorted(docs, sorted(gone)) if pos < len(docs) and docs[pos] in gone]
+        if positions:
+            ranks = [rank_of(ranked_docs, ranked_weights, docs[pos], -weights[pos]) for pos in positions]
+            docs, weights = np.delete(docs, positions), np.delete(weights, positions)
+            ranked_docs, ranked_weights = np.delete(ranked_docs, ranks), np.delete(ranked_weights, ranks)
+
+        if added:
+            # Positions in the arrays before insertion; np.insert keeps the given order for equal ones
+            added = sorted((doc, np.float32(weight)) for doc, weight in added)
+            new_docs = np.array([doc for doc, _ in added], dtype=np.int32)
+            new_weights = np.array([weight for _, weight in added], dtype=np.float32)
+            positions = np.searchsorted(docs, new_docs)
+            docs, weights = np.insert(docs, positions, new_docs), np.insert(weights, positions, new_weights)
+
+            added.sort(key=lambda item: (-item[1], item[0]))
+            ranks = [rank_of(ranked_docs, ranked_weights, doc, -weight) for doc, weight in added]
+            ranked_docs = np.insert(ranked_docs, ranks, [doc for doc, _ in added])
+            ranked_weights = np.insert(ranked_weights, ranks, [-weight for _, weight in added])
+
+        postings = Postings.__new__(Postings)
+        postings.docs, postings.weights = docs, weights
+        postings.ranked_docs, postings.ranked_weights = ranked_docs, ranked_weights
+        return postings
+
+    def lookup(self, docs: np.ndarray) -> np.ndarray:
+        """Weights of the given documents, 0 for documents without the term"""
+        positions = self.docs.searchsorted(docs)
+        found = self.docs.take(positions, mode='clip') == docs
+        return np.where(found, self.weights.take(positions, mode='clip'), 0)
+
+
+class SearchIndex:
+    """BM25 inverted index over the schemes of one language
+
+    Every query term has to match; the last one also matches words it is a
+    prefix of, for type-ahead. Top results are found with the threshold
+    algorithm, reading growing chunks of postings from the highest weight
+    down and stopping once no unseen scheme can beat the current top `limit`.
+    """
+
+    def __init__(self):
+        # Document ID -> (level, response entry), None once removed
+        self.docs: List[Optional[Tuple[str, Dict]]] = []
+        # Document ID -> indexed terms, to update postings when it changes
+        self.doc_terms: List[Optional[Tuple[str, ...]]] = []
+        self.doc_ids: Dict[Tuple[str, str], int] = {}
+        self.postings: Dict[str, Postings] = {}
+        # Sorted vocabulary for prefix lookups, with the number of documents of each term
+        self.terms: List[str] = []
+        self.term_counts = np.empty(0, dtype=np.int32)
+        # Average weighted document length, fixed at the last full build
+        self.avgdl = 1.0
+        # Level -> code, and the code of each document for filtering (-1 once removed)
+        self.level_codes: Dict[str, int] = {}
+        self.doc_levels = np.empty(0, dtype=np.int16)
+
+    @classmethod
+    def build(cls, entries: List[Tuple[str, Dict]]) -> 'SearchIndex':
+        """Index (level, response entry) pairs from scratch"""
+        index = cls()
+        # Term counts in the order of doc_terms, compact until the average length is known
+        counts = []
+        for level, entry in entries:
+            key = (level, entry['scheme_id'])
+            if key in index.doc_ids:
+                continue
+            index.doc_ids[key] = len(index.docs)
+            index.docs.append((level, entry))
+            tf = index.term_frequencies(entry['details'])
+            # Interned, so every document shares one copy of each term
+            index.doc_terms.append(tuple(map(sys.intern, tf)))
+            counts.append(array('I', tf.values()))
+
+        lengths = [sum(tf) for tf in counts]
+        index.avgdl = sum(lengths) / len(lengths) if lengths else 1.0
+        # Documents are visited in ID order, so every postings list comes out sorted
+        postings = defaultdict(lambda: (array('i'), array('f')))
+        for doc, (terms, tf, length) in enumerate(zip(index.doc_terms, counts, lengths)):
+            for term, weight in index.term_weights(dict(zip(terms, tf)), length).items():
+                docs, weights = postings[term]
+                docs.append(doc)
+                weights.append(weight)
+
+        index.postings = {
+            term: Postings(np.frombuffer(docs, dtype=np.int32), np.frombuffer(weights, dtype=np.float32))
+            for term, (docs, weights) in postings.items()
+        }
+        index.index_vocabulary()
+        index.index_levels()
+        return index
+
+    def updated(self, entries: List[Tuple[str, Dict]], changed: Set[Tuple[str, str]]) -> 'SearchIndex':
+        """Next index for the new entries, re-tokenizing only the changed (level, scheme_id) pairs
+
+        Schemes not in entries are dropped. This index is left untouched for
+        readers still using it; postings of terms no changed scheme has are shared.
+        """
+        index = SearchIndex()
+        index.avgdl = self.avgdl
+        index.docs = [None] * len(self.docs)
+        index.doc_terms = list(self.doc_terms)
+        added = defaultdict(list)
+        removed = defaultdict(set)
+
+        for level, entry in entries:
+            key = (level, entry['scheme_id'])
+            if key in index.doc_ids:
+                continue
+            doc = self.doc_ids.get(key)
+            if doc is not None and key not in changed:
+                index.doc_ids[key] = doc
+                index.docs[doc] = (level, entry)
+                continue
+
+            if doc is None:
+                doc = len(index.docs)
+                index.docs.append(None)
+                index.doc_terms.append(None)
+            else:
+                for term in self.doc_terms[doc]:
+                    removed[term].add(doc)
+            index.doc_ids[key] = doc
+            index.docs[doc] = (level, entry)
+            tf = self.term_frequencies(entry['details'])
+            index.doc_terms[doc] = tuple(map(sys.intern, tf))
+            for term, weight in self.term_weights(tf, sum(tf.values())).items():
+                added[term].append((doc, weight))
+
+        for key, doc in self.doc_ids.items():
+            if key not in index.doc_ids:
+                for term in self.doc_terms[doc]:
+                    removed[term].add(doc)
+                index.doc_terms[doc] = None
+
+        # Removed schemes leave holes; rebuild once they make up half the IDs
+        if len(index.doc_ids) * 2 < len(index.docs):
+            return SearchIndex.build(entries)
+
+        index.postings = dict(self.postings)
+        for term in set(added) | set(removed):
+            if term not in self.postings:
+                index.postings[term] = Postings.from_pairs(added[term])
+                continue
+            postings = self.postings[term].replaced(removed.get(term, set()), added.get(term, []))
+            if postings:
+                index.postings[term] = postings
+            else:
+                del index.postings[term]
+        index.index_vocabulary(self)
+        index.index_levels()
+        return index
+
+    def index_vocabulary(self, previous: Optional['SearchIndex'] = None):
+        if previous is not None and self.postings.keys() == previous.postings.keys():
+            self.terms = previous.terms
+        else:
+            self.terms = sorted(self.postings)
+        self.term_counts = np.array([len(self.postings[term]) for term in self.terms], dtype=np.int32)
+
+    def index_levels(self):
+        for doc in self.docs:
+            if doc is not None:
+                self.level_codes.setdefault(doc[0], len(self.level_codes))
+        self.doc_levels = np.array(
+            [self.level_codes[doc[0]] if doc is not None else -1 for doc in self.docs], dtype=np.int16
+        )
+
+    def term_frequencies(self, details: Dict) -> Counter:
+        """Field-weighted term counts of one scheme"""
+        tf = Counter()
+        for field, value in details.items():
+            if isinstance(value, str):
+                weight = FIELD_WEIGHTS.get(field, 1)
+                for term in tokenize(value):
+                    tf[term] += weight
+        return tf
+
+    def term_weights(self, tf: Dict[str, int], length: int) -> Dict[str, float]:
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * length / self.avgdl)
+        return {term: count * (BM25_K1 + 1) / (count + norm) for term, count in tf.items()}
+
+    def idf(self, term: str) -> float:
+        df = len(self.postings[term])
+        return math.log(1 + (len(self.doc_ids) - df + 0.5) / (df + 0.5))
+
+    def expand(self, prefix: str) -> List[str]:
+        """The most common indexed terms starting with prefix"""
+        start = bisect_left(self.terms, prefix)
+        # Terms starting with prefix sort before the prefix with its last character incremented
+        end = bisect_left(self.terms, prefix[:-1] + chr(ord(prefix[-1]) + 1), start)
+        if end - start <= PREFIX_EXPANSIONS:
+            return self.terms[start:end]
+        best = np.argpartition(-self.term_counts[start:end], PREFIX_EXPANSIONS)[:PREFIX_EXPANSIONS]
+        return [self.terms[start + pos] for pos in sorted(best)]
+
+    def search(self, query: str, limit: int = 10, level: Optional[str] = None,
+               prefix: bool = True) -> List[Tuple[float, Dict]]:
+        """Best (score, response entry) matches for query, highest score first"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or limit <= 0:
+            return []
+
+        # One group per query term, several terms where the last one is completed
+        groups = []
+        for position, term in enumerate(terms):
+            if prefix and position == len(terms) - 1 and len(term) >= PREFIX_MIN_LENGTH:
+                matches = self.expand(term)
+            else:
+                matches = [term] if term in self.postings else []
+            if not matches:
+                return []
+            groups.append([(self.idf(match), self.postings[match]) for match in matches])
+
+        level_code = self.level_codes.get(level, -2) if level else None
+        depths = [[0] * len(group) for group in groups]
+        chunk = SEARCH_CHUNK
+        top_docs = np.empty(0, dtype=np.int32)
+        top_scores = np.empty(0)
+
+        while True:
+            # Read the next chunk of every term in weight order; unread postings score at most bound
+            candidates = []
+            bound = 0.0
+            exhausted = False
+            for group, group_depths in zip(groups, depths):
+                group_bound = 0.0
+                for position, (idf, postings) in enumerate(group):
+                    depth = group_depths[position]
+                    candidates.append(postings.ranked_docs[depth:depth + chunk])
+                    group_depths[position] = depth = depth + chunk
+                    if depth < len(postings):
+                        group_bound = max(group_bound, -idf * float(postings.ranked_weights[depth]))
+                # Every scheme matching all terms has been read from this group's postings
+                exhausted = exhausted or group_bound == 0.0
+                bound += group_bound
+
+            docs = np.unique(np.concatenate(candidates))
+            if level_code is not None:
+                docs = docs[self.doc_levels[docs] == level_code]
+            scores = np.zeros(len(docs))
+            for group in groups:
+                best = np.zeros(len(docs))
+                for idf, postings in group:
+                    np.maximum(best, idf * postings.lookup(docs), out=best)
+                scores += best
+                docs, scores = docs[best > 0], scores[best > 0]
+
+            # Merge into the top `limit`, ties going to the scheme indexed first
+            docs, first = np.unique(np.concatenate([top_docs, docs]), return_index=True)
+            scores = np.concatenate([top_scores, scores])[first]
+            order = np.lexsort((docs, -scores))[:limit]
+            top_docs, top_scores = docs[order], scores[order]
+
+            if exhausted or (len(top_docs) == limit and top_scores[-1] >= bound):
+                return [(float(score), self.docs[doc][1]) for score, doc in zip(top_scores, top_docs)]
+            chunk *= 2
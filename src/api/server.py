@@ -0,0 +1,72 @@
+import gc
+import os
+import signal
+from typing import Dict
+
+import uvicorn
+
+from config import API_HOST, API_PORT, API_WORKERS, API_PRELOAD
+
+
+def serve(host: str = API_HOST, port: int = API_PORT, workers: int = API_WORKERS, preload: bool = API_PRELOAD):
+    """Run the API, in one process or in forked workers sharing one listening socket
+
+    With preload, the master loads the scheme data and builds its indexes
+    before forking, so workers start ready and share those pages
+    copy-on-write instead of each holding its own copy. Workers that die
+    are forked again from the master.
+    """
+    from . import main
+
+    if workers <= 1:
+        uvicorn.run(main.app, host=host, port=port)
+        return
+
+    config = uvicorn.Config(main.app, host=host, port=port)
+    sock = config.bind_socket()
+    if preload:
+        # No background threads before forking, the indexes are built right here
+        main.scheme_service = main.create_service(background_indexes=False)
+        main.scheme_service.build_indexes()
+        # Keep the collector from writing to the shared objects, which would copy their pages
+        gc.freeze()
+
+    children: Dict[int, int] = {}
+    stopping = False
+
+    def spawn(slot: int):
+        pid = os.fork()
+        if pid == 0:
+            # uvicorn installs its own handlers for a graceful shutdown
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            try:
+                uvicorn.Server(config).run(sockets=[sock])
+            finally:
+                os._exit(0)
+        children[pid] = slot
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for slot in range(workers):
+        spawn(slot)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        slot = children.pop(pid, None)
+        if slot is not None and not stopping:
+            print(f"Warning: API worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, restarting it")
+            spawn(slot)
+    sock.close()
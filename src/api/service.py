@@ -1,91 +1,357 @@
+import base64
+import binascii
+import hashlib
 import json
+import sqlite3
+import threading
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from .store import SchemeStore, SCHEME_LEVELS
+from .responses import EncodedView, SCHEME_FIELDS, encode_projection
+from .database import DatabaseStore, SchemeDatabase, file_signature, scheme_files
+from config import SCHEME_DATABASE_FILE, SCHEME_DATABASE_WARM_INDEXES, TRANSLATION_CHANGES_FILE
+
+class ParameterError(ValueError):
+    """A request parameter the service cannot serve, named by parameter"""
+
+    def __init__(self, parameter: str, message: str):
+        super().__init__(message)
+        self.parameter = parameter
+
+
+def encode_cursor(position: int, scheme_id: str) -> str:
+    """Opaque cursor for the page starting at position, after scheme_id"""
+    return base64.urlsafe_b64encode(f"{position}:{scheme_id}".encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    """Get (position, scheme_id) back from a cursor, raising ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        position, scheme_id = raw.split(':', 1)
+        return int(position), scheme_id
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ParameterError('cursor', "Invalid cursor")
+
 
 class SchemeService:
-    def __init__(self):
-        self.data_dir = Path('data/translated_schemes')
-        self.schemes_data = {}
+    def __init__(self, data_dir: Path = Path('data/translated_schemes'),
+                 english_file: Path = Path('data/processed_pdfs/processed_schemes.json'),
+                 database_file: Optional[Path] = None, background_indexes: bool = SCHEME_DATABASE_WARM_INDEXES,
+                 languages: Optional[Dict[str, str]] = None):
+        self.data_dir = Path(data_dir)
+        self.english_file = Path(english_file)
+        # Language code -> data file, English first, then those of languages (TRANSLATION_LANGUAGES by default)
+        self.language_files = scheme_files(self.english_file, self.data_dir, languages)
+        # Converted by the pipeline next to the data folders, served instead of the files while up to date
+        self.database_file = Path(database_file) if database_file else self.data_dir.parent / SCHEME_DATABASE_FILE
+        # (mtime, size) of the database file last opened or found stale
+        self.database_signature: Optional[Tuple[int, int]] = None
+        # Build a database store's indexes in a thread, rather than on first use
+        self.background_indexes = background_indexes
+        # Language code -> (mtime, size) of the file the loaded data came from
+        self.file_signatures: Dict[str, Tuple[int, int]] = {}
+        # Language code -> sha256 of the loaded file, matched against the change manifest
+        self.file_hashes: Dict[str, str] = {}
+        # Written by the translator next to the translations
+        self.changes_file = self.data_dir / TRANSLATION_CHANGES_FILE
+        self.reload_lock = threading.Lock()
+        self.store = SchemeStore({})
         self.load_all_data()
-        
+
+    @property
+    def schemes_data(self) -> Dict[str, Dict]:
+        return self.store.schemes_data
+
+    @property
+    def generation(self) -> int:
+        """Number of reloads swapped in since startup"""
+        return self.store.generation
+
     def load_all_data(self):
         """Load data for all languages"""
-        # Load English data
-        eng_file = Path('data/processed_pdfs/processed_schemes.json')
-        self.schemes_data['en'] = self.load_json_file(eng_file)
-        
-        # Load translations with proper language mapping
-        lang_mapping = {
-            'processed_schemes_hindi.json': 'hi',
-            'processed_schemes_marathi.json': 'mr'
-        }
-        
-        # Load translations
-        for filename, lang_code in lang_mapping.items():
-            file_path = self.data_dir / filename
-            if file_path.exists():
-                self.schemes_data[lang_code] = self.load_json_file(file_path)
-            else:
-                print(f"Warning: Translation file {filename} not found")
-    
-    def load_json_file(self, file_path: Path) -> Dict:
+        self.database_signature = self.file_signature(self.database_file)
+        database = self.open_database()
+        if database is not None:
+            # Schemes are read from the database on demand
+            self.store = DatabaseStore(database)
+            self.warm_indexes(self.store)
+            return
+
+        schemes_data = {}
+        for lang_code, file_path in self.language_files.items():
+            # English is always served, translations only when present
+            if lang_code != 'en' and not file_path.exists():
+                print(f"Warning: Translation file {file_path.name} not found")
+                continue
+            signature = self.file_signature(file_path)
+            schemes_data[lang_code] = self.load_json_file(file_path, lang_code)
+            if signature:
+                self.file_signatures[lang_code] = signature
+
+        # Build lookup tables once so requests never scan the raw data
+        self.store = SchemeStore(schemes_data)
+
+    def open_database(self) -> Optional[SchemeDatabase]:
+        """Open the scheme database if it was converted from the current scheme files"""
+        if self.database_signature is None:
+            return None
+        try:
+            database = SchemeDatabase(self.database_file)
+        except (sqlite3.Error, ValueError, KeyError) as e:
+            print(f"Warning: Can't open scheme database {self.database_file}: {e}")
+            return None
+        stale = database.stale_languages(self.language_files)
+        if stale:
+            print(f"Warning: {self.database_file.name} is out of date for {', '.join(stale)}, loading the JSON files")
+            return None
+        return database
+
+    def warm_indexes(self, store: DatabaseStore):
+        """Build a database store's indexes in a background thread, so the first searches find them ready"""
+        if self.background_indexes:
+            threading.Thread(target=store.build_indexes, name="scheme-indexes", daemon=True).start()
+
+    def build_indexes(self):
+        """Build every index of the current store now, e.g. before forking workers that should share them"""
+        if isinstance(self.store, DatabaseStore):
+            self.store.build_indexes()
+
+    def load_json_file(self, file_path: Path, lang_code: Optional[str] = None) -> Dict:
         """Load JSON file"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            data, digest = self.read_json_file(file_path)
+            if lang_code:
+                self.file_hashes[lang_code] = digest
+            return data
         except FileNotFoundError:
             print(f"Warning: File not found: {file_path}")
             return {}
         except json.JSONDecodeError:
             print(f"Warning: Invalid JSON in file: {file_path}")
             return {}
-    
+
+    def read_json_file(self, file_path: Path) -> Tuple[Dict, str]:
+        """Parse a JSON file, returning the data and the sha256 of its bytes"""
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        return json.loads(raw), hashlib.sha256(raw).hexdigest()
+
+    def changed_schemes(self, hashes: Dict[str, str]) -> Dict[str, Set[Tuple[str, str]]]:
+        """Schemes changed per reloaded language, for languages the change manifest covers
+
+        A language only qualifies if the manifest was written for exactly the
+        file loaded before and the file read now; otherwise it is reindexed whole.
+        """
+        try:
+            with open(self.changes_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+        affected = {
+            (item['level'], item['scheme_id'])
+            for item in manifest.get('added', []) + manifest.get('changed', [])
+        }
+        changed = {}
+        for lang_code, digest in hashes.items():
+            entry = manifest.get('files', {}).get(lang_code)
+            if (entry and entry.get('sha256') == digest
+                    and entry.get('previous_sha256') == self.file_hashes.get(lang_code)):
+                changed[lang_code] = affected
+        return changed
+
+    def file_signature(self, file_path: Path) -> Optional[Tuple[int, int]]:
+        """Get the (mtime, size) pair used to detect changed files"""
+        return file_signature(file_path)
+
+    def reload_database(self) -> bool:
+        """Swap in a scheme database written since the last check"""
+        signature = self.file_signature(self.database_file)
+        if signature is None or signature == self.database_signature:
+            return False
+        # Checked once per version of the file, whether or not it is served
+        self.database_signature = signature
+        database = self.open_database()
+        if database is None:
+            return False
+        self.store = DatabaseStore(database, generation=self.store.generation + 1)
+        self.warm_indexes(self.store)
+        print(f"Reloaded scheme database {self.database_file.name} (generation {self.store.generation})")
+        return True
+
+    def reload_changed(self) -> bool:
+        """Reparse changed language files and atomically swap in a new store"""
+        with self.reload_lock:
+            if self.reload_database():
+                return True
+            # While the database is served, the pipeline rewrites it after the files
+            if isinstance(self.store, DatabaseStore):
+                return False
+
+            updates = {}
+            signatures = {}
+            hashes = {}
+            for lang_code, file_path in self.language_files.items():
+                signature = self.file_signature(file_path)
+                if signature is None or signature == self.file_signatures.get(lang_code):
+                    continue
+                try:
+                    updates[lang_code], hashes[lang_code] = self.read_json_file(file_path)
+                    signatures[lang_code] = signature
+                except (OSError, json.JSONDecodeError) as e:
+                    # Possibly mid-write, keep serving the old data and retry next poll
+                    print(f"Warning: Skipping reload of {file_path}: {e}")
+
+            if not updates:
+                return False
+
+            # Only schemes named in the change manifest are encoded again
+            changed = self.changed_schemes(hashes)
+
+            # Indexes are built off the request path, then published in one assignment
+            self.store = self.store.with_languages(updates, changed)
+            self.file_signatures.update(signatures)
+            self.file_hashes.update(hashes)
+            partial = f", {len(changed)} from the change manifest" if changed else ""
+            print(f"Reloaded {', '.join(updates)} scheme data (generation {self.store.generation}{partial})")
+            return True
+
+    def validate_language(self, store: SchemeStore, lang: str):
+        """Raise ValueError for languages the store does not have"""
+        if lang not in store.languages:
+            raise ParameterError('lang', f"Language '{lang}' not supported. Available languages: {store.languages}")
+
+    def normalize_level(self, level: Optional[str]) -> Optional[str]:
+        """Normalize the level filter, None meaning every level"""
+        if not level:
+            return None
+        level = level.lower()
+        if level not in SCHEME_LEVELS:
+            raise ParameterError('level', "Level must be either 'central' or 'state'")
+        return level
+
     def get_all_schemes(self, lang: str = 'en', level: Optional[str] = None) -> List[Dict]:
         """Get all schemes with optional filtering by level"""
-        # Validate language
-        if lang not in self.schemes_data:
-            raise ValueError(f"Language '{lang}' not supported. Available languages: {list(self.schemes_data.keys())}")
-            
-        result = []
-        data = self.schemes_data[lang]
-        
-        # Handle empty data
-        if not data:
-            return []
-            
-        # Normalize level input
-        if level:
-            level = level.lower()
-            if level not in ['central', 'state']:
-                raise ValueError("Level must be either 'central' or 'state'")
-        
-        # Process schemes
-        for scheme_level, schemes in data.items():
-            if level and scheme_level != level:
-                continue
-            for scheme_id, scheme_details in schemes.items():
-                result.append({
-                    "scheme_id": scheme_id,
-                    "details": scheme_details
-                })
-                
-        return result
-    
+        # Read the store once so a concurrent reload can't mix generations
+        store = self.store
+        self.validate_language(store, lang)
+
+        # Shared prebuilt list, callers must not mutate it
+        return store.get_view(lang, self.normalize_level(level))
+
+    def get_encoded_schemes(self, lang: str = 'en', level: Optional[str] = None) -> EncodedView:
+        """Get the pre-encoded JSON body for get_all_schemes"""
+        store = self.store
+        self.validate_language(store, lang)
+
+        return store.get_encoded(lang, self.normalize_level(level))
+
+    def parse_fields(self, fields: Optional[str]) -> Optional[List[str]]:
+        """Parse a comma separated fields projection, None meaning every field"""
+        if not fields:
+            return None
+        names = list(dict.fromkeys(name.strip() for name in fields.split(',') if name.strip()))
+        unknown = [name for name in names if name not in SCHEME_FIELDS]
+        if unknown:
+            raise ParameterError('fields',
+                                 f"Unknown fields: {', '.join(unknown)}. Available fields: {', '.join(SCHEME_FIELDS)}")
+        return names
+
+    def cursor_position(self, entries: List[Dict], cursor: Optional[str]) -> int:
+        """Index of the first entry after a cursor
+
+        Cursors name the last scheme they follow, so paging goes on in the
+        right place after a reload moved it; if it was removed, paging goes
+        on from the same position.
+        """
+        if not cursor:
+            return 0
+        position, scheme_id = decode_cursor(cursor)
+        if 0 < position <= len(entries) and entries[position - 1]["scheme_id"] == scheme_id:
+            return position
+        for idx, entry in enumerate(entries):
+            if entry["scheme_id"] == scheme_id:
+                return idx + 1
+        return min(max(position, 0), len(entries))
+
+    def get_scheme_slice(self, lang: str = 'en', level: Optional[str] = None, limit: Optional[int] = None,
+                         cursor: Optional[str] = None,
+                         fields: Optional[str] = None) -> Tuple[Iterator[bytes], Optional[str]]:
+        """Encoded entries from a cursor on, up to limit, and the cursor of the next page
+
+        Entries come pre-encoded from the store, or are encoded one at a time
+        as the iterator is consumed when only some fields are wanted.
+        """
+        store = self.store
+        self.validate_language(store, lang)
+        level = self.normalize_level(level)
+        projection = self.parse_fields(fields)
+
+        entries = store.get_valid(lang, level)
+        start = self.cursor_position(entries, cursor)
+        end = len(entries) if limit is None else min(len(entries), start + limit)
+        next_cursor = encode_cursor(end, entries[end - 1]["scheme_id"]) if end < len(entries) else None
+
+        if projection is None:
+            return store.get_fragments(lang, level, start, end), next_cursor
+        return (encode_projection(entries[idx], projection) for idx in range(start, end)), next_cursor
+
+    def search_schemes(self, query: str, lang: str = 'en', level: Optional[str] = None,
+                       limit: int = 10, prefix: bool = True) -> List[Dict]:
+        """Full-text search over every field, best matches first"""
+        store = self.store
+        self.validate_language(store, lang)
+
+        results = store.search_schemes(lang, query, limit, self.normalize_level(level), prefix)
+        return [
+            {"scheme_id": entry["scheme_id"], "level": entry.get("level"), "score": round(score, 4),
+             "details": entry["details"]}
+            for score, entry in results
+        ]
+
+    def match_scheme_names(self, query: str, lang: str = 'en', limit: int = 10) -> List[Dict]:
+        """Schemes whose name in any language resembles the query, in Latin or Devanagari spelling"""
+        store = self.store
+        self.validate_language(store, lang)
+
+        results = []
+        for score, matched_lang, entry in store.match_names(query, limit):
+            # Answer in the requested language where the scheme has a translation
+            entry = store.get_entry(lang, entry["scheme_id"]) or entry
+            results.append({
+                "scheme_id": entry["scheme_id"],
+                "level": entry.get("level"),
+                "score": round(score, 4),
+                "matched_lang": matched_lang,
+                "details": entry["details"]
+            })
+        return results
+
+    def match_schemes(self, profile: Dict, lang: str = 'en', level: Optional[str] = None,
+                      limit: int = 10, strict: bool = False) -> List[Dict]:
+        """Schemes a farmer profile is eligible for, the most specifically targeted first"""
+        store = self.store
+        self.validate_language(store, lang)
+
+        results = []
+        matches = store.match_profile(profile, limit, self.normalize_level(level), strict)
+        for score, matched, unverified, entry in matches:
+            # Rules come from the English data, details from the requested language
+            entry = store.get_entry(lang, entry["scheme_id"]) or entry
+            results.append({
+                "scheme_id": entry["scheme_id"],
+                "level": entry.get("level"),
+                "score": score,
+                "matched": matched,
+                "unverified": unverified,
+                "details": entry["details"]
+            })
+        return results
+
     def get_scheme_by_id(self, scheme_id: str, lang: str = 'en') -> Optional[Dict]:
         """Get specific scheme by ID"""
-        # Validate language
-        if lang not in self.schemes_data:
-            raise ValueError(f"Language '{lang}' not supported. Available languages: {list(self.schemes_data.keys())}")
-            
-        data = self.schemes_data[lang]
-        if not data:
-            return None
-            
-        # Search for scheme in all levels
-        for level_schemes in data.values():
-            if scheme_id in level_schemes:
-                return {
-                    "scheme_id": scheme_id,
-                    "details": level_schemes[scheme_id]
-                }
-        return None 
\ No newline at end of file
+        store = self.store
+        self.validate_language(store, lang)
+
+        return store.get_entry(lang, scheme_id)
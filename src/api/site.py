@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .responses import EncodedBody, etag_matches
+from src.translators.changes import write_atomic
+from config import SITE_DIR
+
+# Templates and static files the site is built from
+TEMPLATE_DIR = Path('src/frontend/templates')
+STATIC_DIR = Path('src/frontend/static')
+STYLESHEET = 'styles.css'
+# Schemes rendered into a page, the page's script renders the rest from the catalogue
+PAGE_SIZE = 20
+# Fingerprinted assets never change under their name
+IMMUTABLE = 'public, max-age=31536000, immutable'
+MEDIA_TYPES = {'.html': 'text/html; charset=utf-8', '.css': 'text/css; charset=utf-8'}
+# Paths of the language pages, /hi/ etc.; English is at /
+LANGUAGE_PAGE = re.compile(r'^/([a-z]{2})/$')
+
+
+def page_path(lang: str) -> str:
+    """Path of a language's page in the site, English at the root"""
+    return 'index.html' if lang == 'en' else f'{lang}/index.html'
+
+
+def media_type(path: str) -> str:
+    return MEDIA_TYPES.get(os.path.splitext(path)[1], 'application/octet-stream')
+
+
+def write_file(path: Path, data: bytes):
+    """Write a file of the site atomically, readable by a static file server running as another user"""
+    write_atomic(path, data)
+    os.chmod(path, 0o644)
+
+
+def page_context(lang: str, schemes: Optional[List[Dict]] = None, total: Optional[int] = None,
+                 versions: Optional[Dict[str, Dict[str, str]]] = None, stylesheet: str = f'/static/{STYLESHEET}') -> Dict:
+    """Variables of index.html; without schemes the page's script fetches them"""
+    return {
+        'lang': lang,
+        'schemes': schemes or [],
+        'total': total,
+        'stylesheet': stylesheet,
+        'page_size': PAGE_SIZE,
+        'page_data': {
+            'lang': lang,
+            'rendered': len(schemes) if schemes is not None else None,
+            'versions': versions or {}
+        }
+    }
+
+
+def build_site(service, output_dir: Path = SITE_DIR, template_dir: Path = TEMPLATE_DIR,
+               static_dir: Path = STATIC_DIR) -> Dict[str, int]:
+    """Render a page per language with its first schemes in it, returning each language's scheme count
+
+    The stylesheet is copied under a name with its content hash, so it can be
+    cached for good. Every page carries the ETag of each language's /schemes/
+    list (the catalogue versions), so its script can tell whether the lists
+    it cached are current without a request.
+    """
+    from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+    output_dir = Path(output_dir)
+    stylesheet = (Path(static_dir) / STYLESHEET).read_bytes()
+    asset = f"{Path(STYLESHEET).stem}.{hashlib.sha256(stylesheet).hexdigest()[:12]}.css"
+    (output_dir / 'assets').mkdir(parents=True, exist_ok=True)
+    write_file(output_dir / 'assets' / asset, stylesheet)
+
+    template = Environment(loader=FileSystemLoader(template_dir), autoescape=select_autoescape()).get_template(
+        'index.html'
+    )
+    languages = service.store.languages
+    # Keyed by level like the script's lists, which only ever hold every level ('')
+    versions = {lang: {'': service.get_encoded_schemes(lang).etag} for lang in languages}
+    counts = {}
+    for lang in languages:
+        # Plain body, whether the view holds it or the scheme database does
+        body, _ = service.get_encoded_schemes(lang).select('')
+        schemes = json.loads(body)
+        html = template.render(page_context(lang, schemes[:PAGE_SIZE], len(schemes), versions, f'/assets/{asset}'))
+        path = output_dir / page_path(lang)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_file(path, html.encode('utf-8'))
+        counts[lang] = len(schemes)
+
+    # Stylesheets of earlier builds, no page links to them any more
+    for old in (output_dir / 'assets').glob(f"{Path(STYLESHEET).stem}.*.css"):
+        if old.name != asset:
+            old.unlink()
+    return counts
+
+
+class StaticSite:
+    """Files of a built site, each read, compressed and given an ETag once
+
+    Every request checks the file's signature, so a rebuilt site is served
+    without restarting the workers.
+    """
+
+    def __init__(self, directory: Path = SITE_DIR):
+        self.directory = Path(directory)
+        # Path in the site -> (signature of the file read, its encoded body)
+        self.files: Dict[str, Tuple[Tuple[int, int], EncodedBody]] = {}
+
+    def get(self, path: str) -> Optional[EncodedBody]:
+        """Encoded body of a file in the site, None if it does not exist"""
+        if '..' in path.split('/'):
+            return None
+        # Plain strings and os.stat, pathlib would cost more than the rest of serving the file
+        file_path = os.path.join(self.directory, path)
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            self.files.pop(path, None)
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self.files.get(path)
+        if cached is None or cached[0] != signature:
+            try:
+                with open(file_path, 'rb') as f:
+                    cached = (signature, EncodedBody(f.read()))
+            except OSError:
+                return None
+            self.files[path] = cached
+        return cached[1]
+
+
+class SiteRoute:
+    """Stands in for the route of a request the site answered, so the metrics label it"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+
+PAGE_ROUTE = SiteRoute('/')
+# Labelled like the route answering language pages while the site is not built
+LANGUAGE_ROUTE = SiteRoute('/{lang:language}/')
+ASSET_ROUTE = SiteRoute('/assets/{name}')
+
+
+class StaticSiteMiddleware:
+    """ASGI middleware answering GET and HEAD requests for the built site's files
+
+    Served ahead of the routes (and of any middleware added before it),
+    which is most of the cost of a request for a page already in memory.
+    Paths the site has no file for go on to the app.
+    """
+
+    def __init__(self, app, site: StaticSite):
+        self.app = app
+        self.site = site
+
+    def match(self, path: str):
+        """(file in the site, route, cache control) for a request path, None if it is not a site path"""
+        if path == '/':
+            return 'index.html', PAGE_ROUTE, 'no-cache'
+        if path.startswith('/assets/'):
+            return path[1:], ASSET_ROUTE, IMMUTABLE
+        match = LANGUAGE_PAGE.match(path)
+        if match:
+            return page_path(match.group(1)), LANGUAGE_ROUTE, 'no-cache'
+        return None
+
+    async def __call__(self, scope, receive, send):
+        matched = self.match(scope['path']) if scope['type'] == 'http' and scope['method'] in ('GET', 'HEAD') else None
+        file = self.site.get(matched[0]) if matched else None
+        if file is None:
+            await self.app(scope, receive, send)
+            return
+
+        path, scope['route'], cache_control = matched
+        request_headers = dict(scope['headers'])
+        headers = [(b'etag', file.etag.encode('ascii')), (b'cache-control', cache_control.encode('ascii')),
+                   (b'vary', b'Accept-Encoding')]
+        if etag_matches(request_headers.get(b'if-none-match', b'').decode('latin-1'), file.etag):
+            await send({'type': 'http.response.start', 'status': 304, 'headers': headers})
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        body, encoding = file.select(request_headers.get(b'accept-encoding', b'').decode('latin-1'))
+        headers.append((b'content-type', media_type(path).encode('ascii')))
+        headers.append((b'content-length', str(len(body)).encode('ascii')))
+        if encoding:
+            headers.append((b'content-encoding', encoding.encode('ascii')))
+        await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body if scope['method'] == 'GET' else b''})
@@ -0,0 +1,175 @@
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from pydantic import ValidationError
+from .responses import EncodedView, EMPTY_VIEW, encode_scheme
+from .search import SearchIndex
+from .names import NameIndex, merge_matches
+from .eligibility import ELIGIBILITY_LANGUAGE, EligibilityIndex
+
+# Levels that can be requested through the API filter
+SCHEME_LEVELS = ('central', 'state')
+
+
+class SchemeStore:
+    """Lookup tables over the loaded scheme data, built once at load time"""
+
+    def __init__(self, schemes_data: Dict[str, Dict], generation: int = 0):
+        self.schemes_data = schemes_data
+        # Bumped on every reload so readers can tell snapshots apart
+        self.generation = generation
+        # Flat (lang, scheme_id) -> response entry
+        self.index: Dict[Tuple[str, str], Dict] = {}
+        # (lang, level) -> response entries, level None holds every scheme
+        self.views: Dict[Tuple[str, Optional[str]], List[Dict]] = {}
+        # (lang, level) -> JSON body of the view, encoded and compressed once
+        self.encoded: Dict[Tuple[str, Optional[str]], EncodedView] = {}
+        # (lang, level) -> the view's valid entries, in line with the encoded fragments
+        self.valid: Dict[Tuple[str, Optional[str]], List[Dict]] = {}
+        # (lang, level, scheme_id) -> encoded entry, None for invalid schemes
+        self.fragments: Dict[Tuple[str, str, str], Optional[bytes]] = {}
+        # lang -> full-text index over the valid schemes
+        self.search: Dict[str, SearchIndex] = {}
+        # lang -> fuzzy index over the transliterated names of the valid schemes
+        self.names: Dict[str, NameIndex] = {}
+        # Eligibility rules of the valid schemes, from the English data
+        self.eligibility = EligibilityIndex()
+
+        for lang, data in schemes_data.items():
+            self.index_language(lang, data)
+
+    def index_language(self, lang: str, data: Dict, previous: Optional['SchemeStore'] = None,
+                       changed: Optional[Set[Tuple[str, str]]] = None):
+        """Build the index entries and level views for one language
+
+        With the previous store and the (level, scheme_id) pairs changed since,
+        other schemes keep their encoded fragments and search postings.
+        """
+        all_schemes = []
+        level_views = {level: [] for level in SCHEME_LEVELS}
+        fragments = {}
+        searchable = []
+        reuse = {}
+        if previous is not None and changed is not None:
+            reuse = {
+                key: fragment for key, fragment in previous.fragments.items()
+                if key[0] == lang and key[1:] not in changed
+            }
+
+        for scheme_level, schemes in data.items():
+            for scheme_id, scheme_details in schemes.items():
+                entry = {
+                    "scheme_id": scheme_id,
+                    "level": scheme_level,
+                    "details": scheme_details
+                }
+                all_schemes.append(entry)
+                key = (lang, scheme_level, scheme_id)
+                if key in reuse:
+                    fragments[id(entry)] = self.fragments[key] = reuse[key]
+                else:
+                    fragments[id(entry)] = self.fragments[key] = self.encode_entry(lang, entry)
+                if fragments[id(entry)] is not None:
+                    searchable.append((scheme_level, entry))
+                if scheme_level in level_views:
+                    level_views[scheme_level].append(entry)
+                # Keep the first level's entry if an ID is repeated across levels
+                self.index.setdefault((lang, scheme_id), entry)
+
+        self.views[(lang, None)] = all_schemes
+        for level, entries in level_views.items():
+            self.views[(lang, level)] = entries
+
+        self.encode_language(lang, fragments)
+
+        if reuse and lang in previous.search:
+            self.search[lang] = previous.search[lang].updated(searchable, changed)
+        else:
+            self.search[lang] = SearchIndex.build(searchable)
+        # Names are short, so the name index is rebuilt whole
+        self.names[lang] = NameIndex.build(searchable)
+        if lang == ELIGIBILITY_LANGUAGE:
+            self.eligibility = EligibilityIndex.build(searchable)
+
+    def encode_entry(self, lang: str, entry: Dict) -> Optional[bytes]:
+        """Encode one response entry, None if it does not validate"""
+        try:
+            return encode_scheme(entry)
+        except ValidationError as e:
+            print(f"Warning: Skipping invalid scheme {entry['scheme_id']} ({lang}): {e.error_count()} errors")
+            return None
+
+    def encode_language(self, lang: str, fragments: Dict[int, Optional[bytes]]):
+        """Pre-encode the response body of every view for one language"""
+        for level in (None,) + SCHEME_LEVELS:
+            self.valid[(lang, level)] = [
+                entry for entry in self.views[(lang, level)] if fragments[id(entry)] is not None
+            ]
+            self.encoded[(lang, level)] = EncodedView([fragments[id(entry)] for entry in self.valid[(lang, level)]])
+
+    def with_languages(self, updates: Dict[str, Dict],
+                       changed: Optional[Dict[str, Set[Tuple[str, str]]]] = None) -> 'SchemeStore':
+        """Build the next store, reindexing only the updated languages
+
+        changed maps an updated language to the (level, scheme_id) pairs that
+        differ from the loaded data; the other schemes of that language reuse
+        their encoded fragments. Languages missing from it are encoded afresh.
+        """
+        store = SchemeStore({}, generation=self.generation + 1)
+        store.schemes_data = {**self.schemes_data, **updates}
+        changed = changed or {}
+
+        # Share the tables of unchanged languages with this store
+        store.index = {key: entry for key, entry in self.index.items() if key[0] not in updates}
+        store.views = {key: view for key, view in self.views.items() if key[0] not in updates}
+        store.encoded = {key: view for key, view in self.encoded.items() if key[0] not in updates}
+        store.valid = {key: entries for key, entries in self.valid.items() if key[0] not in updates}
+        store.fragments = {key: fragment for key, fragment in self.fragments.items() if key[0] not in updates}
+        store.search = {lang: index for lang, index in self.search.items() if lang not in updates}
+        store.names = {lang: index for lang, index in self.names.items() if lang not in updates}
+        store.eligibility = self.eligibility
+
+        for lang, data in updates.items():
+            store.index_language(lang, data, self, changed.get(lang))
+        return store
+
+    @property
+    def languages(self) -> List[str]:
+        return list(self.schemes_data.keys())
+
+    def get_view(self, lang: str, level: Optional[str] = None) -> List[Dict]:
+        """Get the prebuilt response list for a language and level"""
+        return self.views.get((lang, level), [])
+
+    def get_encoded(self, lang: str, level: Optional[str] = None) -> EncodedView:
+        """Get the pre-encoded response body for a language and level"""
+        return self.encoded.get((lang, level), EMPTY_VIEW)
+
+    def get_valid(self, lang: str, level: Optional[str] = None) -> List[Dict]:
+        """Get the entries of a view that made it into its encoded body, in the same order"""
+        return self.valid.get((lang, level), [])
+
+    def get_fragments(self, lang: str, level: Optional[str], start: int, end: int) -> Iterator[bytes]:
+        """Get the encoded valid entries of a view from start up to end"""
+        fragments = self.get_encoded(lang, level).fragments
+        return (fragments[idx] for idx in range(start, end))
+
+    def search_schemes(self, lang: str, query: str, limit: int = 10, level: Optional[str] = None,
+                       prefix: bool = True) -> List[Tuple[float, Dict]]:
+        """Best (score, response entry) matches for a full-text query"""
+        index = self.search.get(lang)
+        return index.search(query, limit, level, prefix) if index else []
+
+    def match_names(self, query: str, limit: int = 10) -> List[Tuple[float, str, Dict]]:
+        """Best (similarity, language, response entry) name matches across every language"""
+        return merge_matches({lang: index.match(query, limit) for lang, index in self.names.items()}, limit)
+
+    def match_profile(self, profile: Dict, limit: int = 10, level: Optional[str] = None,
+                      strict: bool = False) -> List[Tuple[int, List[str], List[str], Dict]]:
+        """Schemes a farmer profile is eligible for as (score, matched, unverified, entry)"""
+        return [
+            (score, matched, unverified, entry)
+            for score, matched, unverified, (_, entry) in self.eligibility.match(profile, limit, level, strict)
+        ]
+
+    def get_entry(self, lang: str, scheme_id: str) -> Optional[Dict]:
+        """Get a single response entry by language and scheme ID"""
+        return self.index.get((lang, scheme_id))
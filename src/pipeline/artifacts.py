@@ -0,0 +1,87 @@
+import hashlib
+import json
+from pathlib import Path
+
+from src.translators.changes import write_atomic
+
+
+def canonical_json(value):
+    """JSON bytes that only depend on the value, not on key order"""
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def digest(value):
+    """sha256 of a JSON value"""
+    return hashlib.sha256(canonical_json(value)).hexdigest()
+
+
+def file_sha256(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def file_signature(path):
+    """[size, mtime_ns] of a file, None if it is missing"""
+    try:
+        stat = Path(path).stat()
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class ArtifactStore:
+    """Values of pipeline stages stored by content hash, and what each stage last ran on
+
+    state.json maps each stage to the key of its inputs, the hash of its value
+    (a file in objects/) and the hash and signature of every file it wrote.
+    """
+
+    def __init__(self, state_dir):
+        self.state_dir = Path(state_dir)
+        self.objects_dir = self.state_dir / 'objects'
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.state_file = self.state_dir / 'state.json'
+        try:
+            self.records = json.loads(self.state_file.read_bytes())
+        except (OSError, json.JSONDecodeError):
+            self.records = {}
+
+    def object_path(self, value_hash):
+        return self.objects_dir / value_hash[:2] / f"{value_hash}.json"
+
+    def put(self, value):
+        """Store a JSON value, returning its hash"""
+        data = canonical_json(value)
+        value_hash = hashlib.sha256(data).hexdigest()
+        path = self.object_path(value_hash)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            write_atomic(path, data)
+        return value_hash
+
+    def get(self, value_hash):
+        """Stored value of a hash, raising FileNotFoundError if it is gone"""
+        return json.loads(self.object_path(value_hash).read_bytes())
+
+    def previous_value(self, name):
+        """Value of a stage's last run, None if it never ran or the value is gone"""
+        record = self.records.get(name)
+        try:
+            return self.get(record['value']) if record else None
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def save(self):
+        write_atomic(self.state_file, json.dumps(self.records, indent=4, sort_keys=True).encode('utf-8'))
+
+    def prune(self, names):
+        """Forget stages not in names and delete the values no stage refers to"""
+        self.records = {name: record for name, record in self.records.items() if name in names}
+        self.save()
+        live = {record['value'] for record in self.records.values()}
+        for path in self.objects_dir.glob('*/*.json'):
+            if path.stem not in live:
+                path.unlink(missing_ok=True)
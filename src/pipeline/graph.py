@@ -0,0 +1,194 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+
+from src.utils.logger import setup_logger
+from src.pipeline.artifacts import digest, file_sha256, file_signature
+
+# Outcomes of a stage in a run
+RAN = 'ran'
+UP_TO_DATE = 'up to date'
+FAILED = 'failed'
+BLOCKED = 'blocked'
+
+
+class Result:
+    """Value of a stage and the files it wrote, identified by one digest of both"""
+
+    def __init__(self, value, files=None):
+        self.value = value
+        # Path -> sha256 of each file the stage writes, None if it did not write it
+        self.files = files or {}
+        self.digest = digest([value, sorted(self.files.items())])
+
+
+class Stage:
+    """A step of the pipeline, run(inputs) computing a JSON value from the results of its dependencies
+
+    inputs maps each dependency to its Result. The stage is skipped while
+    the key of its inputs is the one it last ran with and the files it
+    writes are as it left them. The key is made of params (e.g. versions of
+    the code) and key(inputs), by default the digests of all dependencies.
+    Stages marked always run every time, e.g. to look at files that change
+    outside the pipeline. expand(result), if given, returns stages to add
+    once this one is done; the stages depending on this one then wait for
+    them too. Stages run on a thread of their pool.
+    """
+
+    def __init__(self, name, run, deps=(), params=None, key=None, files=(), pool='main', always=False,
+                 expand=None):
+        self.name = name
+        self.run = run
+        self.deps = list(deps)
+        self.params = params
+        self.key = key
+        self.files = [Path(path) for path in files]
+        self.pool = pool
+        self.always = always
+        self.expand = expand
+
+    def input_key(self, inputs):
+        if self.key is not None:
+            material = self.key(inputs)
+        else:
+            material = {name: result.digest for name, result in inputs.items()}
+        return digest([self.params, material])
+
+
+class Pipeline:
+    """Runs a graph of stages, each as soon as its dependencies are done, skipping those whose inputs are unchanged
+
+    pools maps pool names to their threads; stages of different pools, or of
+    one pool with several threads, run at the same time. The state of every
+    finished stage is saved right away, so an interrupted run picks up where
+    it stopped.
+    """
+
+    def __init__(self, store, pools=None, force=False):
+        self.logger = setup_logger("pipeline")
+        self.store = store
+        self.pools = {'main': 1, **(pools or {})}
+        self.force = force
+        # Name -> stage, dependencies always added before their dependents
+        self.stages = {}
+
+    def add(self, stage):
+        if stage.name in self.stages:
+            raise ValueError(f"Duplicate stage: {stage.name}")
+        missing = [dep for dep in stage.deps if dep not in self.stages]
+        if missing:
+            raise ValueError(f"Stage {stage.name} depends on unknown stages: {', '.join(missing)}")
+        if stage.pool not in self.pools:
+            raise ValueError(f"Stage {stage.name} runs on unknown pool: {stage.pool}")
+        self.stages[stage.name] = stage
+
+    def cached_result(self, stage, key):
+        """Result of the stage's last run if it ran with this key and its files are untouched"""
+        record = self.store.records.get(stage.name)
+        if self.force or stage.always or record is None or record['key'] != key:
+            return None
+        files = {}
+        for path in stage.files:
+            sha, signature = record['files'].get(str(path), (None, None))
+            if file_signature(path) != signature:
+                return None
+            files[str(path)] = sha
+        try:
+            return Result(self.store.get(record['value']), files)
+        except OSError:
+            return None
+
+    def execute(self, stage, inputs):
+        """Run a stage on a pool thread, returning its Result, the signatures of its files and the seconds it took"""
+        start = time.perf_counter()
+        value = stage.run(inputs)
+        files, signatures = {}, {}
+        for path in stage.files:
+            signatures[str(path)] = file_signature(path)
+            files[str(path)] = file_sha256(path) if signatures[str(path)] else None
+        return Result(value, files), signatures, time.perf_counter() - start
+
+    def finish(self, stage, result, results):
+        results[stage.name] = result
+        if stage.expand is None:
+            return
+        added = stage.expand(result)
+        for new_stage in added:
+            self.add(new_stage)
+        names = [new_stage.name for new_stage in added]
+        for other in self.stages.values():
+            if stage.name in other.deps and other.name not in names:
+                other.deps.extend(names)
+
+    def run(self):
+        """Run every stage whose inputs changed, returning each stage's outcome (RAN, UP_TO_DATE, FAILED, BLOCKED)"""
+        start = time.perf_counter()
+        results, status, running = {}, {}, {}
+        executors = {
+            pool: ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"pipeline-{pool}")
+            for pool, workers in self.pools.items()
+        }
+        try:
+            while True:
+                scheduled = True
+                while scheduled:
+                    scheduled = False
+                    started = {stage.name for stage, _ in running.values()}
+                    for stage in list(self.stages.values()):
+                        if stage.name in status or stage.name in started:
+                            continue
+                        deps = [status.get(dep) for dep in stage.deps]
+                        if FAILED in deps or BLOCKED in deps:
+                            status[stage.name] = BLOCKED
+                            scheduled = True
+                            continue
+                        if not all(dep in (RAN, UP_TO_DATE) for dep in deps):
+                            continue
+
+                        inputs = {dep: results[dep] for dep in stage.deps}
+                        key = stage.input_key(inputs)
+                        result = self.cached_result(stage, key)
+                        if result is not None:
+                            status[stage.name] = UP_TO_DATE
+                            self.finish(stage, result, results)
+                        else:
+                            future = executors[stage.pool].submit(self.execute, stage, inputs)
+                            running[future] = (stage, key)
+                            started.add(stage.name)
+                        scheduled = True
+
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, key = running.pop(future)
+                    try:
+                        result, signatures, seconds = future.result()
+                    except Exception as e:
+                        self.logger.error(f"Stage {stage.name} failed: {str(e)}")
+                        status[stage.name] = FAILED
+                        continue
+                    self.store.records[stage.name] = {
+                        'key': key,
+                        'value': self.store.put(result.value),
+                        'files': {path: [sha, signatures[path]] for path, sha in result.files.items()}
+                    }
+                    status[stage.name] = RAN
+                    self.logger.info(f"Stage {stage.name} ran in {seconds:.2f}s")
+                    self.finish(stage, result, results)
+                self.store.save()
+        finally:
+            # Stages already running finish (a thread cannot be stopped), queued ones are dropped
+            for executor in executors.values():
+                executor.shutdown(wait=True, cancel_futures=True)
+
+        counts = {outcome: sum(1 for value in status.values() if value == outcome)
+                  for outcome in (RAN, UP_TO_DATE, FAILED, BLOCKED)}
+        if not counts[FAILED] and not counts[BLOCKED]:
+            # Stages that are gone (e.g. of deleted PDFs) are forgotten, with their values
+            self.store.prune(self.stages)
+        self.logger.info(
+            f"Pipeline: {counts[RAN]} stages ran, {counts[UP_TO_DATE]} up to date, {counts[FAILED]} failed, "
+            f"{counts[BLOCKED]} blocked in {time.perf_counter() - start:.2f}s"
+        )
+        return status
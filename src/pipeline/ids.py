@@ -0,0 +1,119 @@
+import json
+import re
+from pathlib import Path
+
+from src.translators.changes import write_atomic
+
+# Levels of processed_schemes.json, in file order
+LEVELS = ['central', 'state', 'unspecified']
+
+
+def scheme_id(level, number):
+    return f"{level}_scheme_{str(number).zfill(2)}"
+
+
+def scheme_links(scheme):
+    """Source links of a scheme, all of them for one merged from duplicates"""
+    return [link for link in scheme.get('source_links') or [scheme.get('source_link')] if link]
+
+
+class SchemeIdRegistry:
+    """Scheme IDs given out so far, by source link, so reprocessing never renumbers a scheme
+
+    A scheme keeps its ID while its source link stays the same, even if its
+    level changes or other schemes come and go. New schemes are numbered
+    after the highest number ever used at their level, so IDs of removed
+    schemes are not reused. A path of None keeps the registry in memory.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else None
+        # Source link -> scheme ID
+        self.ids = {}
+        # Level -> last number used
+        self.numbers = {}
+        if self.path and self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.ids = data.get('ids', {})
+            self.numbers = data.get('numbers', {})
+
+    def __len__(self):
+        return len(self.ids)
+
+    def reserve(self, scheme_id):
+        """Keep the number of an ID in use from being given out again"""
+        for level in LEVELS:
+            match = re.fullmatch(rf"{level}_scheme_(\d+)", scheme_id)
+            if match:
+                self.numbers[level] = max(self.numbers.get(level, 0), int(match.group(1)))
+
+    def seed(self, organized_schemes):
+        """Take over the IDs of an existing processed_schemes.json, so the first registry keeps them"""
+        given = set(self.ids.values())
+        for schemes in organized_schemes.values():
+            for existing_id, scheme in schemes.items():
+                self.reserve(existing_id)
+                # Schemes sharing a link get new IDs, like any scheme whose link is taken
+                if existing_id in given:
+                    continue
+                for link in scheme_links(scheme):
+                    if link not in self.ids:
+                        self.ids[link] = existing_id
+                        given.add(existing_id)
+
+    def assign(self, scheme, taken=()):
+        """ID of a scheme, a new one if none of its source links was seen before
+
+        A merged scheme keeps the ID of the first of its source_links that
+        has one, and its other links map to that ID from then on. An ID in
+        taken (given to another scheme of the same run) is not handed out twice.
+        """
+        level = scheme.get('scheme_level', 'unspecified')
+        links = scheme_links(scheme)
+        existing = [self.ids[link] for link in links if link in self.ids]
+        assigned = next((existing_id for existing_id in existing if existing_id not in taken), None)
+        if assigned is None:
+            number = self.numbers.get(level, 0) + 1
+            self.numbers[level] = number
+            assigned = scheme_id(level, number)
+        for link in links:
+            self.ids.setdefault(link, assigned)
+        return assigned
+
+    def save(self):
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {'ids': self.ids, 'numbers': self.numbers}
+        write_atomic(self.path, json.dumps(data, indent=4, ensure_ascii=False).encode('utf-8'))
+
+
+def load_registry(path, published_file):
+    """Registry at path, seeded with the IDs of the published processed_schemes.json if it is new"""
+    registry = SchemeIdRegistry(path)
+    published_file = Path(published_file)
+    if not len(registry) and published_file.exists():
+        with open(published_file, 'r', encoding='utf-8') as f:
+            registry.seed(json.load(f))
+    return registry
+
+
+def organize_schemes(schemes, registry=None):
+    """Bucket processed schemes by level under their IDs, the processed_schemes.json layout
+
+    Schemes keep their order within a level. Without a registry they are
+    numbered from 01 at each level, as if nothing had been published before.
+    """
+    registry = registry if registry is not None else SchemeIdRegistry()
+    schemes_by_level = {level: {} for level in LEVELS}
+    taken = set()
+    for scheme in schemes:
+        level = scheme.get('scheme_level', 'unspecified')
+        # Levels outside LEVELS were never published
+        if level not in schemes_by_level:
+            continue
+        new_id = registry.assign(scheme, taken)
+        taken.add(new_id)
+        schemes_by_level[level][new_id] = scheme
+    return {level: schemes for level, schemes in schemes_by_level.items() if schemes}
@@ -0,0 +1,260 @@
+import json
+import threading
+from functools import partial
+from importlib import metadata
+from pathlib import Path
+
+from src.utils.logger import setup_logger
+from src.pipeline.artifacts import ArtifactStore, file_sha256, file_signature
+from src.pipeline.graph import Pipeline, Stage
+from src.pipeline.ids import load_registry, organize_schemes
+from src.processors import dedup, eligibility
+from src.processors.dedup import SchemeDeduplicator
+from src.processors.pdf_processor import (
+    PDFProcessor, PROCESSOR_VERSION, PATTERN_VERSION, SPACY_MODEL, DESCRIPTION_WINDOW
+)
+from src.scrapers.pdf_scraper import PDFScraper
+from src.translators.changes import dump_schemes, write_atomic
+from src.translators.translator import SchemeTranslator
+from src.api.database import DATABASE_VERSION, scheme_files, write_scheme_database
+from src.api.service import SchemeService
+from src.api.site import build_site, page_path, TEMPLATE_DIR, STATIC_DIR, STYLESHEET
+from config import (
+    PDF_DIR, PROCESSOR_WORKERS, PROCESSOR_CACHE_DIR, NLP_MODE, TRANSLATION_BACKEND, TRANSLATION_LANGUAGES,
+    TRANSLATION_MEMORY_PATH, TRANSLATION_SNAPSHOT_FILE, SCHEME_DATABASE_FILE, SCHEME_ID_FILE, PIPELINE_STATE_DIR,
+    DEDUP_THRESHOLD, DEDUP_NUM_PERM, SITE_DIR
+)
+
+SCRAPE_MODES = ('scrape', 'crawl')
+
+
+def model_version():
+    try:
+        return metadata.version(SPACY_MODEL)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+class SchemePipeline:
+    """The scheme pipeline as a graph of stages: scrape, process, dedup, organize, translate, publish and site
+
+    Every PDF is processed by a stage of its own, rerun only when the PDF
+    (or the processing code) changes. Once a document is processed, the
+    fields that differ from the last translated version go to the
+    translation engine on the translate thread while other documents are
+    still processed, so the translate stage mostly finds them in the
+    translation memory. Scheme IDs come from a SchemeIdRegistry.
+    """
+
+    def __init__(self, pdf_dir=PDF_DIR, english_file=Path('data/processed_pdfs/processed_schemes.json'),
+                 data_dir=Path('data/translated_schemes'), database_file=None, id_file=SCHEME_ID_FILE,
+                 state_dir=PIPELINE_STATE_DIR, scrape=None, workers=PROCESSOR_WORKERS, nlp_mode=NLP_MODE,
+                 processor_cache_dir=PROCESSOR_CACHE_DIR, languages=None, backend_name=TRANSLATION_BACKEND,
+                 memory_path=TRANSLATION_MEMORY_PATH, dedup_threshold=DEDUP_THRESHOLD, site_dir=SITE_DIR, force=False):
+        if scrape is not None and scrape not in SCRAPE_MODES:
+            raise ValueError(f"Unsupported scrape mode: {scrape}. Supported modes: {', '.join(SCRAPE_MODES)}")
+        self.logger = setup_logger("scheme_pipeline")
+        self.pdf_dir = Path(pdf_dir)
+        self.english_file = Path(english_file)
+        self.data_dir = Path(data_dir)
+        self.database_file = Path(database_file) if database_file else self.data_dir.parent / SCHEME_DATABASE_FILE
+        self.id_file = id_file
+        self.scrape_mode = scrape
+        self.workers = workers
+        self.nlp_mode = nlp_mode
+        self.processor_cache_dir = processor_cache_dir
+        self.languages = languages or TRANSLATION_LANGUAGES
+        self.memory_path = memory_path
+        self.dedup_threshold = dedup_threshold
+        self.site_dir = Path(site_dir)
+
+        # Created when a stage first needs them: the processor is shared by the process threads,
+        # the translator (and its SQLite memory) only used on the one translate thread
+        self.processor = None
+        self.process_pool = None
+        self.translator = None
+        self.snapshot = None
+        self.lock = threading.Lock()
+
+        # Whatever the results of a stage depend on besides its inputs
+        self.processing_params = {
+            'processor': PROCESSOR_VERSION,
+            'patterns': PATTERN_VERSION,
+            'nlp_mode': nlp_mode,
+            'model': model_version() if nlp_mode != 'sentencizer' else None,
+            'description_window': DESCRIPTION_WINDOW,
+            # Rules are compiled after the processing cache, any change to them applies
+            'eligibility': file_sha256(eligibility.__file__)
+        }
+        self.translation_params = {'languages': self.languages, 'backend': backend_name}
+        self.dedup_params = {
+            'threshold': dedup_threshold,
+            'num_perm': DEDUP_NUM_PERM,
+            'code': file_sha256(dedup.__file__)
+        }
+        self.site_params = {
+            'template': file_sha256(TEMPLATE_DIR / 'index.html'),
+            'stylesheet': file_sha256(STATIC_DIR / STYLESHEET)
+        }
+
+        self.store = ArtifactStore(state_dir)
+        self.pipeline = Pipeline(self.store, pools={'process': max(workers, 1), 'translate': 1}, force=force)
+        translated = scheme_files(self.english_file, self.data_dir, self.languages)
+        translated.pop('en')
+        if scrape:
+            self.pipeline.add(Stage('scrape', self.scrape, always=True))
+        self.pipeline.add(Stage('pdfs', self.list_pdfs, deps=['scrape'] if scrape else [], always=True,
+                                expand=self.document_stages))
+        self.pipeline.add(Stage('dedup', self.merge_duplicates, deps=['pdfs'], params=self.dedup_params,
+                                key=self.dedup_key))
+        self.pipeline.add(Stage('organize', self.organize, deps=['pdfs', 'dedup'],
+                                key=lambda inputs: inputs['dedup'].digest, files=[self.english_file, self.id_file]))
+        self.pipeline.add(Stage('translate', self.translate, deps=['organize'], params=self.translation_params,
+                                files=[*translated.values(), self.data_dir / TRANSLATION_SNAPSHOT_FILE],
+                                pool='translate'))
+        self.pipeline.add(Stage('publish', self.publish, deps=['organize', 'translate'],
+                                params={'database_version': DATABASE_VERSION}, files=[self.database_file]))
+        self.pipeline.add(Stage('site', self.build_site, deps=['publish'], params=self.site_params,
+                                files=[self.site_dir / page_path(lang) for lang in ['en', *self.languages]]))
+
+    def run(self):
+        """Run the stages whose inputs changed, returning each stage's outcome"""
+        try:
+            return self.pipeline.run()
+        finally:
+            if self.process_pool is not None:
+                self.process_pool.shutdown()
+                self.process_pool = None
+
+    def get_processor(self):
+        with self.lock:
+            if self.processor is None:
+                self.processor = PDFProcessor(cache_dir=self.processor_cache_dir, nlp_mode=self.nlp_mode)
+                self.processor.pdf_dir = self.pdf_dir
+            return self.processor
+
+    def create_translator(self):
+        return SchemeTranslator(memory_path=self.memory_path, languages=self.languages)
+
+    def get_translator(self):
+        if self.translator is None:
+            self.translator = self.create_translator()
+        return self.translator
+
+    def scrape(self, inputs):
+        scraper = PDFScraper(pdf_dir=self.pdf_dir)
+        statuses = scraper.crawl() if self.scrape_mode == 'crawl' else scraper.scrape()
+        counts = {}
+        for status in statuses.values():
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    def list_pdfs(self, inputs):
+        """PDF name -> content hash, size and mtime; unchanged files (same size and mtime) are not hashed again"""
+        previous = self.store.previous_value('pdfs') or {}
+        pdfs = {}
+        for pdf_file in sorted(self.pdf_dir.glob('*.pdf')):
+            size, mtime_ns = file_signature(pdf_file)
+            old = previous.get(pdf_file.name)
+            if old and old['size'] == size and old['mtime_ns'] == mtime_ns:
+                content_hash = old['sha256']
+            else:
+                content_hash = file_sha256(pdf_file)
+            pdfs[pdf_file.name] = {'sha256': content_hash, 'size': size, 'mtime_ns': mtime_ns}
+        return pdfs
+
+    def document_stages(self, result):
+        """A process and a pretranslate stage per PDF"""
+        stages, stale = [], 0
+        for name in result.value:
+            process = Stage(f'process:{name}', partial(self.process_document, name), deps=['pdfs'],
+                            params=self.processing_params,
+                            key=lambda inputs, name=name: inputs['pdfs'].value[name]['sha256'], pool='process')
+            if self.pipeline.cached_result(process, process.input_key({'pdfs': result})) is None:
+                stale += 1
+            stages.append(process)
+            stages.append(Stage(f'pretranslate:{name}', partial(self.pretranslate, name), deps=[process.name],
+                                params=self.translation_params, pool='translate'))
+        self.logger.info(f"{len(result.value)} PDFs, {stale} to process")
+        # Forked now, while no other stage is running, rather than from a process thread later
+        if self.workers > 1 and stale > 1:
+            self.process_pool = self.get_processor().create_pool(self.workers)
+            self.process_pool.submit(len, ()).result()
+        return stages
+
+    def process_document(self, name, inputs):
+        pdf_file = self.pdf_dir / name
+        if self.process_pool is not None:
+            return self.get_processor().process_pdf_in_pool(pdf_file, self.process_pool)
+        return self.get_processor().process_pdf(pdf_file)
+
+    def snapshot_schemes(self):
+        """Schemes of the English file translated last, by source link"""
+        if self.snapshot is None:
+            try:
+                with open(self.data_dir / TRANSLATION_SNAPSHOT_FILE, 'r', encoding='utf-8') as f:
+                    snapshot = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                snapshot = {}
+            self.snapshot = {
+                scheme.get('source_link'): scheme for schemes in snapshot.values() for scheme in schemes.values()
+            }
+        return self.snapshot
+
+    def pretranslate(self, name, inputs):
+        """Translate the new and changed fields of a processed document into the translation memory"""
+        scheme = inputs[f'process:{name}'].value
+        if not scheme:
+            return 0
+        translator = self.get_translator()
+        previous = self.snapshot_schemes().get(scheme.get('source_link'), {})
+        texts = [
+            scheme[field] for field in translator.fields_to_translate
+            if scheme.get(field) and scheme[field] != previous.get(field)
+        ]
+        if texts:
+            translator.translate_texts(texts, list(self.languages))
+        return len(texts)
+
+    def dedup_key(self, inputs):
+        # Only the processed schemes matter, not when the PDFs were last touched
+        return {name: result.digest for name, result in inputs.items() if name.startswith('process:')}
+
+    def merge_duplicates(self, inputs):
+        """Processed schemes in PDF order, near-duplicates merged into one with all their source links"""
+        schemes = [inputs[f'process:{name}'].value for name in inputs['pdfs'].value]
+        return SchemeDeduplicator(self.dedup_threshold).deduplicate([scheme for scheme in schemes if scheme])
+
+    def organize(self, inputs):
+        """Write processed_schemes.json with the schemes bucketed by level under their IDs"""
+        registry = load_registry(self.id_file, self.english_file)
+        organized_schemes = organize_schemes(inputs['dedup'].value, registry)
+        registry.save()
+        self.english_file.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(self.english_file, dump_schemes(organized_schemes))
+
+        if self.processor is not None and self.processor.cache:
+            self.processor.cache.prune({pdf['sha256'] for pdf in inputs['pdfs'].value.values()})
+        counts = {level: len(schemes) for level, schemes in organized_schemes.items()}
+        self.logger.info(f"Saved {sum(counts.values())} schemes to {self.english_file}")
+        return counts
+
+    def translate(self, inputs):
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.get_translator().translate_all_schemes(self.english_file, self.data_dir)
+
+    def publish(self, inputs):
+        """Convert the processed and translated files to the database the API serves"""
+        counts = write_scheme_database(self.database_file,
+                                       scheme_files(self.english_file, self.data_dir, self.languages))
+        self.logger.info(f"Scheme database saved to: {self.database_file}")
+        return counts
+
+    def build_site(self, inputs):
+        """Pre-render the frontend's pages from the published schemes"""
+        service = SchemeService(data_dir=self.data_dir, english_file=self.english_file,
+                                database_file=self.database_file, background_indexes=False,
+                                languages=self.languages)
+        counts = build_site(service, self.site_dir)
+        self.logger.info(f"Site saved to: {self.site_dir}")
+        return counts
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+
+class ProcessingCache:
+    """On-disk cache of extracted pages and structured scheme data, keyed by PDF content hash
+
+    Pages are reused while the extraction version matches, scheme data only
+    while the structure version (patterns, NLP model) matches as well.
+    """
+
+    def __init__(self, cache_dir, extraction_version, structure_version):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.extraction_version = extraction_version
+        self.structure_version = structure_version
+        self.stats = {
+            'hits': 0,
+            'page_hits': 0,
+            'misses': 0,
+            'bytes_saved': 0,
+            'evicted': 0
+        }
+
+    def content_hash(self, pdf_path):
+        """SHA-256 of the PDF bytes"""
+        digest = hashlib.sha256()
+        with open(pdf_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def entry_path(self, content_hash):
+        return self.cache_dir / f"{content_hash}.json"
+
+    def lookup(self, content_hash, pdf_path):
+        """Get the reusable parts of a cached entry as (pages, scheme_data)"""
+        try:
+            with open(self.entry_path(content_hash), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            entry = {}
+
+        pages = None
+        scheme_data = None
+        if entry.get('extraction_version') == self.extraction_version:
+            pages = entry.get('pages')
+            if entry.get('structure_version') == self.structure_version:
+                scheme_data = entry.get('scheme_data')
+
+        if scheme_data is not None:
+            self.stats['hits'] += 1
+        elif pages is not None:
+            self.stats['page_hits'] += 1
+        else:
+            self.stats['misses'] += 1
+        if pages is not None:
+            self.stats['bytes_saved'] += Path(pdf_path).stat().st_size
+        return pages, scheme_data
+
+    def store(self, content_hash, pdf_path, pages, scheme_data):
+        """Write an entry atomically so concurrent runs never see partial files"""
+        entry = {
+            'file_name': Path(pdf_path).name,
+            'extraction_version': self.extraction_version,
+            'structure_version': self.structure_version,
+            'pages': pages,
+            'scheme_data': scheme_data
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, self.entry_path(content_hash))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def prune(self, live_hashes):
+        """Evict entries for PDFs that are no longer in the input directory"""
+        for entry_path in self.cache_dir.glob('*.json'):
+            if entry_path.stem not in live_hashes:
+                entry_path.unlink(missing_ok=True)
+                self.stats['evicted'] += 1
@@ -0,0 +1,199 @@
+import re
+import zlib
+
+import numpy as np
+
+from src.utils.logger import setup_logger
+from config import DEDUP_THRESHOLD, DEDUP_NUM_PERM
+
+# Fields compared between schemes; deadline and category are too short and generic to tell schemes apart
+SIGNATURE_FIELDS = ['scheme_name', 'description', 'eligibility', 'benefits', 'application_process']
+# Fields a merged scheme takes from a duplicate when its own is empty
+MERGED_FIELDS = SIGNATURE_FIELDS + ['deadline', 'category']
+# Words per shingle
+SHINGLE_SIZE = 3
+
+WORD_PATTERN = re.compile(r'\w+')
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def normalize(scheme):
+    """Lowercase words of a scheme's compared fields, punctuation and spacing dropped"""
+    text = ' '.join(scheme.get(field) or '' for field in SIGNATURE_FIELDS)
+    return WORD_PATTERN.findall(text.lower())
+
+
+def shingle_hashes(words, size=SHINGLE_SIZE):
+    """Distinct 32-bit hashes of the runs of size words (of all words if there are fewer)"""
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    tokens = np.fromiter((zlib.crc32(word.encode('utf-8')) for word in words), dtype=np.uint64, count=len(words))
+    size = min(size, len(tokens))
+    count = len(tokens) - size + 1
+    hashes = tokens[:count].copy()
+    for offset in range(1, size):
+        hashes = (hashes * np.uint64(1000003) + tokens[offset:offset + count]) & MAX_HASH
+    return np.unique(hashes)
+
+
+def trapezoid(y, x):
+    """Integral of y over x by the trapezoid rule"""
+    return ((y[1:] + y[:-1]) * np.diff(x)).sum() / 2
+
+
+def lsh_bands(num_perm, threshold, false_negative_weight=0.9):
+    """(bands, rows) of the LSH banding with the least weighted error around threshold
+
+    A pair with similarity s shares a bucket with probability
+    1 - (1 - s ** rows) ** bands. False positives only cost a comparison of
+    signatures while false negatives are missed merges, so those weigh more.
+    """
+    below = np.linspace(0, threshold, 100)
+    above = np.linspace(threshold, 1, 100)
+
+    def error(option):
+        bands, rows = option
+        false_positives = trapezoid(1 - (1 - below ** rows) ** bands, below)
+        false_negatives = trapezoid((1 - above ** rows) ** bands, above)
+        return (1 - false_negative_weight) * false_positives + false_negative_weight * false_negatives
+
+    options = [(bands, rows) for bands in range(1, num_perm + 1) for rows in range(1, num_perm // bands + 1)]
+    return min(options, key=error)
+
+
+def merge_schemes(schemes):
+    """One scheme from duplicates: the most complete one, its empty fields filled from the others
+
+    source_links lists the links of all of them, the kept scheme's first.
+    """
+    def completeness(scheme):
+        values = [scheme.get(field) for field in MERGED_FIELDS]
+        return sum(1 for value in values if value), sum(len(value) for value in values if value)
+
+    # Stable, so equally complete schemes keep their order
+    ordered = sorted(schemes, key=completeness, reverse=True)
+    merged = dict(ordered[0])
+    for other in ordered[1:]:
+        for field in MERGED_FIELDS:
+            if not merged.get(field) and other.get(field):
+                merged[field] = other[field]
+                # The rules go with the text they were compiled from
+                if field == 'eligibility':
+                    merged['eligibility_rules'] = other.get('eligibility_rules')
+    links = [link for scheme in ordered for link in scheme.get('source_links') or [scheme.get('source_link')]]
+    merged['source_links'] = list(dict.fromkeys(link for link in links if link))
+    return merged
+
+
+class SchemeDeduplicator:
+    """Finds schemes extracted from several PDFs and merges each group into one
+
+    Every scheme gets a MinHash signature over the word 3-grams of its
+    normalized text. LSH banding puts schemes whose signatures agree on a
+    whole band into the same bucket, so only those candidates are compared,
+    and pairs whose estimated Jaccard similarity reaches threshold are
+    merged (transitively). Schemes without any text are left alone.
+    """
+
+    def __init__(self, threshold=DEDUP_THRESHOLD, num_perm=DEDUP_NUM_PERM, seed=1):
+        self.logger = setup_logger("dedup")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = lsh_bands(num_perm, threshold)
+        rng = np.random.RandomState(seed)
+        # Permutations (a * x + b) mod p, as in the usual MinHash construction
+        self.a = rng.randint(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        # Mixes the rows of a band into one hash to sort buckets by
+        self.band_mix = rng.randint(1, MERSENNE_PRIME, self.rows, dtype=np.uint64) | np.uint64(1)
+        self.stats = {'candidates': 0, 'compared': 0, 'merged': 0}
+
+    def signature(self, scheme):
+        """MinHash signature of a scheme, None if it has no text"""
+        hashes = shingle_hashes(normalize(scheme))
+        if not len(hashes):
+            return None
+        return (((hashes[:, None] * self.a + self.b) % MERSENNE_PRIME) & MAX_HASH).min(axis=0)
+
+    def similarity(self, signatures, first, second):
+        """Estimated Jaccard similarity, the share of signature values two schemes agree on"""
+        return float(np.mean(signatures[first] == signatures[second]))
+
+    def candidate_buckets(self, signatures):
+        """Per band, arrays of the indexes whose signatures agree on the whole band (two or more)"""
+        for band in range(self.bands):
+            keys = signatures[:, band * self.rows:(band + 1) * self.rows] @ self.band_mix
+            order = np.argsort(keys, kind='stable')
+            sorted_keys = keys[order]
+            # Boundaries of the runs of equal keys
+            starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+            ends = np.r_[starts[1:], len(order)]
+            for start, end in zip(starts, ends):
+                if end - start > 1:
+                    yield order[start:end]
+
+    def find_groups(self, signatures):
+        """Groups of indexes of near-duplicate signatures, each sorted, groups of one left out"""
+        parent = list(range(len(signatures)))
+
+        def find(idx):
+            while parent[idx] != idx:
+                parent[idx] = parent[parent[idx]]
+                idx = parent[idx]
+            return idx
+
+        compared = set()
+        for bucket in self.candidate_buckets(signatures):
+            self.stats['candidates'] += 1
+            # One member per group found so far is enough to compare a newcomer with
+            representatives = {}
+            for idx in bucket.tolist():
+                root = find(idx)
+                for other_root, other in list(representatives.items()):
+                    if find(other_root) == root or (other, idx) in compared:
+                        continue
+                    compared.add((other, idx))
+                    self.stats['compared'] += 1
+                    if self.similarity(signatures, other, idx) >= self.threshold:
+                        parent[root] = find(other_root)
+                        root = find(idx)
+                representatives.setdefault(root, idx)
+
+        groups = {}
+        for idx in range(len(signatures)):
+            groups.setdefault(find(idx), []).append(idx)
+        return [group for group in groups.values() if len(group) > 1]
+
+    def deduplicate(self, schemes):
+        """Schemes with each group of near-duplicates merged, in the order of each group's first scheme
+
+        Every returned scheme has source_links, the links of all schemes merged into it.
+        """
+        self.stats = {'candidates': 0, 'compared': 0, 'merged': 0}
+        signatures, indexes = [], []
+        for idx, scheme in enumerate(schemes):
+            signature = self.signature(scheme)
+            if signature is not None:
+                signatures.append(signature)
+                indexes.append(idx)
+
+        merged_into = {}
+        if signatures:
+            for group in self.find_groups(np.vstack(signatures)):
+                members = [indexes[idx] for idx in group]
+                merged_into[members[0]] = members
+                for idx in members[1:]:
+                    merged_into[idx] = None
+
+        results = []
+        for idx, scheme in enumerate(schemes):
+            members = merged_into.get(idx, [idx])
+            if members is not None:
+                results.append(merge_schemes([schemes[member] for member in members]))
+        self.stats['merged'] = len(schemes) - len(results)
+        self.logger.info(
+            f"Deduplication: {len(schemes)} schemes, {self.stats['merged']} merged into near-duplicates, "
+            f"{self.stats['compared']} pairs compared in {self.stats['candidates']} candidate buckets"
+        )
+        return results
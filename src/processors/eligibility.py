@@ -0,0 +1,171 @@
+import re
+
+# Farmer categories a scheme can be limited to
+FARMER_CATEGORIES = ('marginal', 'small', 'sc', 'st', 'women')
+# Of those, the ones a land holding's size decides
+HOLDING_CATEGORIES = ('marginal', 'small')
+
+# Upper bounds (hectares) of the marginal and small land holding classes of the agriculture census
+MARGINAL_HOLDING_HECTARES = 1.0
+SMALL_HOLDING_HECTARES = 2.0
+
+HECTARES_PER_ACRE = 0.4047
+
+INDIAN_STATES = [
+    'Andhra Pradesh', 'Arunachal Pradesh', 'Assam', 'Bihar', 'Chhattisgarh', 'Goa', 'Gujarat',
+    'Haryana', 'Himachal Pradesh', 'Jharkhand', 'Karnataka', 'Kerala', 'Madhya Pradesh',
+    'Maharashtra', 'Manipur', 'Meghalaya', 'Mizoram', 'Nagaland', 'Odisha', 'Punjab', 'Rajasthan',
+    'Sikkim', 'Tamil Nadu', 'Telangana', 'Tripura', 'Uttar Pradesh', 'Uttarakhand', 'West Bengal',
+    'Andaman and Nicobar Islands', 'Chandigarh', 'Dadra and Nagar Haveli and Daman and Diu',
+    'Delhi', 'Jammu and Kashmir', 'Ladakh', 'Lakshadweep', 'Puducherry'
+]
+STATE_PATTERN = re.compile(r'\b(' + '|'.join(re.escape(state) for state in INDIAN_STATES) + r')\b', re.IGNORECASE)
+
+# Schemes naming traders, manufacturers and the like but never farmers are closed to farmers
+FARMER_PATTERN = re.compile(r'(?i)\b(?:farmers?|cultivators?|kisans?|land\s*holding|landholding)\b')
+OTHER_APPLICANTS_PATTERN = re.compile(
+    r'(?i)\b(?:manufacturers?|importers?|exporters?|traders?|dealers?|marketers?|companies|institutions?)\b'
+)
+LAND_REQUIRED_PATTERN = re.compile(
+    r'(?i)\b(?:land\s*holding|landholding|cultivable land|own(?:s|ing)? land|land (?:records|documents))\b'
+)
+
+NUMBER = r'(\d+(?:\.\d+)?)'
+LAND_UNIT = r'\s*(hectares?|ha\b|acres?)'
+LAND_PATTERNS = [
+    # (pattern, bound the first number sets); "between" patterns set both
+    (re.compile(r'(?i)between\s+' + NUMBER + r'\s*(?:and|to|-)\s*' + NUMBER + LAND_UNIT), 'both'),
+    (re.compile(r'(?i)(?:up\s*to|not more than|less than|below|under|maximum(?: of)?)\s+' + NUMBER + LAND_UNIT), 'max'),
+    (re.compile(r'(?i)(?:at least|minimum(?: of)?|more than|above|over)\s+' + NUMBER + LAND_UNIT), 'min')
+]
+AGE_PATTERNS = [
+    (re.compile(r'(?i)\bage[ds]?\s+(?:between\s+|of\s+)?(\d+)\s*(?:to|and|-)\s*(\d+)\s*years'), 'both'),
+    (re.compile(r'(?i)\bbetween\s+(\d+)\s*(?:to|and|-)\s*(\d+)\s*years of age'), 'both'),
+    (re.compile(r'(?i)(?:below|under|up\s*to|not more than|maximum age(?: of)?)\s+(\d+)\s*years'), 'max'),
+    (re.compile(r'(?i)(?:above|over|at least|minimum age(?: of)?)\s+(\d+)\s*years'), 'min'),
+    (re.compile(r'(?i)(\d+)\s*years(?: of age)? (?:and|or) (?:above|older)'), 'min')
+]
+CATEGORY_PATTERNS = {
+    'marginal': re.compile(r'(?i)\bmarginal\b'),
+    'small': re.compile(r'(?i)\bsmall\b'),
+    'sc': re.compile(r'\bSC\b|(?i:\bscheduled castes?\b)'),
+    'st': re.compile(r'\bST\b|(?i:\bscheduled tribes?\b|\btribal\b)'),
+    'women': re.compile(r'(?i)\b(?:women|woman|female|mahila)\b')
+}
+# Words before "farmers" at the start of a sentence, e.g. "Small and marginal farmers aged..."
+SUBJECT_PATTERN = re.compile(r'^[\s\-\u2022*]*(?:all\s+)?((?:[\w/]+[\s,]+){0,6}?)farmers?\b', re.IGNORECASE)
+# Sentences about extra benefits or documents for a category do not limit who may apply
+NOT_A_LIMIT_PATTERN = re.compile(
+    r'(?i)\b(?:priority|preference|higher|additional|extra|need to|must provide|required to provide|certificates?)\b'
+)
+EXCLUDED_DISTRICTS_PATTERN = re.compile(r'(?i)\b(?:excluding|except)\s+([^)\.;]+?)\s+districts?\b')
+
+
+def split_sentences(text):
+    """Sentences and bullet points of an eligibility text"""
+    return [part.strip() for part in re.split(r'(?<=[.;])\s+|\n+', text) if part.strip()]
+
+
+def to_hectares(value, unit):
+    value = float(value)
+    return round(value * HECTARES_PER_ACRE, 4) if unit.lower().startswith('acre') else value
+
+
+def find_range(patterns, text, values):
+    """[min, max] from the first match of each kind of pattern, None when none matches
+
+    values turns a match into its numbers; "between" patterns set both ends.
+    """
+    low = high = None
+    for pattern, bound in patterns:
+        match = pattern.search(text)
+        if not match:
+            continue
+        numbers = values(match)
+        if bound == 'both':
+            low = numbers[0] if low is None else low
+            high = numbers[1] if high is None else high
+        elif bound == 'max' and high is None:
+            high = numbers[0]
+        elif bound == 'min' and low is None:
+            low = numbers[0]
+    return None if low is None and high is None else [low, high]
+
+
+def find_land_range(text):
+    """[min, max] land holding in hectares"""
+    return find_range(LAND_PATTERNS, text, lambda match: [
+        to_hectares(number, match.groups()[-1]) for number in match.groups()[:-1]
+    ])
+
+
+def find_age_range(text):
+    """[min, max] age in years"""
+    return find_range(AGE_PATTERNS, text, lambda match: [int(number) for number in match.groups()])
+
+
+def find_categories(text):
+    """Farmer categories named as the subject of a sentence, the scheme is limited to any of them"""
+    categories = set()
+    for sentence in split_sentences(text):
+        if NOT_A_LIMIT_PATTERN.search(sentence):
+            continue
+        match = SUBJECT_PATTERN.match(sentence)
+        if not match:
+            continue
+        categories.update(
+            category for category, pattern in CATEGORY_PATTERNS.items() if pattern.search(match.group(1))
+        )
+    return [category for category in FARMER_CATEGORIES if category in categories]
+
+
+def find_excluded_districts(text):
+    districts = []
+    for match in EXCLUDED_DISTRICTS_PATTERN.finditer(text):
+        names = re.split(r',\s*(?:and\s+)?|\s+and\s+', match.group(1))
+        districts.extend(name.strip() for name in names if name.strip())
+    return districts
+
+
+def compile_eligibility(text):
+    """Structured predicates of an eligibility text
+
+    Returns a JSON-ready dict: whether farmers may apply at all, whether land
+    is required, [min, max] land holding (hectares) and age (years) with None
+    for an open end, the farmer categories and states the scheme is limited
+    to, and excluded districts. Limits the text does not state are None or
+    empty, and a missing text limits nothing.
+    """
+    if not text:
+        return {
+            'farmers': True,
+            'land_required': False,
+            'land_hectares': None,
+            'age': None,
+            'categories': [],
+            'states': [],
+            'excluded_districts': []
+        }
+
+    land_hectares = find_land_range(text)
+    states = {match.group(1).lower(): None for match in STATE_PATTERN.finditer(text)}
+    return {
+        'farmers': bool(FARMER_PATTERN.search(text)) or not OTHER_APPLICANTS_PATTERN.search(text),
+        'land_required': bool(LAND_REQUIRED_PATTERN.search(text)) or bool(land_hectares and land_hectares[0]),
+        'land_hectares': land_hectares,
+        'age': find_age_range(text),
+        'categories': find_categories(text),
+        'states': [state for state in INDIAN_STATES if state.lower() in states],
+        'excluded_districts': find_excluded_districts(text)
+    }
+
+
+def holding_categories(land_hectares):
+    """Land holding classes a holding of this size falls in"""
+    if land_hectares is None or land_hectares <= 0:
+        return []
+    if land_hectares <= MARGINAL_HOLDING_HECTARES:
+        return ['marginal']
+    if land_hectares <= SMALL_HOLDING_HECTARES:
+        return ['small']
+    return []
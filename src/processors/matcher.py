@@ -0,0 +1,180 @@
+import re
+from bisect import bisect_left
+
+
+def literal_prefixes(pattern):
+    """Leading literal words every match of a keyword-led pattern starts with"""
+    body = pattern[4:] if pattern.startswith('(?i)') else pattern
+    alternatives = [body]
+    if body.startswith('(?:'):
+        # Split a leading non-capturing group into its top-level alternatives
+        depth = 0
+        for end, char in enumerate(body):
+            if char == '(':
+                depth += 1
+            elif char == ')':
+                depth -= 1
+                if depth == 0:
+                    break
+        inner = body[3:end]
+        if '(' in inner or body[end + 1:end + 2] in ('?', '*', '{'):
+            raise ValueError(f"Unsupported leading group in pattern: {pattern}")
+        alternatives = inner.split('|')
+
+    prefixes = []
+    for alternative in alternatives:
+        match = re.match(r'[A-Za-z0-9\- ]+', alternative)
+        prefix = match.group(0) if match else ''
+        # A quantifier after the literal makes its last character optional
+        if prefix and alternative[len(prefix):len(prefix) + 1] in ('?', '*', '{'):
+            prefix = prefix[:-1]
+        prefix = prefix.split(' ')[0].lower()
+        if not prefix:
+            raise ValueError(f"Pattern has no leading literal to trigger on: {pattern}")
+        prefixes.append(prefix)
+    return prefixes
+
+
+# Non-ASCII characters that IGNORECASE matches against ASCII letters
+SPECIAL_FOLDS = {0x130: 'i', 0x131: 'i', 0x17f: 's', 0x212a: 'k'}
+ASCII_FOLDS = {code: code + 32 for code in range(ord('A'), ord('Z') + 1)}
+
+
+def fold_case(text):
+    """Lowercase text without changing its length, matching IGNORECASE for ASCII keywords"""
+    folded = text.lower()
+    if len(folded) == len(text) and '\u0131' not in text and '\u017f' not in text:
+        return folded
+    return text.translate({**ASCII_FOLDS, **SPECIAL_FOLDS})
+
+
+class KeywordTrigger:
+    """Finds where any of many keyword-led patterns may start, in one pass per keyword
+
+    Each keyword is located with str.find over case-folded text, which is
+    much faster than an IGNORECASE regex alternation.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = patterns
+        self.keyword_patterns = {}
+        for idx, pattern in enumerate(patterns):
+            for keyword in literal_prefixes(pattern):
+                self.keyword_patterns.setdefault(keyword, []).append(idx)
+
+    def candidates(self, text, start=0, offset=0):
+        """Map pattern index -> sorted candidate positions (plus offset) from text[start:]"""
+        folded = fold_case(text[start:] if start else text)
+        base = start + offset
+        found = [[] for _ in self.patterns]
+        multiple = set()
+        for keyword, indexes in self.keyword_patterns.items():
+            positions = []
+            position = folded.find(keyword)
+            while position != -1:
+                positions.append(position + base)
+                position = folded.find(keyword, position + 1)
+            for idx in indexes:
+                if found[idx]:
+                    multiple.add(idx)
+                found[idx].extend(positions)
+        # Patterns with several leading keywords need their positions merged
+        for idx in multiple:
+            found[idx] = sorted(set(found[idx]))
+        return found
+
+
+def level_from_counts(central_matches, state_matches):
+    """Same decision as PDFProcessor.determine_scheme_level"""
+    if central_matches > state_matches:
+        return "central"
+    elif state_matches > central_matches:
+        return "state"
+    elif central_matches > 0:  # If equal matches but at least one central indicator
+        return "central"
+    return "unspecified"
+
+
+class SectionMatcher:
+    """Finds field sections and level indicators with one keyword pass over the text
+
+    Equivalent to running extract_section for every field and
+    determine_scheme_level, but each pattern is only tried (anchored) at
+    positions where its leading keyword occurs.
+    """
+
+    def __init__(self, field_patterns, central_indicators, state_indicators, max_words=100):
+        self.max_words = max_words
+        self.fields = {}
+        self.anchored = {}
+        keyed = []
+        for field, patterns in field_patterns.items():
+            self.fields[field] = []
+            for pattern in patterns:
+                regex = re.compile(pattern, re.IGNORECASE | re.DOTALL)
+                if pattern.startswith('^'):
+                    self.fields[field].append((regex, None))
+                else:
+                    self.fields[field].append((regex, len(keyed)))
+                    keyed.append(pattern)
+
+        self.indicators = []
+        for level, patterns in (('central', central_indicators), ('state', state_indicators)):
+            for pattern in patterns:
+                self.indicators.append((level, pattern, re.compile(pattern), len(keyed)))
+                keyed.append(pattern)
+
+        self.trigger = KeywordTrigger(keyed)
+
+    def find(self, regex, positions, text, pos):
+        """Leftmost match of regex at or after pos, trying only candidate positions"""
+        if positions is None:
+            # '^' without MULTILINE only matches at the start
+            return regex.match(text) if pos == 0 else None
+        for candidate in positions[bisect_left(positions, pos):]:
+            match = regex.match(text, candidate)
+            if match:
+                return match
+        return None
+
+    def clean(self, content):
+        """extract_section's cleaning, None if the content is too long"""
+        content = re.sub(r'\s+', ' ', content).strip()
+        return content if len(content.split()) <= self.max_words else None
+
+    def scan(self, text):
+        """Return field contents with their spans and the level indicator spans and counts"""
+        candidates = self.trigger.candidates(text)
+        report = {'fields': {}, 'indicators': {'central': {}, 'state': {}}}
+
+        for field, patterns in self.fields.items():
+            report['fields'][field] = {'content': None, 'pattern': None, 'span': None}
+            for pattern_idx, (regex, key) in enumerate(patterns):
+                positions = None if key is None else candidates[key]
+                match, pos = None, 0
+                # Replay finditer: resume after each rejected match
+                while True:
+                    match = self.find(regex, positions, text, pos)
+                    if match is None:
+                        break
+                    group = 1 if regex.groups > 0 else 0
+                    content = self.clean(match.group(group))
+                    if content is not None:
+                        break
+                    pos = match.end() if match.end() > match.start() else match.end() + 1
+                if match is not None:
+                    report['fields'][field] = {
+                        'content': content,
+                        'pattern': pattern_idx,
+                        'span': match.span(group)
+                    }
+                    break
+
+        for level, pattern, regex, key in self.indicators:
+            match = self.find(regex, candidates[key], text, 0)
+            if match:
+                report['indicators'][level][pattern] = match.span()
+
+        report['counts'] = {level: len(spans) for level, spans in report['indicators'].items()}
+        report['level'] = level_from_counts(report['counts']['central'], report['counts']['state'])
+        return report
@@ -1,42 +1,221 @@
 import PyPDF2
 import re
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from importlib import metadata
 from pathlib import Path
 from src.utils.logger import setup_logger
-from config import PDF_DIR
+from src.processors.cache import ProcessingCache
+from src.processors.sections import PageStreamExtractor
+from src.processors.matcher import SectionMatcher
+from src.processors.eligibility import compile_eligibility
+from config import (
+    PDF_DIR, PROCESSOR_WORKERS, PDF_PAGE_CHUNK_SIZE, PROCESSOR_CACHE_DIR, NLP_MODE, NLP_BATCH_SIZE
+)
 import spacy
 
+# Bump when text extraction or structuring logic changes, to invalidate cached results
+PROCESSOR_VERSION = "1"
+
+# Enhanced patterns for each field
+FIELD_PATTERNS = {
+    'scheme_name': [
+        r'(?i)scheme\s+name[:\s]+(.*?)(?=\n|$)',
+        r'(?i)name of (?:the\s+)?scheme[:\s]+(.*?)(?=\n|$)',
+        r'^([^.\n]+(?:scheme|yojana|program))[.\n]'
+    ],
+    'eligibility': [
+        r'(?i)eligibility[:\s]+(.*?)(?=\n\n|$)',
+        r'(?i)who can apply[?\s:]+(.*?)(?=\n\n|$)',
+        r'(?i)eligible[^:\n]*:[:\s]+(.*?)(?=\n\n|$)'
+    ],
+    'benefits': [
+        r'(?i)benefits[:\s]+(.*?)(?=\n\n|$)',
+        r'(?i)assistance provided[:\s]+(.*?)(?=\n\n|$)',
+        r'(?i)financial assistance[:\s]+(.*?)(?=\n\n|$)'
+    ],
+    'application_process': [
+        r'(?i)(?:how to apply|application process)[:\s]+(.*?)(?=\n\n|$)',
+        r'(?i)procedure for application[:\s]+(.*?)(?=\n\n|$)',
+        r'(?i)application procedure[:\s]+(.*?)(?=\n\n|$)'
+    ],
+    'deadline': [
+        r'(?i)(?:last date|deadline)[:\s]+(.*?)(?=\n|$)',
+        r'(?i)submission deadline[:\s]+(.*?)(?=\n|$)',
+        r'(?i)apply before[:\s]+(.*?)(?=\n|$)'
+    ],
+    'category': [
+        r'(?i)category[:\s]+(.*?)(?=\n|$)',
+        r'(?i)type of scheme[:\s]+(.*?)(?=\n|$)',
+        r'(?i)scheme type[:\s]+(.*?)(?=\n|$)'
+    ]
+}
+
+CENTRAL_INDICATORS = [
+    r'(?i)central(\s+sector)?\s+scheme',
+    r'(?i)government\s+of\s+india',
+    r'(?i)ministry\s+of',
+    r'(?i)pradhan\s+mantri',
+    r'(?i)national\s+scheme',
+    r'(?i)centrally\s+sponsored',
+    r'(?i)PMKSY',  # Add specific scheme abbreviations
+    r'(?i)PM-KISAN',
+    r'(?i)union government',
+    r'(?i)niti aayog',
+    r'(?i)department of agriculture',
+    r'(?i)ministry of agriculture',
+    r'(?i)goi scheme',
+    r'(?i)central assistance',
+    r'(?i)central government'
+]
+
+STATE_INDICATORS = [
+    r'(?i)state(\s+sector)?\s+scheme',
+    r'(?i)state\s+government',
+    r'(?i)mukhya\s+mantri',
+    r'(?i)state\s+sponsored',
+    r'(?i)state level',
+    r'(?i)state department',
+    r'(?i)state agriculture department',
+    r'(?i)state sponsored scheme'
+]
+
+# Changes whenever any pattern changes, so cached scheme data is restructured
+PATTERN_VERSION = hashlib.sha256(
+    json.dumps([FIELD_PATTERNS, CENTRAL_INDICATORS, STATE_INDICATORS]).encode('utf-8')
+).hexdigest()[:16]
+
+SPACY_MODEL = "en_core_web_sm"
+NLP_MODES = ('full', 'senter', 'sentencizer')
+# Components the light modes never load, they only need sentence boundaries
+UNUSED_COMPONENTS = ['tok2vec', 'tagger', 'parser', 'attribute_ruler', 'lemmatizer', 'ner']
+# Characters around the first scheme name mention that the light modes segment
+DESCRIPTION_WINDOW = 2000
+
+def load_nlp(mode):
+    """Load the spaCy pipeline for one of NLP_MODES"""
+    if mode not in NLP_MODES:
+        raise ValueError(f"Unsupported NLP mode: {mode}. Supported modes: {', '.join(NLP_MODES)}")
+    if mode == 'full':
+        return spacy.load(SPACY_MODEL)
+
+    if mode == 'senter':
+        nlp = spacy.load(SPACY_MODEL, exclude=UNUSED_COMPONENTS)
+        if 'senter' in nlp.disabled:
+            nlp.enable_pipe('senter')
+    else:
+        nlp = spacy.blank("en")
+    # Models without a sentence recognizer fall back to the rule-based one
+    if not nlp.has_pipe('senter') and not nlp.has_pipe('sentencizer'):
+        nlp.add_pipe('sentencizer')
+    return nlp
+
+def pipeline_version(mode):
+    """Name and version of the pipeline a mode loads, read from package metadata without loading it"""
+    if mode == 'sentencizer':
+        return f"blank-{spacy.__version__}"
+    try:
+        return f"{SPACY_MODEL}-{metadata.version(SPACY_MODEL)}"
+    except metadata.PackageNotFoundError:
+        return f"{SPACY_MODEL}-missing"
+
+# Processor owned by each pool worker, so spaCy loads once per process
+_worker_processor = None
+
+def _init_worker(nlp_mode):
+    global _worker_processor
+    _worker_processor = PDFProcessor(cache_dir=None, nlp_mode=nlp_mode)
+
+def _process_pdf(pdf_path):
+    return _worker_processor.extract_and_structure(pdf_path)
+
+def _extract_pages(pdf_path, start, stop):
+    return _worker_processor.extract_pages_from_pdf(pdf_path, start, stop)
+
+def _structure_pages(pages):
+    return _worker_processor.structure_pages(pages)
+
 class PDFProcessor:
-    def __init__(self):
+    def __init__(self, cache_dir=PROCESSOR_CACHE_DIR, nlp_mode=NLP_MODE):
         self.logger = setup_logger("pdf_processor")
         self.pdf_dir = PDF_DIR
-        # Load spaCy model for better text processing
-        self.nlp = spacy.load("en_core_web_sm")
-        
+        if nlp_mode not in NLP_MODES:
+            raise ValueError(f"Unsupported NLP mode: {nlp_mode}. Supported modes: {', '.join(NLP_MODES)}")
+        self.nlp_mode = nlp_mode
+        # spaCy pipeline, loaded on first use: in pool mode only the workers describe schemes
+        self._nlp = None
+        self.nlp_lock = threading.Lock()
+        # All field and level patterns, compiled once and matched in a single keyword pass
+        self.matcher = SectionMatcher(FIELD_PATTERNS, CENTRAL_INDICATORS, STATE_INDICATORS)
+        # Cache of previous runs keyed by PDF content, None disables it
+        self.cache = None
+        if cache_dir:
+            structure_version = f"{PATTERN_VERSION}:{pipeline_version(nlp_mode)}:{nlp_mode}"
+            if nlp_mode != 'full':
+                structure_version += f"-{DESCRIPTION_WINDOW}"
+            self.cache = ProcessingCache(cache_dir, PROCESSOR_VERSION, structure_version)
+        # PDF path -> content hash from its cache lookup, so pruning doesn't read the PDFs again
+        self.content_hashes = {}
+
+    @property
+    def nlp(self):
+        """The spaCy pipeline of nlp_mode, loaded the first time it is needed"""
+        with self.nlp_lock:
+            if self._nlp is None:
+                start = time.perf_counter()
+                self._nlp = load_nlp(self.nlp_mode)
+                self.logger.info(
+                    f"Loaded spaCy pipeline ({self.nlp_mode}: {', '.join(self._nlp.pipe_names)}) "
+                    f"in {time.perf_counter() - start:.2f}s"
+                )
+            return self._nlp
+
+    def iter_pages(self, pdf_path, start=0, stop=None):
+        """Yield cleaned page texts of a PDF (optionally a page range) one at a time"""
+        with open(pdf_path, 'rb') as file:
+            reader = PyPDF2.PdfReader(file)
+            for page in reader.pages[start:stop]:
+                # Basic text cleaning
+                yield self.clean_text(page.extract_text())
+
+    def extract_pages_from_pdf(self, pdf_path, start=0, stop=None):
+        """Extract cleaned page texts from a PDF file (optionally a page range)"""
+        try:
+            pages = list(self.iter_pages(pdf_path, start, stop))
+            self.logger.info(f"Successfully extracted text from {pdf_path.name}")
+            return pages
+
+        except Exception as e:
+            self.logger.error(f"Failed to extract text from {pdf_path.name}: {str(e)}")
+            return None
+
+    def join_pages(self, pages):
+        """Join page texts into the document text, one line break after each page"""
+        return "".join(page + "\n" for page in pages)
+
     def extract_text_from_pdf(self, pdf_path):
         """Extract text from a PDF file with improved cleaning"""
+        pages = self.extract_pages_from_pdf(pdf_path)
+        return self.join_pages(pages) if pages is not None else None
+
+    def count_pages(self, pdf_path):
+        """Get the page count of a PDF, or None if it can't be read"""
         try:
             with open(pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                text = ""
-                
-                for page in reader.pages:
-                    page_text = page.extract_text()
-                    # Basic text cleaning
-                    page_text = self.clean_text(page_text)
-                    text += page_text + "\n"
-                    
-                self.logger.info(f"Successfully extracted text from {pdf_path.name}")
-                return text
-                
+                return len(PyPDF2.PdfReader(file).pages)
         except Exception as e:
-            self.logger.error(f"Failed to extract text from {pdf_path.name}: {str(e)}")
+            self.logger.error(f"Failed to read {pdf_path.name}: {str(e)}")
             return None
 
     def clean_text(self, text):
         """Clean extracted text"""
         if not text:
             return ""
-            
+
         # Remove multiple spaces
         text = re.sub(r'\s+', ' ', text)
         # Remove multiple newlines
@@ -46,7 +225,10 @@ class PDFProcessor:
         return text.strip()
 
     def extract_section(self, text, section_patterns, max_words=100):
-        """Extract section content using multiple patterns"""
+        """Extract section content using multiple patterns
+
+        Reference for SectionMatcher, which structure_scheme_data uses instead.
+        """
         for pattern in section_patterns:
             matches = re.finditer(pattern, text, re.IGNORECASE | re.DOTALL)
             for match in matches:
@@ -59,40 +241,14 @@ class PDFProcessor:
         return None
 
     def determine_scheme_level(self, text):
-        """Determine if scheme is Central or State level"""
-        central_indicators = [
-            r'(?i)central(\s+sector)?\s+scheme',
-            r'(?i)government\s+of\s+india',
-            r'(?i)ministry\s+of',
-            r'(?i)pradhan\s+mantri',
-            r'(?i)national\s+scheme',
-            r'(?i)centrally\s+sponsored',
-            r'(?i)PMKSY',  # Add specific scheme abbreviations
-            r'(?i)PM-KISAN',
-            r'(?i)union government',
-            r'(?i)niti aayog',
-            r'(?i)department of agriculture',
-            r'(?i)ministry of agriculture',
-            r'(?i)goi scheme',
-            r'(?i)central assistance',
-            r'(?i)central government'
-        ]
-        
-        state_indicators = [
-            r'(?i)state(\s+sector)?\s+scheme',
-            r'(?i)state\s+government',
-            r'(?i)mukhya\s+mantri',
-            r'(?i)state\s+sponsored',
-            r'(?i)state level',
-            r'(?i)state department',
-            r'(?i)state agriculture department',
-            r'(?i)state sponsored scheme'
-        ]
-        
+        """Determine if scheme is Central or State level
+
+        Reference for SectionMatcher, which structure_scheme_data uses instead.
+        """
         # Check for central scheme indicators with confidence score
-        central_matches = sum(1 for pattern in central_indicators if re.search(pattern, text))
-        state_matches = sum(1 for pattern in state_indicators if re.search(pattern, text))
-        
+        central_matches = sum(1 for pattern in CENTRAL_INDICATORS if re.search(pattern, text))
+        state_matches = sum(1 for pattern in STATE_INDICATORS if re.search(pattern, text))
+
         # Determine level based on matches
         if central_matches > state_matches:
             return "central"
@@ -100,10 +256,10 @@ class PDFProcessor:
             return "state"
         elif central_matches > 0:  # If equal matches but at least one central indicator
             return "central"
-        
+
         return "unspecified"
 
-    def structure_scheme_data(self, text):
+    def structure_scheme_data(self, text, describe=True):
         """Structure the extracted text with improved patterns"""
         scheme_data = {
             'scheme_name': None,
@@ -116,80 +272,376 @@ class PDFProcessor:
             'source_link': None,
             'category': None
         }
-        
-        # Enhanced patterns for each field
-        patterns = {
-            'scheme_name': [
-                r'(?i)scheme\s+name[:\s]+(.*?)(?=\n|$)',
-                r'(?i)name of (?:the\s+)?scheme[:\s]+(.*?)(?=\n|$)',
-                r'^([^.\n]+(?:scheme|yojana|program))[.\n]'
-            ],
-            'eligibility': [
-                r'(?i)eligibility[:\s]+(.*?)(?=\n\n|$)',
-                r'(?i)who can apply[?\s:]+(.*?)(?=\n\n|$)',
-                r'(?i)eligible[^:\n]*:[:\s]+(.*?)(?=\n\n|$)'
-            ],
-            'benefits': [
-                r'(?i)benefits[:\s]+(.*?)(?=\n\n|$)',
-                r'(?i)assistance provided[:\s]+(.*?)(?=\n\n|$)',
-                r'(?i)financial assistance[:\s]+(.*?)(?=\n\n|$)'
-            ],
-            'application_process': [
-                r'(?i)(?:how to apply|application process)[:\s]+(.*?)(?=\n\n|$)',
-                r'(?i)procedure for application[:\s]+(.*?)(?=\n\n|$)',
-                r'(?i)application procedure[:\s]+(.*?)(?=\n\n|$)'
-            ],
-            'deadline': [
-                r'(?i)(?:last date|deadline)[:\s]+(.*?)(?=\n|$)',
-                r'(?i)submission deadline[:\s]+(.*?)(?=\n|$)',
-                r'(?i)apply before[:\s]+(.*?)(?=\n|$)'
-            ],
-            'category': [
-                r'(?i)category[:\s]+(.*?)(?=\n|$)',
-                r'(?i)type of scheme[:\s]+(.*?)(?=\n|$)',
-                r'(?i)scheme type[:\s]+(.*?)(?=\n|$)'
-            ]
-        }
-        
+
         # Extract information using enhanced patterns
-        for field, field_patterns in patterns.items():
-            content = self.extract_section(text, field_patterns)
-            if content:
-                scheme_data[field] = content
+        report = self.matcher.scan(text)
+        for field, found in report['fields'].items():
+            if found['content']:
+                scheme_data[field] = found['content']
 
         # Extract description using NLP
-        if scheme_data['scheme_name']:
-            doc = self.nlp(text)
-            # Get first few sentences after scheme name
-            desc_sentences = []
-            found_name = False
-            for sent in doc.sents:
-                if scheme_data['scheme_name'].lower() in sent.text.lower():
-                    found_name = True
-                    continue
-                if found_name and len(desc_sentences) < 3:
-                    desc_sentences.append(sent.text)
-            if desc_sentences:
-                scheme_data['description'] = ' '.join(desc_sentences)
+        if describe and scheme_data['scheme_name']:
+            scheme_data['description'] = self.describe(text, scheme_data['scheme_name'])
 
         # Add scheme level determination
-        scheme_data['scheme_level'] = self.determine_scheme_level(text)
+        scheme_data['scheme_level'] = report['level']
+
+        return scheme_data
+
+    def describe(self, text, scheme_name):
+        """Take the first few sentences after the one naming the scheme"""
+        return self.describe_many([(text, scheme_name)])[0]
+
+    def describe_many(self, documents):
+        """Describe (text, scheme_name) pairs, segmenting them together with nlp.pipe"""
+        documents = [(text, scheme_name, False) for text, scheme_name in documents]
+        return [description for description, _ in self.describe_texts(documents)]
+
+    def describe_texts(self, documents):
+        """Return (description, final) for (text, scheme_name, partial) triples
+
+        More text may follow a partial text, so its end is treated like the
+        edge of a window: final is False while the description still needs
+        sentences that the rest of the document could extend or add.
+        """
+        if not documents:
+            return []
+        start = time.perf_counter()
+        descriptions = [(None, True)] * len(documents)
+        pending = list(range(len(documents)))
+        window = DESCRIPTION_WINDOW
+        while pending:
+            windows = [self.description_window(*documents[idx][:2], window) for idx in pending]
+            docs = self.nlp.pipe((text for text, _ in windows), batch_size=NLP_BATCH_SIZE)
+            retry = []
+            for idx, (_, truncated), doc in zip(pending, windows, docs):
+                sentences = [sent.text for sent in doc.sents]
+                partial = documents[idx][2]
+                if truncated or partial:
+                    # The window, or the end of the text read so far, may cut the last sentence short
+                    sentences = sentences[:-1]
+                desc_sentences = self.sentences_after_name(sentences, documents[idx][1])
+                if truncated and len(desc_sentences) < 3:
+                    retry.append(idx)
+                elif partial and len(desc_sentences) < 3:
+                    descriptions[idx] = (None, False)
+                else:
+                    descriptions[idx] = (' '.join(desc_sentences) if desc_sentences else None, True)
+            # Widen the window for documents whose description ran past it
+            pending = retry
+            window *= 4
+
+        self.logger.info(f"Described {len(documents)} document(s) in {time.perf_counter() - start:.2f}s")
+        return descriptions
+
+    def description_window(self, text, scheme_name, window):
+        """Return (text to segment, truncated), the whole text in full mode
+
+        Light modes take the text from shortly before the first scheme name
+        mention to window characters after it.
+        """
+        if self.nlp_mode == 'full':
+            return text, False
+        offset = text.lower().find(scheme_name.lower())
+        if offset == -1:
+            # No sentence can name the scheme
+            return "", False
+        start = max(text.rfind('\n', 0, offset) + 1, offset - window)
+        end = offset + len(scheme_name) + window
+        return text[start:end], end < len(text)
+
+    def sentences_after_name(self, sentences, scheme_name):
+        """First few sentences after the one naming the scheme"""
+        # Get first few sentences after scheme name
+        desc_sentences = []
+        found_name = False
+        for sent in sentences:
+            if scheme_name.lower() in sent.lower():
+                found_name = True
+                continue
+            if found_name and len(desc_sentences) < 3:
+                desc_sentences.append(sent)
+        return desc_sentences
+
+    def structure_page_stream(self, pages, describe=True):
+        """Structure page texts as they arrive, stopping once no later page can change the result
+
+        Gives the same scheme data as structure_scheme_data on the joined text.
+        Returns (scheme_data, pages_read, complete), complete being False when
+        the remaining pages were never read. scheme_data is None without pages.
+        """
+        extractor = PageStreamExtractor(FIELD_PATTERNS, CENTRAL_INDICATORS, STATE_INDICATORS)
+        complete = True
+        description = None
+        for page in pages:
+            extractor.feed(page)
+            if not extractor.done:
+                continue
+            name = extractor.field_value('scheme_name')[1]
+            if describe and name:
+                # The description's last sentence may run on into the next page
+                description, final = self.describe_texts([(self.join_pages(extractor.pages), name, True)])[0]
+                if not final:
+                    extractor.widen_description()
+                    continue
+            complete = False
+            break
+        else:
+            extractor.finish()
+
+        if not extractor.pages:
+            return None, extractor.pages, complete
+
+        scheme_data = {
+            'scheme_name': None,
+            'scheme_level': None,
+            'description': None,
+            'eligibility': None,
+            'benefits': None,
+            'application_process': None,
+            'deadline': None,
+            'source_link': None,
+            'category': None
+        }
+        for field in FIELD_PATTERNS:
+            _, content = extractor.field_value(field)
+            if content:
+                scheme_data[field] = content
 
+        if describe and scheme_data['scheme_name']:
+            scheme_data['description'] = description if not complete else self.describe(
+                self.join_pages(extractor.pages), scheme_data['scheme_name']
+            )
+
+        scheme_data['scheme_level'] = extractor.level_scanner.level()
+        return scheme_data, extractor.pages, complete
+
+    def structure_pages(self, pages):
+        """Structure extracted pages, returning None if there are none"""
+        return self.structure_page_stream(pages)[0]
+
+    def read_and_structure(self, pdf_path, describe=True):
+        """Stream and structure a PDF, returning (scheme_data, pages_read, complete)
+
+        Like structure_page_stream, with scheme_data None if extraction failed.
+        """
+        start = time.perf_counter()
+        try:
+            scheme_data, pages, complete = self.structure_page_stream(self.iter_pages(pdf_path), describe)
+        except Exception as e:
+            self.logger.error(f"Failed to extract text from {pdf_path.name}: {str(e)}")
+            return None, [], False
+
+        elapsed = time.perf_counter() - start
+        if complete:
+            self.logger.info(f"Successfully extracted text from {pdf_path.name} in {elapsed:.2f}s")
+        else:
+            self.logger.info(
+                f"Successfully extracted text from {pdf_path.name} in {elapsed:.2f}s, "
+                f"all fields found after {len(pages)} pages"
+            )
+        return scheme_data, pages, complete
+
+    def extract_and_structure(self, pdf_path):
+        """Stream and structure a PDF without the cache, returning (pages, scheme_data)
+
+        pages is None when extraction stopped early or failed.
+        """
+        scheme_data, pages, complete = self.read_and_structure(pdf_path)
+        return (pages if complete else None), scheme_data
+
+    def finish_scheme(self, pdf_path, content_hash, pages, scheme_data):
+        """Cache a freshly structured result and attach the source link and eligibility rules
+
+        pages may be None when only part of the document was read.
+        """
+        if content_hash and scheme_data is not None:
+            self.cache.store(content_hash, pdf_path, pages, scheme_data)
+        if scheme_data is None:
+            return None
+        scheme_data = dict(scheme_data)
+        scheme_data['source_link'] = f"https://agriwelfare.gov.in/en/Major/{pdf_path.name}"
+        # Compiled after the cache, so rule changes apply without reprocessing PDFs
+        scheme_data['eligibility_rules'] = compile_eligibility(scheme_data.get('eligibility'))
         return scheme_data
-        
-    def process_all_pdfs(self):
-        """Process all PDFs in the directory"""
-        processed_data = []
-        
-        for pdf_file in self.pdf_dir.glob('*.pdf'):
-            self.logger.info(f"Processing {pdf_file.name}")
-            
-            # Extract text
-            text = self.extract_text_from_pdf(pdf_file)
-            if text:
-                # Structure data
-                scheme_data = self.structure_scheme_data(text)
-                scheme_data['source_link'] = f"https://agriwelfare.gov.in/en/Major/{pdf_file.name}"
-                processed_data.append(scheme_data)
-                
-        return processed_data 
\ No newline at end of file
+
+    def lookup_cache(self, pdf_path):
+        """Get (content_hash, cached_pages, cached_scheme_data) for a PDF"""
+        if not self.cache:
+            return None, None, None
+        content_hash = self.cache.content_hash(pdf_path)
+        self.content_hashes[pdf_path] = content_hash
+        pages, scheme_data = self.cache.lookup(content_hash, pdf_path)
+        return content_hash, pages, scheme_data
+
+    def prepare_pdf(self, pdf_path):
+        """Extract and structure a PDF, leaving its description to describe_many
+
+        Returns (content_hash, pages, scheme_data, text), text being the
+        document text still to describe or None when scheme_data is final.
+        The text is only the pages read when pages is None.
+        """
+        self.logger.info(f"Processing {pdf_path.name}")
+
+        content_hash, pages, scheme_data = self.lookup_cache(pdf_path)
+        if scheme_data is not None:
+            return None, pages, scheme_data, None
+
+        # Extract text unless this exact file was extracted before
+        if pages is None:
+            scheme_data, read, complete = self.read_and_structure(pdf_path, describe=False)
+            pages = read if complete else None
+        else:
+            # Structure data
+            scheme_data, read, _ = self.structure_page_stream(pages, describe=False)
+
+        text = self.join_pages(read if pages is None else pages) if scheme_data and scheme_data['scheme_name'] else None
+        return content_hash, pages, scheme_data, text
+
+    def process_pdf(self, pdf_path):
+        """Extract and structure a single PDF, returning None if it has no text"""
+        return self.process_pdfs([pdf_path])[0]
+
+    def process_pdfs(self, pdf_files, batch_size=NLP_BATCH_SIZE):
+        """Process PDFs in this process, describing each batch with one nlp.pipe call"""
+        results = []
+        for batch_start in range(0, len(pdf_files), batch_size):
+            batch = pdf_files[batch_start:batch_start + batch_size]
+            prepared = [self.prepare_pdf(pdf_file) for pdf_file in batch]
+
+            pending = [
+                (pdf_file, scheme_data, text, pages is None)
+                for pdf_file, (_, pages, scheme_data, text) in zip(batch, prepared) if text is not None
+            ]
+            described = self.describe_texts(
+                [(text, scheme_data['scheme_name'], partial) for _, scheme_data, text, partial in pending]
+            )
+            # Descriptions that may run past the pages read come from the whole document
+            unfinished = [idx for idx, (_, final) in enumerate(described) if not final]
+            descriptions = self.describe_many([
+                (self.join_pages(self.iter_pages(pending[idx][0])), pending[idx][1]['scheme_name'])
+                for idx in unfinished
+            ])
+            for idx, description in zip(unfinished, descriptions):
+                described[idx] = (description, True)
+            for (_, scheme_data, _, _), (description, _) in zip(pending, described):
+                scheme_data['description'] = description
+
+            for pdf_file, (content_hash, pages, scheme_data, _) in zip(batch, prepared):
+                results.append(self.finish_scheme(pdf_file, content_hash, pages, scheme_data))
+        return results
+
+    def process_all_pdfs(self, workers=None):
+        """Process all PDFs in the directory, in file name order"""
+        pdf_files = sorted(self.pdf_dir.glob('*.pdf'))
+        workers = PROCESSOR_WORKERS if workers is None else workers
+        self.content_hashes = {}
+
+        if workers > 1 and len(pdf_files) > 1:
+            results = self.process_in_pool(pdf_files, workers)
+        else:
+            results = self.process_pdfs(pdf_files)
+
+        if self.cache:
+            self.cache.prune({
+                self.content_hashes.get(pdf_file) or self.cache.content_hash(pdf_file) for pdf_file in pdf_files
+            })
+            stats = self.cache.stats
+            self.logger.info(
+                f"Cache: {stats['hits']} hits, {stats['page_hits']} page-only hits, "
+                f"{stats['misses']} misses, {stats['bytes_saved']} PDF bytes not re-extracted, "
+                f"{stats['evicted']} evicted"
+            )
+
+        return [scheme_data for scheme_data in results if scheme_data]
+
+    def create_pool(self, workers):
+        """Worker processes with a processor of their own, loaded once per process"""
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self.nlp_mode,))
+
+    def process_pdf_in_pool(self, pdf_path, pool):
+        """Like process_pdf, extracting and structuring in a worker of a pool from create_pool
+
+        Unlike process_in_pool, long documents are not split into page chunks.
+        """
+        content_hash, pages, scheme_data = self.lookup_cache(pdf_path)
+        if scheme_data is not None:
+            return self.finish_scheme(pdf_path, None, pages, scheme_data)
+        self.logger.info(f"Processing {pdf_path.name}")
+        if pages is not None:
+            scheme_data = pool.submit(_structure_pages, pages).result()
+        else:
+            pages, scheme_data = pool.submit(_process_pdf, pdf_path).result()
+        return self.finish_scheme(pdf_path, content_hash, pages, scheme_data)
+
+    def process_in_pool(self, pdf_files, workers, chunk_size=PDF_PAGE_CHUNK_SIZE):
+        """Process PDFs across worker processes, splitting long documents into page chunks
+
+        Cache lookups and writes stay in this process. At most two tasks per
+        worker are in flight, so only a bounded amount of extracted text is
+        held at once. Results keep the order of pdf_files.
+        """
+        results = [None] * len(pdf_files)
+        content_hashes = [None] * len(pdf_files)
+        document_pages = {}
+        chunk_pages = {}
+        tasks = deque()
+
+        for idx, pdf_file in enumerate(pdf_files):
+            content_hash, pages, scheme_data = self.lookup_cache(pdf_file)
+            content_hashes[idx] = content_hash
+            if scheme_data is not None:
+                results[idx] = self.finish_scheme(pdf_file, None, pages, scheme_data)
+                continue
+            if pages is not None:
+                document_pages[idx] = pages
+                tasks.append((_structure_pages, (pages,), idx, None))
+                continue
+
+            page_count = self.count_pages(pdf_file)
+            if page_count and page_count > chunk_size:
+                self.logger.info(f"Processing {pdf_file.name} in {-(-page_count // chunk_size)} page chunks")
+                starts = range(0, page_count, chunk_size)
+                chunk_pages[idx] = [None] * len(starts)
+                for chunk, start in enumerate(starts):
+                    tasks.append((_extract_pages, (pdf_file, start, start + chunk_size), idx, chunk))
+            else:
+                tasks.append((_process_pdf, (pdf_file,), idx, None))
+
+        with self.create_pool(workers) as pool:
+            in_flight = {}
+            while tasks or in_flight:
+                while tasks and len(in_flight) < workers * 2:
+                    func, args, idx, chunk = tasks.popleft()
+                    in_flight[pool.submit(func, *args)] = (func, idx, chunk)
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    func, idx, chunk = in_flight.pop(future)
+                    pdf_file = pdf_files[idx]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        self.logger.error(f"Failed to process {pdf_file.name}: {str(e)}")
+                        chunk_pages.pop(idx, None)
+                        document_pages.pop(idx, None)
+                        continue
+
+                    if func is _process_pdf:
+                        pages, scheme_data = result
+                        results[idx] = self.finish_scheme(pdf_file, content_hashes[idx], pages, scheme_data)
+                    elif func is _structure_pages:
+                        pages = document_pages.pop(idx)
+                        results[idx] = self.finish_scheme(pdf_file, content_hashes[idx], pages, result)
+                    # Drop the document if a chunk failed, like a failed serial extraction
+                    elif result is None or idx not in chunk_pages:
+                        chunk_pages.pop(idx, None)
+                    else:
+                        chunk_pages[idx][chunk] = result
+                        if all(pages is not None for pages in chunk_pages[idx]):
+                            pages = [page for chunk_result in chunk_pages.pop(idx) for page in chunk_result]
+                            document_pages[idx] = pages
+                            # Run ahead of queued extraction to free the held pages sooner
+                            tasks.appendleft((_structure_pages, (pages,), idx, None))
+
+        return results
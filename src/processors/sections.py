@@ -0,0 +1,306 @@
+import re
+from bisect import bisect_left
+from src.processors.matcher import KeywordTrigger, level_from_counts
+
+# Characters before the end of the stream that are searched again when the
+# next page arrives, so headings split across a page break are still found
+OVERLAP = 256
+
+# Content tails used by the section patterns, see FIELD_PATTERNS
+LINE_TAIL = r'(.*?)(?=\n|$)'
+PARAGRAPH_TAIL = r'(.*?)(?=\n\n|$)'
+
+
+class StreamText:
+    """The tail of a page stream that scanners still need, addressed by global offsets"""
+
+    def __init__(self):
+        self.text = ""
+        self.start = 0
+        self.complete = False
+
+    @property
+    def end(self):
+        return self.start + len(self.text)
+
+    def append(self, chunk):
+        self.text += chunk
+
+    def trim(self, offset):
+        """Drop text before a global offset"""
+        if offset > self.start:
+            self.text = self.text[offset - self.start:]
+            self.start = offset
+
+
+class SectionScanner:
+    """Replays re.finditer for one section pattern over a growing page stream
+
+    Each pattern is a heading followed by a lazy content group that stops at a
+    line break (or blank line). Matches are only accepted once more text can no
+    longer change them, so the outcome equals extract_section on the full text.
+    """
+
+    def __init__(self, pattern, max_words=100):
+        self.max_words = max_words
+        self.anchored = pattern.startswith('^')
+        if self.anchored:
+            self.regex = re.compile(pattern, re.IGNORECASE | re.DOTALL)
+        elif pattern.endswith(PARAGRAPH_TAIL):
+            self.regex = re.compile(pattern[:-len(PARAGRAPH_TAIL)], re.IGNORECASE | re.DOTALL)
+            self.terminator = '\n\n'
+        elif pattern.endswith(LINE_TAIL):
+            self.regex = re.compile(pattern[:-len(LINE_TAIL)], re.IGNORECASE | re.DOTALL)
+            self.terminator = '\n'
+        else:
+            raise ValueError(f"Unsupported section pattern for streaming: {pattern}")
+
+        # Global offsets where the heading's keyword occurs, filled by PageStreamExtractor
+        self.positions = []
+        self.state = 'searching'
+        self.pos = 0
+        self.content_start = None
+        self.scanned = None
+        self.overflow = False
+        self.result = None
+
+    @property
+    def settled(self):
+        return self.state in ('matched', 'exhausted')
+
+    @property
+    def needed(self):
+        """Earliest global offset this scanner may still read"""
+        if self.state == 'searching':
+            return self.pos
+        if self.state == 'content':
+            if self.overflow:
+                return self.scanned - len(self.terminator) + 1
+            return self.content_start
+        return None
+
+    @property
+    def head_pattern(self):
+        """The heading part that the keyword trigger needs, None when anchored"""
+        return None if self.anchored else self.regex.pattern
+
+    def find(self, stream):
+        """First heading match at a keyword position at or after pos"""
+        for candidate in self.positions[bisect_left(self.positions, self.pos):]:
+            match = self.regex.match(stream.text, candidate - stream.start)
+            if match:
+                return match
+        return None
+
+    def accept(self, content):
+        """Apply extract_section's cleaning and length check, True if the content is kept"""
+        content = re.sub(r'\s+', ' ', content).strip()
+        if len(content.split()) <= self.max_words:  # Avoid capturing too much text
+            self.result = content
+            self.state = 'matched'
+            return True
+        return False
+
+    def scan(self, stream):
+        if self.anchored:
+            # '^' only matches at offset 0 and the match can't pass the first line break
+            if self.state == 'searching' and (stream.text or stream.complete):
+                match = self.regex.match(stream.text) if stream.start == 0 else None
+                if not (match and self.accept(match.group(1))):
+                    self.state = 'exhausted'
+            return
+
+        text = stream.text
+        while not self.settled:
+            if self.state == 'searching':
+                match = self.find(stream)
+                if match is None:
+                    if stream.complete:
+                        self.state = 'exhausted'
+                    else:
+                        self.pos = max(self.pos, stream.end - OVERLAP)
+                    return
+                if match.end() == len(text) and not stream.complete:
+                    # The heading may still grow with the next page
+                    self.pos = stream.start + match.start()
+                    return
+                self.state = 'content'
+                self.content_start = self.scanned = stream.start + match.end()
+                self.overflow = False
+
+            # Lazy content stops at the first terminator, or at '$' when the stream is complete
+            content_local = self.content_start - stream.start
+            search_from = max(self.scanned - len(self.terminator) + 1 - stream.start, content_local)
+            end = text.find(self.terminator, search_from)
+            if stream.complete:
+                dollar = len(text) - 1 if text.endswith('\n') else len(text)
+                dollar = max(dollar, content_local)
+                end = dollar if end == -1 else min(end, dollar)
+            if end == -1:
+                if not self.overflow:
+                    self.overflow = len(text[content_local:].split()) > self.max_words
+                self.scanned = stream.end
+                return
+
+            if self.overflow or not self.accept(text[content_local:end]):
+                # finditer resumes after the rejected match
+                self.state = 'searching'
+                self.pos = stream.start + end
+
+
+class LevelScanner:
+    """Tracks which central/state indicators occur in a growing page stream"""
+
+    def __init__(self, central_indicators, state_indicators):
+        self.indicators = [(re.compile(p), 'central') for p in central_indicators]
+        self.indicators += [(re.compile(p), 'state') for p in state_indicators]
+        self.positions = [0] * len(self.indicators)
+        self.found = [False] * len(self.indicators)
+        # Global offsets where each indicator's keyword occurs, filled by PageStreamExtractor
+        self.candidates = [[] for _ in self.indicators]
+
+    @property
+    def patterns(self):
+        return [regex.pattern for regex, _ in self.indicators]
+
+    def scan(self, stream):
+        for i, (regex, _) in enumerate(self.indicators):
+            if self.found[i]:
+                continue
+            candidates = self.candidates[i]
+            for candidate in candidates[bisect_left(candidates, self.positions[i]):]:
+                if regex.match(stream.text, candidate - stream.start):
+                    self.found[i] = True
+                    break
+            else:
+                self.positions[i] = max(self.positions[i], stream.end - OVERLAP)
+
+    @property
+    def needed(self):
+        pending = [pos for pos, found in zip(self.positions, self.found) if not found]
+        return min(pending) if pending else None
+
+    def counts(self):
+        """Return (central_matches, state_matches, central_left, state_left)"""
+        counts = {'central': [0, 0], 'state': [0, 0]}
+        for (_, level), found in zip(self.indicators, self.found):
+            counts[level][0 if found else 1] += 1
+        return counts['central'][0], counts['state'][0], counts['central'][1], counts['state'][1]
+
+    def level(self):
+        """Same decision as PDFProcessor.determine_scheme_level"""
+        central_matches, state_matches, _, _ = self.counts()
+        return level_from_counts(central_matches, state_matches)
+
+    @property
+    def decided(self):
+        """True once indicators still missing can no longer change the level"""
+        central, state, central_left, state_left = self.counts()
+        if central >= state + state_left and central > 0:
+            return True
+        if state > central + central_left:
+            return True
+        return central_left == 0 and state_left == 0
+
+
+class PageStreamExtractor:
+    """Runs the section and level scanners incrementally over pages as they arrive"""
+
+    def __init__(self, field_patterns, central_indicators, state_indicators,
+                 max_words=100, description_margin=2000):
+        self.fields = {
+            field: [SectionScanner(pattern, max_words) for pattern in patterns]
+            for field, patterns in field_patterns.items()
+        }
+        self.level_scanner = LevelScanner(central_indicators, state_indicators)
+
+        # One keyword pass per page finds candidate positions for every pattern
+        self.position_lists = [
+            scanner.positions
+            for scanners in self.fields.values() for scanner in scanners
+            if scanner.head_pattern is not None
+        ]
+        head_patterns = [
+            scanner.head_pattern
+            for scanners in self.fields.values() for scanner in scanners
+            if scanner.head_pattern is not None
+        ]
+        self.position_lists += self.level_scanner.candidates
+        self.trigger = KeywordTrigger(head_patterns + self.level_scanner.patterns)
+        self.stream = StreamText()
+        self.pages = []
+        self.page_starts = []
+        # Text that must follow the scheme name before the description is checked
+        self.description_margin = description_margin
+        self.name_offset = None
+        self.name_pages = 0
+
+    def feed(self, page):
+        self.page_starts.append(self.stream.end)
+        self.pages.append(page)
+        chunk_start = len(self.stream.text)
+        self.stream.append(page + "\n")
+        # Keywords never contain a line break, so the new chunk can be scanned on its own
+        found = self.trigger.candidates(self.stream.text, chunk_start, self.stream.start)
+        for positions, new in zip(self.position_lists, found):
+            positions.extend(new)
+        self.scan()
+
+    def finish(self):
+        self.stream.complete = True
+        self.scan()
+
+    def scan(self):
+        needed = []
+        for scanners in self.fields.values():
+            for scanner in scanners:
+                scanner.scan(self.stream)
+                if scanner.needed is not None:
+                    needed.append(scanner.needed)
+                # Later patterns only matter if this one never matches
+                if scanner.state == 'matched':
+                    break
+        self.level_scanner.scan(self.stream)
+        if self.level_scanner.needed is not None:
+            needed.append(self.level_scanner.needed)
+        self.stream.trim(min(needed) if needed else self.stream.end)
+
+    def field_value(self, field):
+        """Return (settled, content) for a field, content as extract_section returns it"""
+        for scanner in self.fields[field]:
+            if scanner.state == 'matched':
+                return True, scanner.result
+            if scanner.state != 'exhausted':
+                return False, None
+        return True, None
+
+    @property
+    def done(self):
+        """True once reading more pages can't change any field, the level or the description"""
+        values = [self.field_value(field) for field in self.fields]
+        if not all(settled for settled, _ in values) or not self.level_scanner.decided:
+            return False
+
+        name = self.field_value('scheme_name')[1] if 'scheme_name' in self.fields else None
+        if not name:
+            return True
+        return self.description_ready(name.lower())
+
+    def description_ready(self, name):
+        """Check enough text follows the first mention of the scheme name"""
+        # Search each page once, with the previous page's tail for names split by a page break
+        while self.name_offset is None and self.name_pages < len(self.pages):
+            idx = self.name_pages
+            prefix = self.pages[idx - 1][-len(name):] + "\n" if idx else ""
+            offset = (prefix + self.pages[idx]).lower().find(name)
+            if offset != -1:
+                self.name_offset = self.page_starts[idx] - len(prefix) + offset
+            self.name_pages += 1
+
+        if self.name_offset is None:
+            return False
+        return self.stream.end - self.name_offset >= self.description_margin
+
+    def widen_description(self):
+        """Wait for twice the text now following the scheme name before the description is checked again"""
+        self.description_margin = 2 * (self.stream.end - self.name_offset)
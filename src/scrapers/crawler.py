@@ -0,0 +1,364 @@
+import asyncio
+import hashlib
+import json
+import os
+import posixpath
+import re
+import tempfile
+from collections import deque
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+from urllib.robotparser import RobotFileParser
+import httpx
+from bs4 import BeautifulSoup
+from src.utils.logger import setup_logger
+from src.scrapers.downloader import AsyncDownloader
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+USER_AGENT = "krishi-sahayak-crawler"
+
+def normalize_url(url):
+    """Canonical form of a URL, so links to the same resource compare equal
+
+    Lowercases scheme and host, drops default ports, fragments and dot
+    segments, uppercases percent escapes and sorts query parameters.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    netloc = host if parts.port in (None, DEFAULT_PORTS.get(scheme)) else f"{host}:{parts.port}"
+
+    path = parts.path or '/'
+    normalized = posixpath.normpath(path)
+    if path.endswith('/') and normalized != '/':
+        normalized += '/'
+    normalized = re.sub(r'%[0-9a-fA-F]{2}', lambda m: m.group(0).upper(), normalized)
+
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, normalized, query, ''))
+
+def is_pdf_url(url):
+    return urlsplit(url).path.lower().endswith('.pdf')
+
+class HostScheduler:
+    """Spaces requests to the same host at least `delay` seconds apart"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.host_delays = {}
+        self.next_slot = {}
+
+    def set_delay(self, host, delay):
+        """Use a longer delay for one host, e.g. its robots.txt Crawl-delay"""
+        self.host_delays[host] = max(self.delay, delay)
+
+    async def wait(self, url):
+        host = urlsplit(url).netloc
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        # Reserve the host's next slot before sleeping, so concurrent callers queue up
+        slot = max(now, self.next_slot.get(host, now))
+        self.next_slot[host] = slot + self.host_delays.get(host, self.delay)
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+class RobotsCache:
+    """robots.txt rules per host, fetched once per crawl"""
+
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self.parsers = {}
+
+    async def allowed(self, client, url):
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        if origin not in self.parsers:
+            # Placeholder first, so concurrent workers fetch robots.txt only once
+            self.parsers[origin] = asyncio.ensure_future(self.fetch(client, origin))
+        parser = await self.parsers[origin]
+        return parser is None or parser.can_fetch(USER_AGENT, url)
+
+    async def fetch(self, client, origin):
+        try:
+            await self.scheduler.wait(origin)
+            response = await client.get(f"{origin}/robots.txt")
+        except httpx.HTTPError:
+            return None
+        if response.status_code != 200:
+            return None
+        parser = RobotFileParser()
+        parser.parse(response.text.splitlines())
+        delay = parser.crawl_delay(USER_AGENT)
+        if delay:
+            self.scheduler.set_delay(urlsplit(origin).netloc, float(delay))
+        return parser
+
+class CrawlState:
+    """Frontier, seen URLs, page hashes and found PDFs of a crawl, persisted as JSON"""
+
+    def __init__(self, path):
+        self.path = Path(path) if path else None
+        self.reset()
+
+    def reset(self):
+        self.frontier = deque()
+        self.seen = set()
+        self.page_hashes = set()
+        self.pages_visited = 0
+        self.finished = False
+        # PDF url -> file name, content hash and the URL it duplicates
+        self.pdfs = {}
+
+    def load(self):
+        """Load saved state, True if it holds an unfinished crawl"""
+        if not self.path or not self.path.exists():
+            return False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return False
+        self.pdfs = data.get('pdfs', {})
+        if data.get('finished', True):
+            # Keep what earlier crawls learned about PDFs, but crawl from scratch
+            return False
+        self.frontier = deque((url, depth) for url, depth in data['frontier'])
+        self.seen = set(data['seen'])
+        self.page_hashes = set(data['page_hashes'])
+        self.pages_visited = data['pages_visited']
+        self.finished = False
+        return True
+
+    def save(self, in_flight=()):
+        """Write the state atomically, in-flight pages go back to the frontier"""
+        if not self.path:
+            return
+        data = {
+            'finished': self.finished,
+            'frontier': list(in_flight) + list(self.frontier),
+            'seen': sorted(self.seen),
+            'page_hashes': sorted(self.page_hashes),
+            'pages_visited': self.pages_visited,
+            'pdfs': self.pdfs
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+class Crawler:
+    """Crawls HTML pages breadth-first from start URLs and downloads the PDFs they link
+
+    Pages are visited once per normalized URL and link extraction is skipped
+    for pages whose content was already seen. Each PDF URL is downloaded
+    once, and files with identical content are kept once. Requests to a host
+    are spaced by `delay` (or its robots.txt Crawl-delay). The state is saved
+    every `save_every` pages, and an interrupted crawl resumes from it.
+    """
+
+    def __init__(self, start_urls, pdf_dir, manifest_path, state_path=None, allowed_domains=None,
+                 max_depth=2, max_pages=1000, delay=1.0, concurrency=8, per_host=4,
+                 timeout=30, max_retries=3, save_every=50):
+        self.logger = setup_logger("crawler")
+        self.start_urls = [normalize_url(url) for url in start_urls]
+        self.allowed_domains = [domain.lower() for domain in (
+            allowed_domains or {urlsplit(url).hostname for url in self.start_urls}
+        )]
+        self.previous_pdfs = {}
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.save_every = save_every
+        self.scheduler = HostScheduler(delay)
+        self.state = CrawlState(state_path)
+        self.pdf_dir = Path(pdf_dir)
+        self.downloader = AsyncDownloader(
+            pdf_dir, manifest_path, concurrency=concurrency, per_host=per_host,
+            max_retries=max_retries, timeout=timeout, scheduler=self.scheduler
+        )
+
+    def crawl(self, resume=True):
+        """Crawl and download, returning {pdf url: download status}"""
+        return asyncio.run(self.run(resume))
+
+    async def run(self, resume=True):
+        if resume and self.state.load():
+            self.logger.info(
+                f"Resuming crawl: {self.state.pages_visited} pages visited, "
+                f"{len(self.state.frontier)} in the frontier"
+            )
+        else:
+            self.state.load()
+            self.previous_pdfs = self.state.pdfs
+            self.state.reset()
+            for url in self.start_urls:
+                self.state.seen.add(url)
+                self.state.frontier.append((url, 0))
+
+        self.robots = RobotsCache(self.scheduler)
+        self.in_flight = {}
+        headers = {'User-Agent': USER_AGENT}
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(headers=headers, limits=limits, timeout=self.timeout,
+                                     follow_redirects=True) as client:
+            try:
+                await self.crawl_pages(client)
+            finally:
+                self.state.save(self.in_flight.values())
+
+        self.logger.info(
+            f"Crawl finished: {self.state.pages_visited} pages visited, "
+            f"{len(self.state.page_hashes)} distinct, {len(self.state.pdfs)} PDF links"
+        )
+        return await self.download_pdfs()
+
+    async def crawl_pages(self, client):
+        wakeup = asyncio.Event()
+
+        async def worker():
+            while True:
+                if not self.state.frontier:
+                    if not self.in_flight:
+                        wakeup.set()
+                        return
+                    # Wait for in-flight pages that may add links
+                    wakeup.clear()
+                    await wakeup.wait()
+                    continue
+                url, depth = self.state.frontier.popleft()
+                task = asyncio.current_task()
+                self.in_flight[task] = (url, depth)
+                try:
+                    await self.visit(client, url, depth)
+                except Exception as e:
+                    self.logger.error(f"Failed to crawl {url}: {str(e)}")
+                finally:
+                    del self.in_flight[task]
+                    self.state.pages_visited += 1
+                    if self.state.pages_visited % self.save_every == 0:
+                        self.state.save(self.in_flight.values())
+                    wakeup.set()
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        self.state.finished = True
+
+    @property
+    def pages_queued(self):
+        return self.state.pages_visited + len(self.in_flight) + len(self.state.frontier)
+
+    def allowed_domain(self, url):
+        host = urlsplit(url).hostname or ''
+        return any(host == domain or host.endswith('.' + domain) for domain in self.allowed_domains)
+
+    async def visit(self, client, url, depth):
+        """Fetch one page and queue the pages and PDFs it links to"""
+        body, final_url = await self.fetch_page(client, url)
+        if body is None:
+            return
+
+        # Mirrors and tracking parameters serve the same page under another URL
+        digest = hashlib.sha256(body).hexdigest()
+        if digest in self.state.page_hashes:
+            return
+        self.state.page_hashes.add(digest)
+
+        for link in self.extract_links(body, final_url):
+            if link in self.state.seen or not self.allowed_domain(link):
+                continue
+            if is_pdf_url(link):
+                self.state.seen.add(link)
+                self.state.pdfs[link] = self.previous_pdfs.get(link) or {
+                    'filename': None, 'sha256': None, 'duplicate_of': None, 'source': url
+                }
+            elif depth < self.max_depth and self.pages_queued < self.max_pages:
+                self.state.seen.add(link)
+                self.state.frontier.append((link, depth + 1))
+
+    async def fetch_page(self, client, url):
+        """Return (HTML body, final URL), (None, None) for non-HTML, disallowed or failed pages"""
+        if not await self.robots.allowed(client, url):
+            self.logger.info(f"Disallowed by robots.txt: {url}")
+            return None, None
+
+        for attempt in range(self.max_retries):
+            try:
+                await self.scheduler.wait(url)
+                async with client.stream('GET', url) as response:
+                    if response.status_code != 200:
+                        self.logger.error(f"Failed to fetch {url}: HTTP {response.status_code}")
+                        return None, None
+                    # Skip bodies of non-HTML resources without reading them
+                    if 'html' not in response.headers.get('Content-Type', ''):
+                        return None, None
+                    body = await response.aread()
+                    final_url = normalize_url(str(response.url))
+                self.state.seen.add(final_url)
+                return body, final_url
+            except httpx.HTTPError as e:
+                self.logger.error(f"Attempt {attempt + 1} for {url} failed: {str(e)}")
+                if attempt < self.max_retries - 1:
+                    await asyncio.sleep(2 ** attempt)  # Exponential backoff
+        return None, None
+
+    def extract_links(self, body, base_url):
+        """Normalized http(s) links of a page"""
+        soup = BeautifulSoup(body, 'html.parser')
+        links = []
+        for link in soup.find_all('a', href=True):
+            url = urljoin(base_url, link['href'])
+            if urlsplit(url).scheme in ('http', 'https'):
+                links.append(normalize_url(url))
+        return links
+
+    def pdf_filename(self, url, taken):
+        """File name for a PDF URL, disambiguated when another URL has the same name"""
+        name = Path(urlsplit(url).path).name
+        if name in taken:
+            path = Path(name)
+            name = f"{path.stem}_{hashlib.sha1(url.encode('utf-8')).hexdigest()[:8]}{path.suffix}"
+        return name
+
+    async def download_pdfs(self):
+        taken = {record['filename'] for record in self.state.pdfs.values() if record['filename']}
+        downloads = []
+        for url, record in self.state.pdfs.items():
+            original = self.state.pdfs.get(record['duplicate_of'] or '')
+            if original and (self.pdf_dir / original['filename']).exists():
+                continue
+            record['duplicate_of'] = None
+            if not record['filename']:
+                record['filename'] = self.pdf_filename(url, taken)
+                taken.add(record['filename'])
+            downloads.append((url, record['filename']))
+
+        statuses = await self.downloader.run(downloads) if downloads else {}
+
+        # Keep one file per content, however many URLs serve it
+        by_hash = {record['sha256']: url for url, record in self.state.pdfs.items()
+                   if record['sha256'] and not record['duplicate_of'] and record['filename'] not in statuses}
+        results = {}
+        for url, filename in downloads:
+            status = statuses.get(filename)
+            results[url] = status
+            path = self.pdf_dir / filename
+            if status == 'failed' or not path.exists():
+                continue
+            record = self.state.pdfs[url]
+            if status == 'downloaded' or not record['sha256']:
+                record['sha256'] = hashlib.sha256(path.read_bytes()).hexdigest()
+            original = by_hash.setdefault(record['sha256'], url)
+            if original != url:
+                record['duplicate_of'] = original
+                path.unlink()
+                results[url] = 'duplicate'
+                self.logger.info(f"{filename} has the same content as {self.state.pdfs[original]['filename']}")
+
+        self.state.save()
+        return results
@@ -0,0 +1,203 @@
+import asyncio
+import json
+import os
+import tempfile
+from email.utils import formatdate
+from pathlib import Path
+from urllib.parse import urlsplit
+import httpx
+from src.utils.logger import setup_logger
+
+# Suffix of files still being downloaded, kept between runs to resume them
+PART_SUFFIX = ".part"
+
+class DownloadManifest:
+    """Validators (ETag, Last-Modified) and sizes of downloaded files, persisted as JSON"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = {}
+
+    def load(self):
+        self.entries = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                # A damaged manifest only costs unconditional downloads
+                self.entries = {}
+
+    def get(self, filename):
+        return self.entries.get(filename, {})
+
+    def set(self, filename, entry):
+        self.entries[filename] = entry
+        self.save()
+
+    def save(self):
+        """Write the manifest atomically"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, indent=2, sort_keys=True)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+class AsyncDownloader:
+    """Downloads files concurrently with conditional requests and resumable partial files
+
+    At most `concurrency` downloads run at once and at most `per_host` per
+    host, over pooled keep-alive connections. Files already downloaded are
+    revalidated with If-None-Match/If-Modified-Since, interrupted downloads
+    continue from their .part file with a Range request, and finished files
+    replace their target in one rename. Files already on disk but not in the
+    manifest are revalidated by their modification time. Writes run in
+    worker threads, so a slow disk doesn't hold up the other downloads.
+    """
+
+    def __init__(self, target_dir, manifest_path, concurrency=8, per_host=4,
+                 max_retries=3, timeout=30, chunk_size=64 * 1024, scheduler=None):
+        self.logger = setup_logger("pdf_downloader")
+        self.target_dir = Path(target_dir)
+        self.manifest = DownloadManifest(manifest_path)
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        # Optional per-host rate limit, see crawler.HostScheduler
+        self.scheduler = scheduler
+        self.stats = {}
+
+    def download_all(self, downloads):
+        """Download (url, filename) pairs, returning {filename: status}"""
+        return asyncio.run(self.run(downloads))
+
+    async def run(self, downloads):
+        self.stats = {'downloaded': 0, 'not_modified': 0, 'resumed': 0, 'failed': 0, 'bytes': 0}
+        self.target_dir.mkdir(parents=True, exist_ok=True)
+        # Read on every run, the files on disk may have changed since the last one
+        self.manifest.load()
+        limit = asyncio.Semaphore(self.concurrency)
+        host_limits = {}
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+
+        async with httpx.AsyncClient(limits=limits, timeout=self.timeout, follow_redirects=True) as client:
+            async def bounded(url, filename):
+                host = urlsplit(url).netloc
+                host_limit = host_limits.setdefault(host, asyncio.Semaphore(self.per_host))
+                # The host slot first, so downloads queued for a busy host hold no global slot
+                async with host_limit, limit:
+                    return filename, await self.download(client, url, filename)
+
+            results = await asyncio.gather(*(bounded(url, filename) for url, filename in downloads))
+
+        self.logger.info(
+            f"Downloads: {self.stats['downloaded']} downloaded ({self.stats['resumed']} resumed), "
+            f"{self.stats['not_modified']} not modified, {self.stats['failed']} failed, "
+            f"{self.stats['bytes']} bytes transferred"
+        )
+        return dict(results)
+
+    async def download(self, client, url, filename):
+        """Download one file with retries, returning 'downloaded', 'not_modified' or 'failed'"""
+        for attempt in range(self.max_retries):
+            try:
+                return await self.fetch(client, url, filename)
+            except (httpx.HTTPError, OSError) as e:
+                self.logger.error(f"Attempt {attempt + 1} for {filename} failed: {str(e)}")
+                if attempt < self.max_retries - 1:
+                    await asyncio.sleep(2 ** attempt)  # Exponential backoff
+
+        self.stats['failed'] += 1
+        self.logger.error(f"Failed to download {filename}")
+        return 'failed'
+
+    async def fetch(self, client, url, filename):
+        file_path = self.target_dir / filename
+        part_path = file_path.with_name(file_path.name + PART_SUFFIX)
+        entry = self.manifest.get(filename)
+        headers = {}
+        untracked = False
+
+        # Resume an interrupted download only if the server still has the same file
+        partial = entry.get('partial')
+        offset = part_path.stat().st_size if part_path.exists() and partial else 0
+        etag = partial.get('etag') if partial else None
+        if etag and etag.startswith('W/'):
+            # If-Range only takes strong validators
+            etag = None
+        validator = partial and (etag or partial.get('last_modified'))
+        if offset and validator:
+            headers['Range'] = f"bytes={offset}-"
+            headers['If-Range'] = validator
+        else:
+            offset = 0
+            # Revalidate a complete earlier download that is still on disk, or a file from before the manifest
+            known = entry.get('url') == url and file_path.exists() and file_path.stat().st_size == entry.get('size')
+            untracked = 'url' not in entry and file_path.exists()
+            if known or untracked:
+                if entry.get('etag'):
+                    headers['If-None-Match'] = entry['etag']
+                headers['If-Modified-Since'] = (
+                    entry.get('last_modified') or formatdate(file_path.stat().st_mtime, usegmt=True)
+                )
+
+        if self.scheduler:
+            await self.scheduler.wait(url)
+        async with client.stream('GET', url, headers=headers) as response:
+            if response.status_code == 304:
+                if untracked:
+                    self.manifest.set(filename, {
+                        'url': url, 'size': file_path.stat().st_size,
+                        'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')
+                    })
+                self.stats['not_modified'] += 1
+                self.logger.info(f"Not modified: {filename}")
+                return 'not_modified'
+            if response.status_code == 416:
+                self.discard_partial(filename, entry, part_path)
+                raise httpx.HTTPError(f"Range not satisfiable for {filename}, restarting")
+            response.raise_for_status()
+
+            validators = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified')
+            }
+            resumed = response.status_code == 206
+            if resumed and not response.headers.get('Content-Range', '').startswith(f"bytes {offset}-"):
+                self.discard_partial(filename, entry, part_path)
+                raise httpx.HTTPError(f"Unexpected Content-Range for {filename}, restarting")
+            if not resumed:
+                offset = 0
+                # Recorded before any bytes arrive, so an interrupted download can resume
+                self.manifest.set(filename, {**entry, 'partial': validators})
+
+            f = await asyncio.to_thread(open, part_path, 'ab' if resumed else 'wb')
+            try:
+                async for chunk in response.aiter_bytes(self.chunk_size):
+                    await asyncio.to_thread(f.write, chunk)
+                    self.stats['bytes'] += len(chunk)
+            finally:
+                await asyncio.to_thread(f.close)
+
+        size = part_path.stat().st_size
+        os.replace(part_path, file_path)
+        self.manifest.set(filename, {'url': url, 'size': size, **validators})
+
+        self.stats['downloaded'] += 1
+        if resumed:
+            self.stats['resumed'] += 1
+            self.logger.info(f"Successfully downloaded: {filename} (resumed at byte {offset})")
+        else:
+            self.logger.info(f"Successfully downloaded: {filename}")
+        return 'downloaded'
+
+    def discard_partial(self, filename, entry, part_path):
+        """Drop a partial file that no longer fits the resource, so the next attempt starts over"""
+        part_path.unlink(missing_ok=True)
+        self.manifest.set(filename, {k: v for k, v in entry.items() if k != 'partial'})
@@ -4,14 +4,24 @@ from pathlib import Path
 from urllib.parse import urljoin
 import time
 from src.utils.logger import setup_logger
-from config import BASE_URL, PDF_DIR
+from src.scrapers.downloader import AsyncDownloader
+from src.scrapers.crawler import Crawler
+from config import (
+    BASE_URL, PDF_DIR, SCRAPER_CONCURRENCY, SCRAPER_PER_HOST, SCRAPER_MANIFEST, CRAWL_EXTRA_URLS,
+    CRAWL_ALLOWED_DOMAINS, CRAWL_MAX_DEPTH, CRAWL_MAX_PAGES, CRAWL_DELAY, CRAWL_STATE
+)
 
 class PDFScraper:
-    def __init__(self):
+    def __init__(self, base_url=BASE_URL, pdf_dir=PDF_DIR, manifest_path=SCRAPER_MANIFEST):
         self.logger = setup_logger("pdf_scraper")
-        self.base_url = BASE_URL
-        self.pdf_dir = PDF_DIR
+        self.base_url = base_url
+        self.pdf_dir = pdf_dir
+        self.manifest_path = manifest_path
         self.session = requests.Session()
+        # Concurrent downloads that skip unchanged files and resume interrupted ones
+        self.downloader = AsyncDownloader(
+            pdf_dir, manifest_path, concurrency=SCRAPER_CONCURRENCY, per_host=SCRAPER_PER_HOST
+        )
         
     def get_page_content(self, url):
         """Fetch webpage content with retry mechanism"""
@@ -45,25 +55,6 @@ class PDFScraper:
         self.logger.info(f"Found {len(pdf_links)} PDF links")
         return pdf_links
     
-    def download_pdf(self, pdf_url, filename):
-        """Download and save PDF file"""
-        try:
-            response = self.session.get(pdf_url, stream=True)
-            response.raise_for_status()
-            
-            file_path = self.pdf_dir / filename
-            with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-            
-            self.logger.info(f"Successfully downloaded: {filename}")
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"Failed to download {filename}: {str(e)}")
-            return False
-            
     def scrape(self):
         """Main scraping method"""
         try:
@@ -73,11 +64,19 @@ class PDFScraper:
             # Extract PDF links
             pdf_links = self.extract_pdf_links(html_content)
             
-            # Download each PDF
-            for pdf in pdf_links:
-                filename = Path(pdf['url']).name
-                self.download_pdf(pdf['url'], filename)
+            # Download the PDFs concurrently, one download per file name (the last link wins)
+            downloads = {Path(pdf['url']).name: pdf['url'] for pdf in pdf_links}
+            return self.downloader.download_all([(url, filename) for filename, url in downloads.items()])
                 
         except Exception as e:
             self.logger.error(f"Scraping failed: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
+
+    def crawl(self, state_path=CRAWL_STATE, resume=True):
+        """Crawl pages linked from the base URL (and CRAWL_EXTRA_URLS) and download their PDFs"""
+        crawler = Crawler(
+            [self.base_url] + CRAWL_EXTRA_URLS, self.pdf_dir, self.manifest_path, state_path,
+            allowed_domains=CRAWL_ALLOWED_DOMAINS, max_depth=CRAWL_MAX_DEPTH, max_pages=CRAWL_MAX_PAGES,
+            delay=CRAWL_DELAY, concurrency=SCRAPER_CONCURRENCY, per_host=SCRAPER_PER_HOST
+        )
+        return crawler.crawl(resume)
@@ -0,0 +1,105 @@
+import asyncio
+import random
+
+class SplitBatch(Exception):
+    """Raised for a batch the service can't translate as one request, its texts are sent one by one"""
+
+class TranslationBackend:
+    """A translation service that translates batches of texts into one language
+
+    translate_batch returns one translation per text, None for texts that
+    failed on their own; raising fails the whole batch, and SplitBatch asks
+    for its texts to be sent separately. Batches never hold more than
+    max_batch_items texts or max_batch_chars characters.
+    """
+
+    name = None
+    max_batch_items = 1
+    max_batch_chars = 5000
+
+    async def translate_batch(self, texts, target_lang):
+        raise NotImplementedError
+
+    async def close(self):
+        """Release connections at the end of an engine run"""
+
+class GoogleTranslateBackend(TranslationBackend):
+    """Google Translate through googletrans, one request per batch
+
+    A batch is sent as one text with a line per item; if the lines don't come
+    back one to one, the engine sends the items separately.
+    """
+
+    name = "googletrans"
+    max_batch_items = 50
+    max_batch_chars = 4500
+
+    def __init__(self):
+        from googletrans import Translator
+        self.translator_class = Translator
+        # Created inside the running event loop, its connections are bound to it
+        self.translator = None
+
+    async def translate_batch(self, texts, target_lang):
+        if self.translator is None:
+            self.translator = self.translator_class()
+        if len(texts) == 1:
+            result = await self.translator.translate(texts[0], dest=target_lang)
+            return [result.text]
+        if any('\n' in text for text in texts):
+            raise SplitBatch("texts with line breaks can't be sent as lines of one text")
+
+        result = await self.translator.translate('\n'.join(texts), dest=target_lang)
+        lines = result.text.split('\n')
+        if len(lines) != len(texts):
+            raise SplitBatch(f"{len(texts)} lines sent, {len(lines)} returned")
+        return lines
+
+    async def close(self):
+        if self.translator is not None:
+            await self.translator.client.aclose()
+            self.translator = None
+
+class FakeBackend(TranslationBackend):
+    """Offline stand-in that tags texts with the language after a simulated delay
+
+    Each request waits latency plus per_item seconds per text. failure_rate
+    of the items fail on their own and batch_failure_rate of the requests
+    fail as a whole, drawn from a seeded generator.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency=0.2, per_item=0.002, failure_rate=0.0, batch_failure_rate=0.0,
+                 max_batch_items=50, max_batch_chars=4500, seed=0):
+        self.latency = latency
+        self.per_item = per_item
+        self.failure_rate = failure_rate
+        self.batch_failure_rate = batch_failure_rate
+        self.max_batch_items = max_batch_items
+        self.max_batch_chars = max_batch_chars
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.items = 0
+
+    async def translate_batch(self, texts, target_lang):
+        self.requests += 1
+        self.items += len(texts)
+        await asyncio.sleep(self.latency + self.per_item * len(texts))
+        if self.random.random() < self.batch_failure_rate:
+            raise ConnectionError("simulated backend failure")
+        return [
+            None if self.random.random() < self.failure_rate else f"[{target_lang}] {text}"
+            for text in texts
+        ]
+
+BACKENDS = {
+    'google': GoogleTranslateBackend,
+    'fake': FakeBackend
+}
+
+def create_backend(name, **options):
+    """Create a backend by its BACKENDS name"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unsupported translation backend: {name}. Supported backends: {', '.join(BACKENDS)}")
+    return BACKENDS[name](**options)
@@ -0,0 +1,71 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+def file_digest(data):
+    """sha256 of a file's bytes, used to chain change manifests to the files they describe"""
+    return hashlib.sha256(data).hexdigest()
+
+def write_atomic(path, data):
+    """Write bytes to path through a temporary file, so readers never see a partial file"""
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def dump_schemes(schemes_data):
+    return json.dumps(schemes_data, indent=4, ensure_ascii=False).encode('utf-8')
+
+class SchemeDiff:
+    """Schemes added, changed and removed between two processed_schemes.json snapshots
+
+    Schemes are keyed by (level, scheme_id); changed maps each changed scheme
+    to the fields whose values differ, including fields that were dropped.
+    """
+
+    def __init__(self, previous, current):
+        self.added = []
+        self.changed = {}
+        self.removed = []
+
+        for level, schemes in current.items():
+            old_schemes = previous.get(level, {})
+            for scheme_id, scheme in schemes.items():
+                old = old_schemes.get(scheme_id)
+                if old is None:
+                    self.added.append((level, scheme_id))
+                    continue
+                fields = [field for field in dict.fromkeys([*old, *scheme]) if old.get(field) != scheme.get(field)]
+                if fields:
+                    self.changed[(level, scheme_id)] = fields
+
+        for level, schemes in previous.items():
+            for scheme_id in schemes:
+                if scheme_id not in current.get(level, {}):
+                    self.removed.append((level, scheme_id))
+
+    def __bool__(self):
+        return bool(self.added or self.changed or self.removed)
+
+    def summary(self):
+        return f"{len(self.added)} added, {len(self.changed)} changed, {len(self.removed)} removed schemes"
+
+    def to_manifest(self):
+        """JSON-ready lists for the change manifest"""
+        return {
+            'added': [{'level': level, 'scheme_id': scheme_id} for level, scheme_id in self.added],
+            'changed': [
+                {'level': level, 'scheme_id': scheme_id, 'fields': fields}
+                for (level, scheme_id), fields in self.changed.items()
+            ],
+            'removed': [{'level': level, 'scheme_id': scheme_id} for level, scheme_id in self.removed]
+        }
@@ -0,0 +1,140 @@
+import asyncio
+from itertools import zip_longest
+from src.utils.logger import setup_logger
+from src.translators.backends import SplitBatch
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, in bursts of up to `capacity`
+
+    Callers reserve a token even when the bucket is empty and sleep until it
+    refills, so waiting callers are served in order. A rate of 0 disables it.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = None
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        now = asyncio.get_running_loop().time()
+        if self.updated is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+class TranslationEngine:
+    """Translates many texts into several languages with batched, concurrent backend requests
+
+    Texts are deduplicated and looked up in the translation memory first. The
+    rest are grouped into batches per language, and batches of all languages
+    share `concurrency` request slots and one token bucket. Items that fail
+    are retried on their own after a backoff while other batches go on; after
+    max_retries attempts the original text is kept and nothing is stored.
+    A batch the backend splits is sent again as one request per text.
+    """
+
+    def __init__(self, backend, memory=None, rate=1.0, burst=1, concurrency=4,
+                 max_retries=3, retry_delay=1.0):
+        self.logger = setup_logger("translation_engine")
+        self.backend = backend
+        self.memory = memory
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.stats = {'requests': 0, 'items': 0, 'cached': 0, 'retried': 0, 'failed': 0}
+
+    def translate(self, texts, languages):
+        """Return {language: {text: translation}} for every non-blank text"""
+        return asyncio.run(self.run({lang: texts for lang in languages}))
+
+    def translate_per_language(self, texts_by_lang):
+        """Like translate, with a separate list of texts for each language"""
+        return asyncio.run(self.run(texts_by_lang))
+
+    async def run(self, texts_by_lang):
+        languages = list(texts_by_lang)
+        results = {lang: {} for lang in languages}
+        missing = {lang: [] for lang in languages}
+        for lang, texts in texts_by_lang.items():
+            for text in dict.fromkeys(text for text in texts if text and text.strip()):
+                cached = self.memory.get(text, lang, self.backend.name) if self.memory else None
+                if cached is None:
+                    missing[lang].append(text)
+                else:
+                    results[lang][text] = cached
+                    self.stats['cached'] += 1
+
+        # Round-robin over languages, so every language progresses at the same pace
+        per_language = [[(lang, batch) for batch in self.batches(missing[lang])] for lang in languages]
+        batches = [item for group in zip_longest(*per_language) for item in group if item is not None]
+
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        try:
+            await asyncio.gather(*(self.translate_batch(lang, batch, results, 0) for lang, batch in batches))
+        finally:
+            await self.backend.close()
+            if self.memory:
+                self.memory.flush()
+        return results
+
+    def batches(self, texts):
+        """Split texts into batches within the backend's item and character limits"""
+        batch, chars = [], 0
+        for text in texts:
+            if batch and (len(batch) >= self.backend.max_batch_items
+                          or chars + len(text) > self.backend.max_batch_chars):
+                yield batch
+                batch, chars = [], 0
+            batch.append(text)
+            chars += len(text)
+        if batch:
+            yield batch
+
+    async def translate_batch(self, lang, texts, results, attempt):
+        async with self.semaphore:
+            await self.bucket.acquire()
+            self.stats['requests'] += 1
+            self.stats['items'] += len(texts)
+            try:
+                translations = await self.backend.translate_batch(texts, lang)
+                if len(translations) != len(texts):
+                    raise ValueError(f"expected {len(texts)} translations, got {len(translations)}")
+            except SplitBatch as e:
+                translations = None
+                self.logger.info(f"Translation batch of {len(texts)} ({lang}) split into single texts: {str(e)}")
+            except Exception as e:
+                self.logger.error(f"Translation batch of {len(texts)} ({lang}) attempt {attempt + 1} failed: {str(e)}")
+                translations = [None] * len(texts)
+
+        if translations is None:
+            # Each text is its own request, waiting for its own slot and token like any batch
+            await asyncio.gather(*(self.translate_batch(lang, [text], results, attempt) for text in texts))
+            return
+
+        failed = []
+        for text, translation in zip(texts, translations):
+            if translation is None:
+                failed.append(text)
+                continue
+            results[lang][text] = translation
+            if self.memory:
+                self.memory.put(text, lang, self.backend.name, translation)
+
+        if not failed:
+            return
+        if attempt + 1 >= self.max_retries:
+            self.stats['failed'] += len(failed)
+            for text in failed:
+                results[lang][text] = text  # Keep the original text if translation fails
+            return
+
+        # Back off outside the request slots, other batches keep going meanwhile
+        self.stats['retried'] += len(failed)
+        await asyncio.sleep(self.retry_delay * 2 ** attempt)
+        await self.translate_batch(lang, failed, results, attempt + 1)
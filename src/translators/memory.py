@@ -0,0 +1,97 @@
+import hashlib
+import re
+import sqlite3
+import time
+from pathlib import Path
+
+# Sentence ends: ., ! or ? (and the Devanagari danda) followed by whitespace
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?।])\s+')
+
+def split_sentences(text):
+    """Split text into (sentence, following whitespace) pairs that join back to the text"""
+    parts = []
+    start = 0
+    for match in SENTENCE_BOUNDARY.finditer(text):
+        parts.append((text[start:match.start()], match.group(0)))
+        start = match.end()
+    parts.append((text[start:], ''))
+    return parts
+
+def text_key(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+class TranslationMemory:
+    """On-disk cache of translations keyed by (source text hash, target language, backend)
+
+    Entries are stamped with their last use and the least recently used ones
+    are evicted once there are more than max_entries.
+    """
+
+    def __init__(self, path, max_entries=100000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.connection = sqlite3.connect(str(self.path))
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                source_hash TEXT NOT NULL,
+                target_lang TEXT NOT NULL,
+                backend TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (source_hash, target_lang, backend)
+            )
+        """)
+        self.connection.execute("CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)")
+        self.connection.commit()
+        self.stats = {'hits': 0, 'misses': 0, 'stored': 0, 'evicted': 0}
+
+    def get(self, text, target_lang, backend):
+        """Cached translation of text, or None"""
+        key = (text_key(text), target_lang, backend)
+        row = self.connection.execute(
+            "SELECT translation FROM translations WHERE source_hash = ? AND target_lang = ? AND backend = ?", key
+        ).fetchone()
+        if row is None:
+            self.stats['misses'] += 1
+            return None
+        self.stats['hits'] += 1
+        self.connection.execute(
+            "UPDATE translations SET last_used = ? WHERE source_hash = ? AND target_lang = ? AND backend = ?",
+            (time.time(), *key)
+        )
+        return row[0]
+
+    def put(self, text, target_lang, backend, translation):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)",
+            (text_key(text), target_lang, backend, translation, time.time())
+        )
+        self.stats['stored'] += 1
+
+    def evict(self):
+        """Drop least recently used entries beyond max_entries"""
+        excess = self.count() - self.max_entries
+        if excess > 0:
+            self.connection.execute(
+                "DELETE FROM translations WHERE rowid IN "
+                "(SELECT rowid FROM translations ORDER BY last_used LIMIT ?)", (excess,)
+            )
+            self.stats['evicted'] += excess
+
+    def flush(self):
+        """Evict and commit pending changes"""
+        self.evict()
+        self.connection.commit()
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+    @property
+    def hit_rate(self):
+        lookups = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / lookups if lookups else 0.0
+
+    def count(self):
+        return self.connection.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
@@ -1,13 +1,30 @@
-from googletrans import Translator
 from src.utils.logger import setup_logger
+from src.translators.memory import TranslationMemory, split_sentences
+from src.translators.backends import create_backend
+from src.translators.engine import TranslationEngine
+from src.translators.changes import SchemeDiff, dump_schemes, file_digest, write_atomic
+from config import (
+    TRANSLATION_MEMORY_PATH, TRANSLATION_MEMORY_MAX_ENTRIES, TRANSLATION_BACKEND, TRANSLATION_LANGUAGES,
+    TRANSLATION_RATE, TRANSLATION_BURST, TRANSLATION_CONCURRENCY, TRANSLATION_SNAPSHOT_FILE,
+    TRANSLATION_CHANGES_FILE
+)
 import json
+from datetime import datetime, timezone
 from pathlib import Path
-import time
 
 class SchemeTranslator:
-    def __init__(self):
+    def __init__(self, memory_path=TRANSLATION_MEMORY_PATH, backend=None, languages=None):
         self.logger = setup_logger("translator")
-        self.translator = Translator()
+        # Translation service, see TRANSLATION_BACKEND
+        self.backend = backend or create_backend(TRANSLATION_BACKEND)
+        # Sentences translated on earlier runs, None disables the memory
+        self.memory = TranslationMemory(memory_path, TRANSLATION_MEMORY_MAX_ENTRIES) if memory_path else None
+        self.engine = TranslationEngine(
+            self.backend, self.memory, rate=TRANSLATION_RATE, burst=TRANSLATION_BURST,
+            concurrency=TRANSLATION_CONCURRENCY
+        )
+        # Target languages, code -> name used in the output file names
+        self.languages = languages or TRANSLATION_LANGUAGES
         self.fields_to_translate = [
             'scheme_name',
             'description',
@@ -17,66 +34,171 @@ class SchemeTranslator:
             'deadline',
             'category'
         ]
-        
+
+    def translate_texts(self, texts, languages):
+        """Translate texts into each language sentence by sentence, returning {lang: {text: translation}}"""
+        return self.translate_texts_per_language({lang: texts for lang in languages})
+
+    def translate_texts_per_language(self, texts_by_lang):
+        """Like translate_texts, with a separate list of texts for each language"""
+        translated = self.engine.translate_per_language({
+            lang: [sentence for text in texts if text for sentence, _ in split_sentences(text)]
+            for lang, texts in texts_by_lang.items()
+        })
+        return {
+            lang: {
+                text: ''.join(
+                    translated[lang].get(sentence, sentence) + separator
+                    for sentence, separator in split_sentences(text)
+                )
+                for text in texts if text
+            }
+            for lang, texts in texts_by_lang.items()
+        }
+
     def translate_text(self, text, target_lang):
-        """Translate text with retry mechanism and rate limiting"""
+        """Translate text sentence by sentence, reusing sentences translated before"""
         if not text:
             return text
-            
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                # Add delay to avoid rate limiting
-                time.sleep(1)
-                translation = self.translator.translate(text, dest=target_lang)
-                return translation.text
-            except Exception as e:
-                self.logger.error(f"Translation attempt {attempt + 1} failed: {str(e)}")
-                if attempt == max_retries - 1:
-                    return text  # Return original text if translation fails
-                time.sleep(2 ** attempt)  # Exponential backoff
-    
+        return self.translate_texts([text], [target_lang])[target_lang][text]
+
     def translate_scheme(self, scheme_data, target_lang):
         """Translate a single scheme's data"""
+        texts = [scheme_data[field] for field in self.fields_to_translate if scheme_data.get(field)]
+        translations = self.translate_texts(texts, [target_lang])[target_lang]
+        return self.apply_translations(scheme_data, translations)
+
+    def apply_translations(self, scheme_data, translations):
         translated_scheme = scheme_data.copy()
-        
         for field in self.fields_to_translate:
             if translated_scheme.get(field):
-                translated_scheme[field] = self.translate_text(
-                    translated_scheme[field], 
-                    target_lang
-                )
-                
+                translated_scheme[field] = translations[translated_scheme[field]]
         return translated_scheme
-    
+
+    def load_json(self, file_path):
+        """Raw bytes and parsed data of a JSON file, (None, {}) if it is missing or invalid"""
+        try:
+            data = Path(file_path).read_bytes()
+            return data, json.loads(data)
+        except FileNotFoundError:
+            return None, {}
+        except (OSError, json.JSONDecodeError) as e:
+            self.logger.warning(f"Ignoring unreadable {file_path}: {str(e)}")
+            return None, {}
+
+    def plan_language(self, schemes_data, existing, diff):
+        """Fields to translate per scheme for one language: changed fields, or all of them for schemes it lacks"""
+        plan = {}
+        for level, schemes in schemes_data.items():
+            for scheme_id in schemes:
+                key = (level, scheme_id)
+                if scheme_id not in existing.get(level, {}):
+                    plan[key] = self.fields_to_translate
+                elif key in diff.changed:
+                    plan[key] = diff.changed[key]
+        return plan
+
+    def build_language(self, schemes_data, existing, plan, translations):
+        """Translated data in source order, keeping existing translations of unchanged fields"""
+        translated_schemes = {}
+        for level, schemes in schemes_data.items():
+            translated_schemes[level] = {}
+            for scheme_id, scheme in schemes.items():
+                old = existing.get(level, {}).get(scheme_id)
+                fields = plan.get((level, scheme_id))
+                if fields is None:
+                    translated_schemes[level][scheme_id] = old
+                    continue
+                translated_scheme = scheme.copy()
+                for field in self.fields_to_translate:
+                    if field in fields or old is None:
+                        if translated_scheme.get(field):
+                            translated_scheme[field] = translations[translated_scheme[field]]
+                    elif field in old:
+                        translated_scheme[field] = old[field]
+                translated_schemes[level][scheme_id] = translated_scheme
+        return translated_schemes
+
     def translate_all_schemes(self, input_file, output_dir):
-        """Translate all schemes to multiple languages"""
-        # Load original JSON data
-        with open(input_file, 'r', encoding='utf-8') as f:
-            schemes_data = json.load(f)
-            
-        # Target languages
-        languages = {
-            'hi': 'hindi',
-            'mr': 'marathi'
+        """Translate new and changed fields of all schemes, keeping the earlier translations of the rest
+
+        The English file translated last is kept as a snapshot in output_dir.
+        Language files are replaced atomically, then a change manifest is
+        written with the schemes that changed and the hashes of the files
+        before and after, so the API can refresh just those entries.
+        """
+        input_file, output_dir = Path(input_file), Path(output_dir)
+        source_bytes = input_file.read_bytes()
+        schemes_data = json.loads(source_bytes)
+        snapshot_file = output_dir / TRANSLATION_SNAPSHOT_FILE
+        snapshot_bytes, previous_data = self.load_json(snapshot_file)
+        diff = SchemeDiff(previous_data, schemes_data)
+        self.logger.info(f"Since the last translation: {diff.summary()}")
+
+        files, existing, plans = {}, {}, {}
+        for lang_code, lang_name in self.languages.items():
+            files[lang_code] = output_dir / f'processed_schemes_{lang_name}.json'
+            existing[lang_code] = self.load_json(files[lang_code])
+            # Without the snapshot there is no telling what the file was made from
+            if snapshot_bytes is None:
+                existing[lang_code] = (existing[lang_code][0], {})
+            plans[lang_code] = self.plan_language(schemes_data, existing[lang_code][1], diff)
+
+        # Only the planned fields go to the engine, all languages at once
+        texts = {
+            lang_code: [
+                schemes_data[level][scheme_id][field]
+                for (level, scheme_id), fields in plan.items()
+                for field in fields
+                if field in self.fields_to_translate and schemes_data[level][scheme_id].get(field)
+            ]
+            for lang_code, plan in plans.items()
         }
-        
-        # Translate to each language
-        for lang_code, lang_name in languages.items():
-            self.logger.info(f"Translating schemes to {lang_name}")
-            translated_schemes = {}
-            
-            for level, schemes in schemes_data.items():
-                translated_schemes[level] = {}
-                for scheme_id, scheme in schemes.items():
-                    translated_schemes[level][scheme_id] = self.translate_scheme(
-                        scheme, 
-                        lang_code
-                    )
-            
-            # Save translated data
-            output_file = output_dir / f'processed_schemes_{lang_name}.json'
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(translated_schemes, f, indent=4, ensure_ascii=False)
-                
-            self.logger.info(f"Saved {lang_name} translations to {output_file}") 
\ No newline at end of file
+        for lang_code, lang_texts in texts.items():
+            self.logger.info(f"Translating {len(lang_texts)} fields to {self.languages[lang_code]}")
+        translations = self.translate_texts_per_language(texts)
+
+        manifest_files = {}
+        for lang_code, lang_name in self.languages.items():
+            old_bytes, old_data = existing[lang_code]
+            if old_bytes is not None and not diff and not plans[lang_code]:
+                continue
+            translated_schemes = self.build_language(schemes_data, old_data, plans[lang_code], translations[lang_code])
+            data = dump_schemes(translated_schemes)
+            write_atomic(files[lang_code], data)
+            manifest_files[lang_code] = {
+                'file': files[lang_code].name,
+                'previous_sha256': file_digest(old_bytes) if old_data else None,
+                'sha256': file_digest(data)
+            }
+            self.logger.info(f"Saved {lang_name} translations to {files[lang_code]}")
+
+        if source_bytes != snapshot_bytes:
+            manifest_files['en'] = {
+                'file': input_file.name,
+                'previous_sha256': file_digest(snapshot_bytes) if snapshot_bytes is not None else None,
+                'sha256': file_digest(source_bytes)
+            }
+
+        if manifest_files:
+            changes_file = output_dir / TRANSLATION_CHANGES_FILE
+            _, previous_manifest = self.load_json(changes_file)
+            manifest = {
+                'generation': previous_manifest.get('generation', 0) + 1,
+                'created': datetime.now(timezone.utc).isoformat(),
+                'files': manifest_files,
+                **diff.to_manifest()
+            }
+            write_atomic(changes_file, json.dumps(manifest, indent=4, ensure_ascii=False).encode('utf-8'))
+            # Last, so an interrupted run is redone from the same snapshot
+            write_atomic(snapshot_file, source_bytes)
+            self.logger.info(f"Wrote change manifest {manifest['generation']} to {changes_file}")
+
+        stats = self.engine.stats
+        message = (
+            f"Translation: {stats['requests']} backend requests for {stats['items']} sentences, "
+            f"{stats['cached']} from memory, {stats['retried']} retried, {stats['failed']} failed"
+        )
+        if self.memory:
+            message += f", memory hit rate {self.memory.hit_rate:.0%}, {self.memory.stats['evicted']} evicted"
+        self.logger.info(message)
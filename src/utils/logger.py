@@ -1,33 +1,160 @@
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import os
+import queue
 import sys
-from datetime import datetime
+import threading
+from datetime import datetime, timezone
+from multiprocessing import util
 from pathlib import Path
 
+from config import LOG_FILE, LOG_MAX_BYTES, LOG_ROTATE_WHEN, LOG_BACKUP_COUNT, LOG_FORMAT, LOG_LEVEL, LOG_LEVELS
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_FORMATS = ('text', 'json')
+
+# One queue handler shared by every pipeline logger, drained by the listener's thread
+# which does all formatting and writing
+_lock = threading.Lock()
+_handler = None
+_listener = None
+_settings = {}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'process': record.process,
+            'thread': record.threadName,
+            'message': record.getMessage()
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class BackgroundQueueHandler(logging.handlers.QueueHandler):
+    """Queues records for the listener thread, the calling thread never touches a stream"""
+
+    def prepare(self, record):
+        # Resolve what could change once the call returns (mutable arguments, the traceback),
+        # the format itself is left to the listener's handlers
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _file_handler(log_file, max_bytes, rotate_when, backup_count, forked):
+    if forked:
+        # Only the process that configured logging rotates, forked workers reopen the file after it did
+        return logging.handlers.WatchedFileHandler(log_file, encoding='utf-8')
+    if rotate_when:
+        return logging.handlers.TimedRotatingFileHandler(log_file, when=rotate_when, backupCount=backup_count,
+                                                         encoding='utf-8')
+    return logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count,
+                                                encoding='utf-8')
+
+
+def _start(settings, forked=False):
+    """Start a listener with the given settings and point the shared handler at its queue"""
+    global _handler, _listener, _settings
+    log_file = Path(settings['log_file'])
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+
+    formatter = JsonFormatter() if settings['fmt'] == 'json' else logging.Formatter(TEXT_FORMAT)
+    handlers = [
+        logging.StreamHandler(sys.stdout),
+        _file_handler(log_file, settings['max_bytes'], settings['rotate_when'], settings['backup_count'], forked)
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    records = queue.SimpleQueue()
+    previous = _listener
+    _listener = logging.handlers.QueueListener(records, *handlers)
+    _listener.start()
+    if _handler is None:
+        _handler = BackgroundQueueHandler(records)
+    else:
+        _handler.queue = records
+    _settings = settings
+    if previous is not None:
+        _stop(previous)
+
+
+def _stop(listener):
+    # Writes out whatever is still queued before the thread exits
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+def configure_logging(log_file=LOG_FILE, fmt=LOG_FORMAT, max_bytes=LOG_MAX_BYTES, rotate_when=LOG_ROTATE_WHEN,
+                      backup_count=LOG_BACKUP_COUNT):
+    """Start the background writer of the pipeline loggers, or restart it with new settings"""
+    if fmt not in LOG_FORMATS:
+        raise ValueError(f"Unsupported log format: {fmt}. Supported formats: {', '.join(LOG_FORMATS)}")
+    with _lock:
+        _start({
+            'log_file': log_file,
+            'fmt': fmt,
+            'max_bytes': max_bytes,
+            'rotate_when': rotate_when,
+            'backup_count': backup_count
+        })
+
+
+def shutdown_logging():
+    """Write out queued records and stop the background writer"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _stop(_listener)
+            _listener = None
+
+
 def setup_logger(name):
-    # Create logs directory if it doesn't exist
-    log_dir = Path('logs')
-    log_dir.mkdir(exist_ok=True)
+    """Logger writing through the shared background handler, calling it again for a name changes nothing"""
+    if _listener is None:
+        # First logger of this process, or the first after shutdown_logging
+        configure_logging(**_settings)
 
-    # Create logger
     logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-
-    # Create console handler and set level to info
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(logging.INFO)
+    logger.setLevel(LOG_LEVELS.get(name, LOG_LEVEL))
+    if _handler not in logger.handlers:
+        logger.addHandler(_handler)
+    # Every record is written once, by the shared handler, even if the root logger has handlers too
+    logger.propagate = False
+    return logger
 
-    # Create file handler and set level to info
-    log_file = log_dir / f'scraper_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log'
-    file_handler = logging.FileHandler(log_file)
-    file_handler.setLevel(logging.INFO)
 
-    # Create formatter
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    console_handler.setFormatter(formatter)
-    file_handler.setFormatter(formatter)
+def _after_fork_in_child():
+    # The listener thread does not exist in a forked process (e.g. a processing pool worker),
+    # so the child starts its own; its records would otherwise pile up in an unread queue
+    global _lock, _listener
+    _lock = threading.Lock()
+    if _listener is None:
+        return
+    _listener = None
+    _start(_settings, forked=True)
+    # Pool workers leave through os._exit, which skips atexit but runs multiprocessing finalizers
+    util.Finalize(None, shutdown_logging, exitpriority=-100)
 
-    # Add handlers to logger
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
 
-    return logger 
\ No newline at end of file
+atexit.register(shutdown_logging)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -1,6 +1,5 @@
 from src.utils.logger import setup_logger
 import os
-import spacy
 from pathlib import Path
 
 def create_project_structure():
@@ -40,8 +39,9 @@ def test_setup():
         else:
             logger.error(f"✗ Directory missing: {directory}")
 
-    # Test spaCy
+    # Test spaCy, imported here as only the pipeline needs it
     try:
+        import spacy
         nlp = spacy.load("en_core_web_sm")
         logger.info("✓ spaCy model loaded successfully")
     except Exception as e:
@@ -1,7 +1,9 @@
 from src.processors.pdf_processor import PDFProcessor
+from src.processors.dedup import SchemeDeduplicator
+from src.pipeline.ids import load_registry, organize_schemes
+from config import SCHEME_ID_FILE
 import json
 from pathlib import Path
-from collections import defaultdict
 
 def test_pdf_processor():
     processor = PDFProcessor()
@@ -11,24 +13,16 @@ def test_pdf_processor():
     output_dir = Path('data/processed_pdfs')
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    # Organize schemes by level
-    schemes_by_level = defaultdict(list)
-    for scheme in processed_data:
-        level = scheme.get('scheme_level', 'unspecified')
-        schemes_by_level[level].append(scheme)
+    # Schemes extracted from several PDFs become one, with all their source links
+    schemes = SchemeDeduplicator().deduplicate(processed_data)
     
-    # Create numbered schemes dictionary organized by level
-    organized_schemes = {}
-    for level in ['central', 'state', 'unspecified']:
-        if schemes_by_level[level]:
-            level_schemes = {
-                f"{level}_scheme_{str(idx+1).zfill(2)}": scheme
-                for idx, scheme in enumerate(schemes_by_level[level])
-            }
-            organized_schemes[level] = level_schemes
+    # Organize schemes by level under IDs that stay the same across runs
+    output_file = output_dir / 'processed_schemes.json'
+    registry = load_registry(SCHEME_ID_FILE, output_file)
+    organized_schemes = organize_schemes(schemes, registry)
+    registry.save()
     
     # Save processed data to JSON
-    output_file = output_dir / 'processed_schemes.json'
     with open(output_file, 'w', encoding='utf-8') as f:
         json.dump(organized_schemes, f, indent=4, ensure_ascii=False)
     
@@ -1,4 +1,5 @@
 from src.translators.translator import SchemeTranslator
+from convert_schemes import convert_schemes
 from pathlib import Path
 
 def test_translator():
@@ -13,5 +14,8 @@ def test_translator():
     # Translate schemes
     translator.translate_all_schemes(input_file, output_dir)
 
+    # The API serves schemes from the database converted from these files
+    convert_schemes()
+
 if __name__ == "__main__":
     test_translator() 
\ No newline at end of file
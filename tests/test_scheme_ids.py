@@ -0,0 +1,131 @@
+import json
+
+from src.pipeline.ids import SchemeIdRegistry, load_registry, organize_schemes
+
+
+def scheme(name, *links, level='central'):
+    """A processed scheme found in the given PDFs, merged from duplicates if there are several"""
+    data = {'scheme_name': name, 'scheme_level': level, 'source_link': links[0]}
+    if len(links) > 1:
+        data['source_links'] = list(links)
+    return data
+
+
+def ids_by_name(organized):
+    return {details['scheme_name']: scheme_id for schemes in organized.values() for scheme_id, details in schemes.items()}
+
+
+def reprocess(registry_file, published_file, schemes):
+    """One pipeline run: organize with the saved registry, then publish and save it"""
+    registry = load_registry(registry_file, published_file)
+    organized = organize_schemes(schemes, registry)
+    registry.save()
+    published_file.write_text(json.dumps(organized), encoding='utf-8')
+    return ids_by_name(organized)
+
+
+def test_reprocessing_keeps_ids_of_remaining_schemes(tmp_path):
+    registry_file, published_file = tmp_path / 'scheme_ids.json', tmp_path / 'processed_schemes.json'
+    first = reprocess(registry_file, published_file, [scheme('A', 'a.pdf'), scheme('B', 'b.pdf'),
+                                                      scheme('C', 'c.pdf'), scheme('S', 's.pdf', level='state')])
+    assert first == {'A': 'central_scheme_01', 'B': 'central_scheme_02', 'C': 'central_scheme_03',
+                     'S': 'state_scheme_01'}
+
+    # B is gone and D is new, listed before C
+    second = reprocess(registry_file, published_file, [scheme('A', 'a.pdf'), scheme('D', 'd.pdf'),
+                                                       scheme('C', 'c.pdf'), scheme('S', 's.pdf', level='state')])
+    assert second == {'A': 'central_scheme_01', 'D': 'central_scheme_04', 'C': 'central_scheme_03',
+                      'S': 'state_scheme_01'}
+
+    # B's number is never handed out again, even when B comes back
+    third = reprocess(registry_file, published_file, [scheme('A', 'a.pdf'), scheme('B', 'b.pdf'),
+                                                      scheme('E', 'e.pdf')])
+    assert third == {'A': 'central_scheme_01', 'B': 'central_scheme_02', 'E': 'central_scheme_05'}
+
+
+def test_merged_scheme_keeps_first_id_of_its_links(tmp_path):
+    registry_file, published_file = tmp_path / 'scheme_ids.json', tmp_path / 'processed_schemes.json'
+    reprocess(registry_file, published_file, [scheme('A', 'a.pdf'), scheme('B', 'b.pdf'), scheme('C', 'c.pdf')])
+
+    merged = reprocess(registry_file, published_file, [scheme('B+A', 'b.pdf', 'a.pdf'), scheme('C', 'c.pdf')])
+    assert merged == {'B+A': 'central_scheme_02', 'C': 'central_scheme_03'}
+
+    # Split again, each keeps its own ID
+    split = reprocess(registry_file, published_file, [scheme('A', 'a.pdf'), scheme('B', 'b.pdf'), scheme('C', 'c.pdf')])
+    assert split == {'A': 'central_scheme_01', 'B': 'central_scheme_02', 'C': 'central_scheme_03'}
+
+
+def test_new_link_of_a_merged_scheme_maps_to_its_id(tmp_path):
+    registry_file, published_file = tmp_path / 'scheme_ids.json', tmp_path / 'processed_schemes.json'
+    reprocess(registry_file, published_file, [scheme('A', 'a.pdf')])
+    reprocess(registry_file, published_file, [scheme('A', 'a.pdf', 'a-revised.pdf')])
+
+    # Only the revised PDF is left, it is still the same scheme
+    assert reprocess(registry_file, published_file, [scheme('A', 'a-revised.pdf')]) == {'A': 'central_scheme_01'}
+
+
+def test_id_taken_in_the_same_run_is_not_given_twice():
+    registry = SchemeIdRegistry()
+    organize_schemes([scheme('A', 'a.pdf'), scheme('B', 'b.pdf')], registry)
+
+    # Both schemes claim a.pdf's ID; the first keeps it, the second falls back to its other link
+    organized = organize_schemes([scheme('A', 'a.pdf'), scheme('A+B', 'a.pdf', 'b.pdf'), scheme('A again', 'a.pdf')],
+                                 registry)
+    assert ids_by_name(organized) == {'A': 'central_scheme_01', 'A+B': 'central_scheme_02',
+                                      'A again': 'central_scheme_03'}
+
+
+def test_level_change_keeps_id(tmp_path):
+    registry_file, published_file = tmp_path / 'scheme_ids.json', tmp_path / 'processed_schemes.json'
+    reprocess(registry_file, published_file, [scheme('A', 'a.pdf'), scheme('B', 'b.pdf')])
+
+    moved = reprocess(registry_file, published_file, [scheme('A', 'a.pdf', level='state'), scheme('B', 'b.pdf'),
+                                                      scheme('S', 's.pdf', level='state')])
+    assert moved == {'A': 'central_scheme_01', 'B': 'central_scheme_02', 'S': 'state_scheme_01'}
+    published = json.loads(published_file.read_text(encoding='utf-8'))
+    assert list(published['state']) == ['central_scheme_01', 'state_scheme_01']
+    assert list(published['central']) == ['central_scheme_02']
+
+
+def test_first_registry_is_seeded_from_the_published_file(tmp_path):
+    registry_file, published_file = tmp_path / 'scheme_ids.json', tmp_path / 'processed_schemes.json'
+    # Published before the registry existed, with gaps in the numbering
+    published_file.write_text(json.dumps({
+        'central': {
+            'central_scheme_02': scheme('A', 'a.pdf'),
+            'central_scheme_05': scheme('B', 'b.pdf', 'b-annex.pdf')
+        },
+        'state': {'state_scheme_03': scheme('S', 's.pdf', level='state')}
+    }), encoding='utf-8')
+
+    ids = reprocess(registry_file, published_file, [scheme('New', 'new.pdf'), scheme('B', 'b-annex.pdf'),
+                                                    scheme('A', 'a.pdf'), scheme('S', 's.pdf', level='state'),
+                                                    scheme('New state', 'new-state.pdf', level='state')])
+    assert ids == {'New': 'central_scheme_06', 'B': 'central_scheme_05', 'A': 'central_scheme_02',
+                   'S': 'state_scheme_03', 'New state': 'state_scheme_04'}
+
+
+def test_seeding_gives_a_shared_link_to_the_first_scheme_only():
+    registry = SchemeIdRegistry()
+    registry.seed({'central': {'central_scheme_01': scheme('A', 'a.pdf'), 'central_scheme_02': scheme('B', 'a.pdf')}})
+
+    organized = organize_schemes([scheme('A', 'a.pdf'), scheme('C', 'c.pdf')], registry)
+    assert ids_by_name(organized) == {'A': 'central_scheme_01', 'C': 'central_scheme_03'}
+
+
+def test_saved_registry_is_not_reseeded(tmp_path):
+    registry_file, published_file = tmp_path / 'scheme_ids.json', tmp_path / 'processed_schemes.json'
+    reprocess(registry_file, published_file, [scheme('A', 'a.pdf'), scheme('B', 'b.pdf')])
+
+    # A published file edited by hand does not override the IDs given out
+    published_file.write_text(json.dumps({'central': {'central_scheme_09': scheme('A', 'a.pdf')}}), encoding='utf-8')
+    assert reprocess(registry_file, published_file, [scheme('A', 'a.pdf'), scheme('C', 'c.pdf')]) == {
+        'A': 'central_scheme_01', 'C': 'central_scheme_03'
+    }
+
+
+def test_without_registry_numbering_starts_over():
+    organized = organize_schemes([scheme('A', 'a.pdf'), scheme('S', 's.pdf', level='state'),
+                                  scheme('X', 'x.pdf', level='district')])
+    assert organized == {'central': {'central_scheme_01': scheme('A', 'a.pdf')},
+                         'state': {'state_scheme_01': scheme('S', 's.pdf', level='state')}}